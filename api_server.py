@@ -1,18 +1,26 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import List, Dict, Optional, Union
 from game import Game
-from game_interface import GameInterface
+from game_interface import GameInterface, StateCache, TileIndex, encode_json
 from game_enums import ControllerActionType
+from instrumentation import metrics
+from live_updates import Hub, Subscriber
+import wire_format
+from session_manager import GameSession, SessionManager
+import asyncio
 import json
 import logging
+import os
+import time
 
-# Configure logging
+# Configure logging; SPACEFARM_LOG_LEVEL=DEBUG also dumps every turn's state
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=os.environ.get('SPACEFARM_LOG_LEVEL', 'INFO').upper(),
     format='%(asctime)s [%(levelname)s] %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
 )
@@ -35,13 +43,56 @@ def load_level_configs():
 # Load initial configurations
 load_level_configs()
 
-# Create global game instance with default level
-game = Game(LEVEL_CONFIGS['rare'])
-current_level = 'rare'
+# Independent games per player, keyed by the X-Session-Id header
+sessions = SessionManager(
+    LEVEL_CONFIGS,
+    default_level='rare',
+    max_sessions=int(os.environ.get('SPACEFARM_MAX_SESSIONS', 500)),
+    idle_timeout=float(os.environ.get('SPACEFARM_SESSION_IDLE_TIMEOUT', 3600)),
+    max_memory=int(os.environ.get('SPACEFARM_SESSION_MEMORY_MB', 2048)) * 2**20
+)
+
+# Sessions are saved here on shutdown and resumed on startup, when set
+SAVE_DIR = os.environ.get('SPACEFARM_SAVE_DIR')
+
+# WebSocket subscribers by session id, see /game/ws
+live = Hub()
+# The latest frame pushed for each session, shared by its subscribers
+push_frames: Dict[str, tuple] = {}
+# Least time between two progress frames of a RUN order
+RUN_PROGRESS_INTERVAL = float(os.environ.get('SPACEFARM_RUN_PROGRESS_INTERVAL', 0.25))
+
+def get_session(response: Response, x_session_id: Optional[str] = Header(None)) -> GameSession:
+    """Resolve the caller's session, starting a new game for unknown ids.
+    The id in use is echoed back in the X-Session-Id response header."""
+    try:
+        session = sessions.get_or_create(x_session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers['X-Session-Id'] = session.id
+    return session
+
+async def run_in_session(session: GameSession, func, *args):
+    """Run blocking game work in the worker thread pool so the event loop
+    keeps serving other requests. Calls for one session run one at a time,
+    in the order they arrived."""
+    async with session.lock:
+        return await run_in_threadpool(func, *args)
 
 # Create FastAPI app
 app = FastAPI(title="SpaceDew Game API")
 
+@app.on_event("startup")
+def restore_sessions():
+    if SAVE_DIR:
+        logger.info("Restored %d sessions from %s", sessions.load_all(SAVE_DIR), SAVE_DIR)
+
+@app.on_event("shutdown")
+def save_sessions():
+    if SAVE_DIR:
+        sessions.save_all(SAVE_DIR)
+        logger.info("Saved %d sessions to %s", len(sessions), SAVE_DIR)
+
 # Add CORS middleware to allow cross-origin requests
 app.add_middleware(
     CORSMiddleware,
@@ -49,6 +100,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Session-Id"],
 )
 
 # Serve static files
@@ -63,98 +115,266 @@ class TurnOrders(BaseModel):
     orders: List[TurnOrder]
 
 @app.get("/game/levels")
-async def get_levels():
+async def get_levels(session: GameSession = Depends(get_session)):
     """Get list of available levels"""
     return {
         "levels": list(LEVEL_CONFIGS.keys()),
-        "current_level": current_level
+        "current_level": session.level
     }
 
 @app.post("/game/restart")
-async def restart_game(level: Optional[str] = None):
-    """Restart the game with optionally specified level"""
-    global game, current_level
-    
-    # If no level specified, use current level
-    if level is None:
-        level = current_level
-    
+async def restart_game(response: Response, level: Optional[str] = None,
+                       session: GameSession = Depends(get_session)):
+    """Restart this session's game with optionally specified level"""
     # Validate level exists
-    if level not in LEVEL_CONFIGS:
+    if level is not None and level not in LEVEL_CONFIGS:
         raise HTTPException(status_code=400, detail=f"Invalid level: {level}")
     
-    # Create new game instance with specified level config
-    try:
-        game = Game(LEVEL_CONFIGS[level])
-        current_level = level
+    def restart():
+        # Replace the session's game while holding its lock, so requests
+        # queued behind this one find the new game on the same session
+        restarted = sessions.restart(session.id, level)
+        push_frames.pop(session.id, None)
         
         # Return initial game state
         interface = GameInterface()
-        interface.game = game
-        return interface.get_game_state()
+        interface.game = restarted.game
+        return json_response(response, interface.get_game_state())
+
+    try:
+        return await run_in_session(session, restart)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        live.publish(session.id)
 
-@app.get("/game/state")
-async def get_game_state():
-    """Get current game state"""
+def is_sparse(format: str) -> bool:
+    """Validate a `format` query parameter"""
+    if format not in ('dense', 'sparse'):
+        raise HTTPException(status_code=400, detail=f"Invalid format: {format}")
+    return format == 'sparse'
+
+def check_since(since: Optional[int]) -> None:
+    """Validate a `since` query parameter (a state version)"""
+    if since is not None and since < 0:
+        raise HTTPException(status_code=400, detail=f"Invalid since: {since}")
+
+def raw_response(response: Response, content: bytes = b'', status_code: int = 200,
+                 media_type: str = 'application/json') -> Response:
+    """A response with content that is already encoded, carrying the headers
+    set on the injected `response` (which FastAPI drops for Response returns)"""
+    headers = {name: value for name, value in response.headers.items() if name != 'content-length'}
+    return Response(content=content, status_code=status_code, headers=headers,
+                    media_type=media_type if content else None)
+
+def json_response(response: Response, data: dict) -> Response:
+    """raw_response for a JSON document. Encoding a large state takes as long
+    as building it, so call this in the worker too: FastAPI would otherwise
+    encode a returned dict on the event loop."""
+    return raw_response(response, encode_json(data))
+
+def not_modified(response: Response, etag: str, if_none_match: Optional[str]) -> Optional[Response]:
+    """Tag a response for revalidating caches. Returns the 304 response to
+    send instead when the client already holds this version."""
+    response.headers.update({'ETag': etag, 'Cache-Control': 'no-cache',
+                             'Vary': 'X-Session-Id, Accept, Accept-Encoding'})
+    if if_none_match and (if_none_match.strip() == '*' or
+                          etag in (tag.strip() for tag in if_none_match.split(','))):
+        return raw_response(response, status_code=304)
+    return None
+
+def build_state_response(game: Game, since: Optional[int], format: str = 'dense') -> dict:
+    """Full game state, or only the changes after `since` when it is given"""
+    sparse = is_sparse(format)
     interface = GameInterface()
     interface.game = game
-    return interface.get_game_state()
+    with metrics.phase('serialization'):
+        if since is None:
+            return interface.get_game_state(sparse)
+        return interface.get_game_state_delta(since, sparse)
+
+@app.get("/game/state")
+async def get_game_state(response: Response, since: Optional[int] = None, format: str = 'dense',
+                         accept: Optional[str] = Header(None),
+                         accept_encoding: Optional[str] = Header(None),
+                         if_none_match: Optional[str] = Header(None),
+                         session: GameSession = Depends(get_session)):
+    """Get current game state, or a delta against version `since`.
+    format=sparse lists only occupied cells and refers to bots by id.
+    Full dense states come in the binary wire format when the client accepts
+    application/x-spacefarm-state, and bodies are compressed with br or gzip
+    as Accept-Encoding allows. Responses are encoded once per game version
+    and carry an ETag."""
+    sparse = is_sparse(format)
+    encoding = wire_format.negotiate_encoding(accept_encoding)
+
+    def build():
+        game = session.game
+        binary = (wire_format.MEDIA_TYPE in (accept or '') and not sparse
+                  and StateCache.delta_base(game, since) is None)
+        cache = StateCache.for_game(game)
+        cached = not_modified(response, cache.etag(game, since, sparse, binary, encoding), if_none_match)
+        if cached is not None:
+            return cached
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        with metrics.phase('serialization'):
+            body = cache.get(game, since, sparse, binary, encoding)
+        return raw_response(response, body,
+                            media_type=wire_format.MEDIA_TYPE if binary else 'application/json')
+
+    return await run_in_session(session, build)
+
+@app.get("/game/viewport")
+async def get_game_viewport(x: int, y: int, width: int, height: int, format: str = 'dense',
+                            session: GameSession = Depends(get_session)):
+    """The cells of the width x height area from (x, y) on, clipped to the map"""
+    sparse = is_sparse(format)
+
+    def build_viewport():
+        interface = GameInterface()
+        interface.game = session.game
+        return interface.get_viewport_state(x, y, width, height, sparse)
+
+    try:
+        return await run_in_session(session, build_viewport)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/game/tiles/{tile_x}/{tile_y}")
+async def get_game_tile(tile_x: int, tile_y: int, response: Response, format: str = 'dense',
+                        if_none_match: Optional[str] = Header(None),
+                        session: GameSession = Depends(get_session)):
+    """The cells of one fixed-size tile of the map. Tiles carry an ETag that
+    only changes with their cells, so clients can revalidate them cheaply."""
+    sparse = is_sparse(format)
+
+    def build_tile():
+        # The ETag and the body come from the same game, the one current
+        # once the lock is held
+        interface = GameInterface()
+        interface.game = game = session.game
+        etag = TileIndex.for_game(game).etag(game, tile_x, tile_y)
+        return (not_modified(response, etag, if_none_match)
+                or interface.get_tile_state(tile_x, tile_y, sparse))
+
+    try:
+        return await run_in_session(session, build_tile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/game/overview")
+async def get_game_overview(response: Response, if_none_match: Optional[str] = Header(None),
+                            session: GameSession = Depends(get_session)):
+    """Asset totals and bot counts per tile, for a minimap"""
+    def build_overview():
+        interface = GameInterface()
+        interface.game = game = session.game
+        etag = TileIndex.for_game(game).overview_etag(game)
+        return not_modified(response, etag, if_none_match) or interface.get_overview()
+
+    return await run_in_session(session, build_overview)
+
+@app.get("/game/events")
+async def get_game_events(since: int = -1, limit: int = 100,
+                          session: GameSession = Depends(get_session)):
+    """Page through the event log: up to `limit` events with seq above `since`"""
+    if not 1 <= limit <= 1000:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 1000")
+
+    def build_events():
+        interface = GameInterface()
+        interface.game = session.game
+        return interface.get_events(since, limit)
+
+    return await run_in_session(session, build_events)
 
 @app.get("/game/grid", response_class=HTMLResponse)
-async def get_game_grid():
-    """Get the HTML representation of the game grid"""
+async def get_game_grid(x: Optional[int] = None, y: Optional[int] = None,
+                        width: int = 20, height: int = 20,
+                        session: GameSession = Depends(get_session)):
+    """Get the HTML representation of the game grid; with x and y, only the
+    width x height area from there on"""
+    def build_grid():
+        if x is None or y is None:
+            return GameInterface.generate_html_grid(session.game)
+        return GameInterface.generate_html_viewport(session.game, x, y, width, height)
+
     try:
-        grid_html = GameInterface.generate_html_grid(game)
-        return grid_html
+        return await run_in_session(session, build_grid)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/game/turn")
-async def process_turn(turn_orders: TurnOrders):
-    """Process a game turn with the provided orders"""
-    try:
-        logger.debug("Received turn orders:")
-        # logger.debug(json.dumps(turn_orders.dict(), indent=2))
-        
-        # Convert string action_types to ControllerActionType enum
-        orders = []
+@app.get("/game/grid/changes")
+async def get_game_grid_changes(since: int, session: GameSession = Depends(get_session)):
+    """HTML of the grid cells changed after version `since`, keyed by element id,
+    or the whole grid as `html` when `since` is too old"""
+    return await run_in_session(session, lambda: GameInterface.get_html_grid_changes(session.game, since))
+
+def convert_orders(turn_orders: TurnOrders) -> List[Dict]:
+    """Turn request orders into the form Game.process_turn takes"""
+    logger.debug("Received %d turn orders", len(turn_orders.orders))
+    
+    # Convert string action_types to ControllerActionType enum
+    orders = []
+    with metrics.phase('order_validation'):
         for order in turn_orders.orders:
             # Convert action_type string to enum
             try:
                 action_type = ControllerActionType[order.action_type]
-                logger.debug(f"Converting action_type '{order.action_type}' to enum {action_type}")
             except KeyError:
                 error_msg = f"Invalid action_type: {order.action_type}"
                 logger.error(error_msg)
                 raise HTTPException(status_code=400, detail=error_msg)
             
             # Create order dict with enum
-            processed_order = {
+            orders.append({
                 'controller_id': order.controller_id,
                 'action_type': action_type,
                 'parameters': order.parameters
-            }
-            logger.debug(f"Processed order: {json.dumps(processed_order, indent=2, default=str)}")
-            orders.append(processed_order)
-        
-        #logger.debug("Processing turn with orders:")
-        #logger.debug(json.dumps(orders, indent=2, default=str))
-        
-        # Process the turn
-        game.process_turn(orders)
-        
-        # Get updated game state
-        interface = GameInterface()
-        interface.game = game
-        response_data = interface.get_game_state()
-        
-        logger.debug("Turn processed successfully. Response:")
-        logger.debug(json.dumps(response_data, indent=2, default=str))
+            })
+    return orders
+
+@app.post("/game/turn")
+async def process_turn(turn_orders: TurnOrders, response: Response, since: Optional[int] = None,
+                       format: str = 'dense', session: GameSession = Depends(get_session)):
+    """Process a game turn with the provided orders.
+    With `since`, only the changes after that state version are returned.
+    A RUN order adds its summary to the response as `run`."""
+    # Reject a bad query before any order is applied
+    is_sparse(format)
+    check_since(since)
+    orders = convert_orders(turn_orders)
+    report_progress = None
+    if live.has_subscribers(session.id):
+        report_progress = run_progress_reporter(session.id)
+    try:
+        def run_turn():
+            # Process the turn
+            session.game.on_run_progress = report_progress
+            try:
+                session.game.process_turn(orders)
+            finally:
+                session.game.on_run_progress = None
+            
+            # Get updated game state
+            response_data = build_state_response(session.game, since, format)
+            if any(order['action_type'] == ControllerActionType.RUN for order in orders):
+                response_data['run'] = session.game.last_run
+            
+            # Dumping the state is as costly as building it, so only do it when asked
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Turn processed successfully. Response:\n%s",
+                             json.dumps(response_data, indent=2, default=str))
+            
+            return json_response(response, response_data)
         
-        return response_data
+        return await run_in_session(session, run_turn)
     
+    except HTTPException:
+        raise
     except ValueError as e:
         error_msg = str(e)
         logger.error(f"ValueError in process_turn: {error_msg}")
@@ -163,6 +383,113 @@ async def process_turn(turn_orders: TurnOrders):
         error_msg = str(e)
         logger.error(f"Unexpected error in process_turn: {error_msg}")
         raise HTTPException(status_code=500, detail=error_msg)
+    finally:
+        # Orders before a failing one may have been applied
+        live.publish(session.id)
+
+def run_progress_reporter(session_id: str):
+    """Game.on_run_progress callback pushing a session's RUN progress to
+    its subscribers, at most every RUN_PROGRESS_INTERVAL seconds. It is
+    called from the worker thread, so it hands over to the event loop."""
+    loop = asyncio.get_running_loop()
+    last_sent = 0.0
+
+    def report(progress: dict) -> None:
+        nonlocal last_sent
+        now = time.monotonic()
+        if now - last_sent >= RUN_PROGRESS_INTERVAL:
+            last_sent = now
+            loop.call_soon_threadsafe(live.publish_progress, session_id, progress)
+
+    return report
+
+async def build_push_state(session_id: str, subscriber: Subscriber) -> Optional[dict]:
+    """State frame for a subscriber: the changes since the version it holds,
+    or the full state when it has none or the session started a new game"""
+    session = sessions.get(session_id)
+    if session is None:
+        return None
+
+    def build():
+        game = session.game
+        if game is subscriber.game and subscriber.version == game.version:
+            return None
+        since = subscriber.version if game is subscriber.game else None
+        # Subscribers that were in step get the same frame, built once
+        key = (game, since, subscriber.sparse, game.version)
+        cached = push_frames.get(session_id)
+        if cached is not None and cached[0] == key:
+            state = cached[1]
+        else:
+            state = build_state_response(game, since, 'sparse' if subscriber.sparse else 'dense')
+            push_frames[session_id] = (key, state)
+        subscriber.game, subscriber.version = game, game.version
+        return state
+
+    return await run_in_session(session, build)
+
+@app.websocket("/game/ws")
+async def game_updates(websocket: WebSocket, session_id: str, format: str = 'dense'):
+    """Push a session's state to the client: the full state on connect, then
+    a delta (with the new events) after every turn, and progress frames
+    during RUN orders. Anyone with the session id can watch; updates a
+    slow client has no time for are merged into its next frame."""
+    if sessions.get(session_id) is None or format not in ('dense', 'sparse'):
+        await websocket.close(code=4404)
+        return
+    await websocket.accept()
+    subscriber = Subscriber(websocket.send_json,
+                            lambda subscriber: build_push_state(session_id, subscriber),
+                            sparse=format == 'sparse')
+    live.subscribe(session_id, subscriber)
+
+    async def write():
+        try:
+            await subscriber.run()
+        except Exception as e:
+            # The client went away mid-send; the receive loop sees it too
+            logger.debug("Stopped pushing to a subscriber of %s: %s", session_id, e)
+
+    writer = asyncio.create_task(write())
+    try:
+        # Nothing is expected from the client; this notices it going away
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        live.unsubscribe(session_id, subscriber)
+        if not live.has_subscribers(session_id):
+            push_frames.pop(session_id, None)
+        subscriber.close()
+        writer.cancel()
+
+@app.post("/game/preview")
+async def preview_turn(turn_orders: TurnOrders, response: Response, format: str = 'dense',
+                       session: GameSession = Depends(get_session)):
+    """Play the orders on a fork of the game and return what they would change,
+    as a delta against the current version. The game itself is left as it is;
+    with no other changes in between, playing the same orders gives the same result."""
+    orders = convert_orders(turn_orders)
+    
+    def run_preview():
+        fork = session.game.fork()
+        fork.process_turn(orders)
+        return json_response(response, build_state_response(fork, session.game.version, format))
+    
+    try:
+        return await run_in_session(session, run_preview)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Per-phase turn timings in the Prometheus text format"""
+    return metrics.render_prometheus({
+        'sessions': len(sessions),
+        'live_subscribers': len(live),
+        'session_memory_bytes': sessions.memory
+    })
 
 @app.get("/")
 async def get_game_client():
@@ -0,0 +1,42 @@
+"""Bot action throughput of the scalar and batched bot action engines.
+
+Plays the same actions through Game.play_bot_actions, one action at a
+time, and through Game.play_bot_actions_batched, which process_bot_actions
+uses from Game.BATCH_MIN_ACTIONS actions on. Both end in the same state.
+
+Usage: python benchmarks/bench_bot_actions.py [bots] [energy] [deck_length]
+"""
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_config import FARM_DECK, make_config, spread_positions
+from game import Game
+
+DECK = FARM_DECK + [{'type': 'HARVEST', 'parameter': 'COAL'}]
+
+
+def measure(bots: int, energy: int, deck_length: int, repeat: int = 3) -> None:
+    deck = [DECK[i % len(DECK)] for i in range(deck_length)]
+    config = make_config(500, spread_positions(500, bots), deck, energy=energy)
+    print(f"{bots} bots, deck {deck_length}, {energy} actions")
+    for engine in ('play_bot_actions', 'play_bot_actions_batched'):
+        elapsed = float('inf')
+        for _ in range(repeat):
+            game = Game(config, seed=1)
+            controller = game.controllers[0]
+            gc.collect()
+            start = time.perf_counter()
+            getattr(game, engine)(controller, energy)
+            elapsed = min(elapsed, time.perf_counter() - start)
+        print(f"  {engine:26} {elapsed:.3f} s = {energy / elapsed:10.0f} actions/s")
+
+
+if __name__ == '__main__':
+    bots = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    energy = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    deck_length = int(sys.argv[3]) if len(sys.argv) > 3 else 40
+    measure(bots, energy, deck_length)
@@ -0,0 +1,81 @@
+"""Level configurations shared by the benchmarks.
+
+make_config builds a square level with one controller and an out of
+reach victory, so games run for as long as a benchmark needs.
+"""
+from typing import Iterable, List, Optional, Tuple
+
+from game_enums import ControllerActionType
+
+# Harvest and replant where the bot stands, stepping east and back
+FARM_DECK = [
+    {'type': 'HARVEST', 'parameter': 'PLANT'},
+    {'type': 'MOVE', 'parameter': 'EAST'},
+    {'type': 'PLANT', 'parameter': 'PLANT'},
+    {'type': 'MOVE', 'parameter': 'WEST'},
+]
+
+# Harvest and replant while drifting south-east, for bots started in a row
+ROW_DECK = [
+    {'type': 'HARVEST', 'parameter': 'PLANT'},
+    {'type': 'MOVE', 'parameter': 'SOUTH'},
+    {'type': 'PLANT', 'parameter': 'PLANT'},
+    {'type': 'MOVE', 'parameter': 'EAST'},
+]
+
+MIXED_ASSETS = ['ORE', 'PLANT', 'COAL', 'PLANT_SEEDLING']
+
+# Half a day of actions for controller 0
+TURN = [{
+    'controller_id': 0,
+    'action_type': ControllerActionType.TAKE_BOT_ACTIONS,
+    'parameters': {'energy_points': 12}
+}]
+
+
+def spread_positions(size: int, bots: int) -> List[Tuple[int, int]]:
+    """Up to `bots` starting positions on a size x size map, on a grid
+    spaced so that bots playing FARM_DECK never meet."""
+    if bots <= 0:
+        return []
+    spacing = max(3, int((size * size / bots) ** 0.5))
+    positions = [(x, y) for y in range(0, size, spacing) for x in range(1, size - 1, spacing)]
+    return positions[:bots]
+
+
+def striped_assets(size: int, asset_types: List[str]) -> List[dict]:
+    """An initial_state with three of an asset on every third cell, cycling
+    through asset_types. Explicit placement is linear, unlike 'uniform'
+    generation, so large maps set up quickly."""
+    return [
+        {'type': asset_types[(x + y) % len(asset_types)], 'amount': 3, 'x': x, 'y': y}
+        for y in range(size) for x in range(size) if (x + y) % 3 == 0
+    ]
+
+
+def make_config(size: int, positions: Iterable[Tuple[int, int]] = ((0, 0),),
+                deck: Optional[List[dict]] = None, energy: int = 10 ** 9, biomass: int = 0,
+                **rules) -> dict:
+    """A size x size level whose controller has bots at `positions`, all
+    playing `deck` (one MOVE EAST card by default). The map starts empty;
+    `rules` (initial_state, asset_distribution, map_storage, ...) are
+    added to the config or replace its defaults."""
+    if deck is None:
+        deck = [{'type': 'MOVE', 'parameter': 'EAST'}]
+    config = {
+        'map_width': size,
+        'map_height': size,
+        'seedling_maturity_time': 3,
+        'new_bot_cost': 10,
+        'modify_deck_cost': 1,
+        'victory_conditions': {'ENERGY': 10 ** 10},
+        'initial_state': 'empty',
+        'controllers': [
+            {
+                'resources': {'MINERAL': 0, 'BIOMASS': biomass, 'ENERGY': energy},
+                'bots': [{'x': x, 'y': y, 'deck': deck} for x, y in positions]
+            }
+        ]
+    }
+    config.update(rules)
+    return config
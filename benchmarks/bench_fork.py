@@ -0,0 +1,43 @@
+"""Cost of forking a game and playing one turn on the fork, against copy.deepcopy.
+
+Usage: python benchmarks/bench_fork.py [size] [bots] [repeat]
+"""
+import copy
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_config import FARM_DECK, MIXED_ASSETS, TURN, make_config, spread_positions, striped_assets
+from game import Game
+
+
+def measure(label: str, game: Game, clone, repeat: int) -> None:
+    copy_time = turn_time = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fork = clone(game)
+        copied = time.perf_counter()
+        fork.process_turn(TURN)
+        done = time.perf_counter()
+        copy_time = min(copy_time, copied - start)
+        turn_time = min(turn_time, done - copied)
+    print(f"{label:>18}: copy {copy_time * 1000:9.2f} ms  turn {turn_time * 1000:8.2f} ms  "
+          f"total {(copy_time + turn_time) * 1000:9.2f} ms")
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    bots = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    print(f"{size}x{size} map, {bots} bots")
+    for storage in ('objects', 'arrays'):
+        config = make_config(size, spread_positions(size, bots), FARM_DECK, energy=10 ** 6, biomass=10,
+                             map_storage=storage, initial_state=striped_assets(size, MIXED_ASSETS))
+        game = Game(config, seed=1)
+        game.process_turn(TURN)
+        measure(f"{storage} fork", game, Game.fork, repeat)
+        measure(f"{storage} deepcopy", game, copy.deepcopy, 1)
@@ -0,0 +1,44 @@
+"""Render time of the HTML grid (GameInterface.generate_html_grid) after a
+turn that changes a share of the cells.
+
+Usage: python benchmarks/bench_html_grid.py [size] [changed_percent] [turns]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_config import make_config
+from game import Game
+from game_enums import AssetType
+from game_interface import GameInterface
+from game_objects import Asset, Position
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    percent = float(sys.argv[2]) if len(sys.argv) > 2 else 1
+    turns = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    config = make_config(size, energy=100, initial_state='uniform',
+                         asset_distribution={'ORE': size * 40, 'PLANT': size * 40, 'COAL': size * 40})
+    game = Game(config, seed=1)
+    rng = random.Random(2)
+    changed = int(size * size * percent / 100)
+
+    start = time.perf_counter()
+    html = GameInterface.generate_html_grid(game)
+    first = time.perf_counter() - start
+
+    elapsed = 0.0
+    for _ in range(turns):
+        for _ in range(changed):
+            game.place_asset(Position(rng.randrange(size), rng.randrange(size)), Asset(AssetType.COAL, 1))
+        start = time.perf_counter()
+        html = GameInterface.generate_html_grid(game)
+        elapsed += time.perf_counter() - start
+
+    print(f"{size}x{size} map, {len(html) / 2**20:.1f} MiB of HTML")
+    print(f"  first render:              {first * 1000:8.1f} ms")
+    print(f"  render after {percent:g}% changed: {elapsed / turns * 1000:8.1f} ms")
@@ -0,0 +1,69 @@
+"""Turn latency with instrumentation off, with phase timers, and with debug logging.
+
+Each turn runs the engine and builds the delta response the API would
+serve. Debug logging goes to a discarding handler so only the cost of
+formatting is measured.
+
+Usage: python benchmarks/bench_instrumentation.py [bots] [turns]
+"""
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_config import FARM_DECK, make_config, spread_positions
+from game import Game
+from game_enums import ControllerActionType
+from game_interface import GameInterface
+from instrumentation import metrics
+
+SIZE = 200
+
+
+def measure(label: str, bots: int, turns: int) -> None:
+    config = make_config(SIZE, spread_positions(SIZE, bots), FARM_DECK, energy=10 ** 8, biomass=10,
+                         initial_state='uniform',
+                         asset_distribution={'PLANT': SIZE * 20, 'PLANT_SEEDLING': SIZE * 5})
+    game = Game(config, seed=5)
+    interface = GameInterface()
+    interface.game = game
+    orders = [{
+        'controller_id': 0,
+        'action_type': ControllerActionType.TAKE_BOT_ACTIONS,
+        'parameters': {'energy_points': 12}
+    }]
+    samples = []
+    for _ in range(turns):
+        version = game.version
+        start = time.perf_counter()
+        game.process_turn(orders)
+        with metrics.phase('serialization'):
+            interface.get_game_state_delta(version)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    print(f"{label:>14}: mean {statistics.mean(samples) * 1000:7.2f} ms  "
+          f"p50 {samples[len(samples) // 2] * 1000:7.2f} ms  "
+          f"p99 {samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000:7.2f} ms")
+
+
+if __name__ == '__main__':
+    bots = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    root = logging.getLogger()
+    root.addHandler(logging.NullHandler())
+
+    metrics.enabled = False
+    root.setLevel(logging.WARNING)
+    measure('off', bots, turns)
+
+    metrics.enabled = True
+    measure('phase timers', bots, turns)
+
+    root.setLevel(logging.DEBUG)
+    measure('timers + debug', bots, turns)
+    root.setLevel(logging.WARNING)
+
+    print(metrics.render_prometheus(), end='')
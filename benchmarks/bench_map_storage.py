@@ -0,0 +1,37 @@
+"""Startup time and memory of the two map storage modes.
+
+Usage: python benchmarks/bench_map_storage.py [size]
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_config import make_config
+from game import Game
+
+
+def measure(size: int, storage: str) -> None:
+    config = make_config(size, energy=10, biomass=5, map_storage=storage)
+    gc.collect()
+    start = time.perf_counter()
+    game = Game(config)
+    elapsed = time.perf_counter() - start
+
+    del game
+    gc.collect()
+    tracemalloc.start()
+    game = Game(config)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{storage:>8} {size}x{size}: startup {elapsed * 1000:8.1f} ms, "
+          f"map memory {current / 2**20:8.1f} MiB")
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    for storage in ('arrays', 'objects'):
+        measure(size, storage)
@@ -0,0 +1,53 @@
+"""Resident bytes per map cell and per bot, measured with tracemalloc.
+
+Builds an 'objects' map with a third of the cells holding an asset and a
+number of bots with four-card decks, and reports the memory per empty
+cell, per occupied cell and per bot (bot, position, deck and cards,
+plus its entries in the game's indexes).
+
+Usage: python benchmarks/bench_memory.py [size] [bots]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_config import FARM_DECK, make_config, striped_assets
+from game import Game
+
+
+def level(size: int, bots: int, assets: bool) -> dict:
+    positions = [(x, y) for y in range(size) for x in range(size)][::max(1, size * size // max(bots, 1))]
+    return make_config(size, positions[:bots], FARM_DECK, energy=10, biomass=5,
+                       initial_state=striped_assets(size, ['ORE']) if assets else 'empty')
+
+
+def traced(config: dict) -> int:
+    gc.collect()
+    tracemalloc.start()
+    game = Game(config)
+    # Bookkeeping that is not part of the map or the bots
+    game.cell_versions.clear()
+    game.event_log._events.clear()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del game
+    return current
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    bots = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    cells = size * size
+    occupied = sum(1 for y in range(size) for x in range(size) if (x + y) % 3 == 0)
+
+    empty_map = traced(level(size, 0, False))
+    with_assets = traced(level(size, 0, True))
+    with_bots = traced(level(size, bots, False))
+    print(f"{size}x{size} objects map, {bots} bots")
+    print(f"  per empty cell:    {empty_map / cells:8.1f} bytes")
+    print(f"  per occupied cell: {empty_map / cells + (with_assets - empty_map) / occupied:8.1f} bytes "
+          f"(one ORE stack)")
+    print(f"  per bot:           {(with_bots - empty_map) / bots:8.1f} bytes (four-card deck)")
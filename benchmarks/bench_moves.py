@@ -0,0 +1,82 @@
+"""Cost of playing MOVE cards.
+
+Times the position arithmetic of a move on its own, computing the
+target with Position.__add__ and a bounds check against a lookup in
+game_map.PositionTable.
+Then plays one million MOVE cards through Game.execute_bot_action on a
+single bot walking a loop on an empty map, then the same number through
+Game.process_bot_actions with 100 bots. Every move is logged as an event; the
+log is kept short so old events are dropped as they would be in a long
+game.
+
+Usage: python benchmarks/bench_moves.py [moves] [size]
+"""
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_config import make_config
+from game import Game
+from game_enums import DIRECTION_VECTORS, Direction, Position
+from game_map import OFF_MAP, PositionTable
+
+# Each bot walks a small loop of its own, so bots never collide;
+# bots starting at x = 0 bump into the west edge once
+LOOP_DECK = ([{'type': 'MOVE', 'parameter': 'WEST'}]
+             + [{'type': 'MOVE', 'parameter': 'EAST'}] * 4
+             + [{'type': 'MOVE', 'parameter': 'WEST'}] * 3
+             + [{'type': 'MOVE', 'parameter': 'NORTH'}, {'type': 'MOVE', 'parameter': 'SOUTH'}])
+
+
+def loop_level(size: int, bots: int) -> dict:
+    positions = [((i * 7) % (size - 6), 1 + 3 * (i * 7 // (size - 6))) for i in range(bots)]
+    return make_config(size, positions, LOOP_DECK, event_log_capacity=16)
+
+
+if __name__ == '__main__':
+    moves = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    # Target lookup alone: a walk around the map's border and back
+    directions = [Direction.EAST] * (size - 1) + [Direction.SOUTH] * (size - 1) \
+        + [Direction.WEST] * (size - 1) + [Direction.NORTH] * (size - 1)
+    steps = (directions * (moves // len(directions) + 1))[:moves]
+    gc.collect()
+    start = time.perf_counter()
+    position = Position(0, 0)
+    for direction in steps:
+        target = position + DIRECTION_VECTORS[direction]
+        if 0 <= target.x < size and 0 <= target.y < size:
+            position = target
+    added = time.perf_counter() - start
+    table = PositionTable(size, size)
+    gc.collect()
+    start = time.perf_counter()
+    position = table.at(0, 0)
+    for direction in steps:
+        target = table.neighbor(position, direction)
+        if target is not OFF_MAP:
+            position = target
+    computed = time.perf_counter() - start
+    print(f"  target: Position.__add__ {added:.3f} s, PositionTable {computed:.3f} s for {moves} steps")
+
+    game = Game(loop_level(size, 1), seed=0)
+    bot = game.controllers[0].bots[0]
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(moves):
+        game.execute_bot_action(bot, bot.deck.draw())
+    elapsed = time.perf_counter() - start
+    print(f"       execute_move: {moves} moves in {elapsed:.3f} s = {moves / elapsed / 1e6:6.3f} M moves/s")
+
+    game = Game(loop_level(size, 100), seed=0)
+    controller = game.controllers[0]
+    gc.collect()
+    start = time.perf_counter()
+    game.process_bot_actions(controller, moves)
+    elapsed = time.perf_counter() - start
+    print(f"process_bot_actions: {moves} moves in {elapsed:.3f} s = {moves / elapsed / 1e6:6.3f} M moves/s "
+          f"({len(controller.bots)} bots left)")
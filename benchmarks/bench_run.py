@@ -0,0 +1,37 @@
+"""Wall time of a RUN order (Game.fast_forward) on the bundled levels.
+
+Victory conditions are raised out of reach and the controller is given
+enough energy, so the run goes the full length.
+
+Usage: python benchmarks/bench_run.py [hours]
+"""
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from game import Game
+from game_enums import ControllerActionType, ResourceType
+
+
+if __name__ == '__main__':
+    hours = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    for level in ('rare_config.json', 'medium_rare_config.json'):
+        with open(os.path.join(ROOT, level)) as f:
+            config = json.load(f)
+        config['victory_conditions'] = {'ENERGY': 10 ** 9}
+        game = Game(config, seed=1)
+        game.controllers[0].resources[ResourceType.ENERGY] = hours + 1
+        start = time.perf_counter()
+        game.process_turn([{
+            'controller_id': 0,
+            'action_type': ControllerActionType.RUN,
+            'parameters': {'hours': hours}
+        }])
+        elapsed = time.perf_counter() - start
+        summary = game.last_run
+        print(f"{level:>24}: {summary['hours']} hours ({summary['stopped']}) "
+              f"in {elapsed * 1000:7.1f} ms, day {summary['to']['day']}")
@@ -0,0 +1,77 @@
+"""Size and latency of binary saves against a JSON dump of get_game_state.
+
+Saves a game in both storage modes, then times loading it back lazily
+(memory-mapped), eagerly and into object storage. The JSON dump is what
+the API serves and cannot be resumed from; it is the size/latency
+baseline only.
+
+Usage: python benchmarks/bench_save.py [size] [bots] [repeat]
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game import Game
+from game_interface import GameInterface
+from game_save import load_game, save_game
+
+from bench_config import FARM_DECK, MIXED_ASSETS, TURN, make_config, spread_positions, striped_assets
+
+
+def best_of(repeat: int, func) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label: str, seconds: float, size: int = None) -> None:
+    size_text = f"  {size / 2**20:8.1f} MiB" if size is not None else ""
+    print(f"{label:>28}: {seconds * 1000:10.1f} ms{size_text}")
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    bots = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    print(f"{size}x{size} map, {bots} bots")
+    directory = tempfile.mkdtemp()
+    for storage in ('objects', 'arrays'):
+        config = make_config(size, spread_positions(size, bots), FARM_DECK, energy=10 ** 6, biomass=10,
+                             map_storage=storage, initial_state=striped_assets(size, MIXED_ASSETS))
+        game = Game(config, seed=1)
+        game.process_turn(TURN)
+        save_path = os.path.join(directory, f'{storage}.sfsave')
+        json_path = os.path.join(directory, f'{storage}.json')
+        interface = GameInterface()
+        interface.game = game
+
+        def dump_json():
+            with open(json_path, 'w') as f:
+                json.dump(interface.get_game_state(), f)
+
+        def read_json():
+            with open(json_path) as f:
+                json.load(f)
+
+        report(f"{storage} json dump", best_of(repeat, dump_json), os.path.getsize(json_path))
+        report(f"{storage} json parse", best_of(repeat, read_json))
+        report(f"{storage} save", best_of(repeat, lambda: save_game(game, save_path)),
+               os.path.getsize(save_path))
+        if storage == 'arrays':
+            report("arrays load (mmap)", best_of(repeat, lambda: load_game(save_path)))
+            report("arrays load (copied)", best_of(repeat, lambda: load_game(save_path, lazy=False)))
+        report(f"{storage} save -> objects load",
+               best_of(repeat, lambda: load_game(save_path, storage='objects')))
+        del game, interface
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
@@ -0,0 +1,47 @@
+"""Cost of serving /game/state for an unchanged game: building and encoding
+the state on every request vs the per-version StateCache.
+
+Usage: python benchmarks/bench_state_cache.py [size] [requests]
+"""
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import game_interface
+from game import Game
+from game_interface import GameInterface, StateCache
+
+
+def rate(serve, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        serve()
+    return requests / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    for level in ('rare_config.json', 'medium_rare_config.json'):
+        with open(os.path.join(ROOT, level)) as f:
+            config = json.load(f)
+        game = Game(dict(config, map_width=size, map_height=size), seed=1)
+        interface = GameInterface()
+        interface.game = game
+        print(f"{level} at {size}x{size}, {len(StateCache.for_game(game).get(game)) / 1024:.0f} KiB:")
+
+        def rebuild():
+            json.dumps(interface.get_game_state(), default=str).encode('utf-8')
+
+        def rebuild_fast():
+            game_interface.encode_json(interface.get_game_state())
+
+        print(f"  build + json.dumps:   {rate(rebuild, requests):10.1f} req/s")
+        if game_interface.orjson is not None:
+            print(f"  build + orjson:       {rate(rebuild_fast, requests):10.1f} req/s")
+        cache = StateCache.for_game(game)
+        print(f"  cached:               {rate(lambda: cache.get(game), requests * 1000):10.1f} req/s")
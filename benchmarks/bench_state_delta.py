@@ -0,0 +1,47 @@
+"""Payload size and serialization time of full states vs deltas per turn.
+
+Usage: python benchmarks/bench_state_delta.py [size] [turns]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_config import ROW_DECK, TURN, make_config
+from game import Game
+from game_interface import GameInterface
+
+
+def serialize(build) -> tuple:
+    start = time.perf_counter()
+    payload = json.dumps(build(), default=str)
+    return len(payload), time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    config = make_config(size, [(x, size // 2) for x in range(0, size, 10)], ROW_DECK, energy=10 ** 6,
+                         biomass=10, initial_state='uniform',
+                         asset_distribution={'ORE': size * 4, 'PLANT': size * 4, 'COAL': size * 4,
+                                             'PLANT_SEEDLING': size})
+    game = Game(config, seed=3)
+    interface = GameInterface()
+    interface.game = game
+
+    full_bytes = full_time = delta_bytes = delta_time = 0
+    for _ in range(turns):
+        version = game.version
+        game.process_turn(TURN)
+        size_bytes, elapsed = serialize(interface.get_game_state)
+        full_bytes += size_bytes
+        full_time += elapsed
+        size_bytes, elapsed = serialize(lambda: interface.get_game_state_delta(version))
+        delta_bytes += size_bytes
+        delta_time += elapsed
+
+    print(f"{size}x{size} map, {turns} turns, per turn:")
+    print(f"  full:  {full_bytes / turns / 1024:10.1f} KiB, {full_time / turns * 1000:8.2f} ms")
+    print(f"  delta: {delta_bytes / turns / 1024:10.1f} KiB, {delta_time / turns * 1000:8.2f} ms")
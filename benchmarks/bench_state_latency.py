@@ -0,0 +1,96 @@
+"""Latency of /game/state while another session runs heavy turns.
+
+Starts the API server in-process, keeps one session on a large map busy
+with turns that each return the full state (a day of TAKE_BOT_ACTIONS,
+then the whole map serialized), and polls /game/state on a second, small
+session, reporting p50/p99 latency with and without the heavy turn in
+flight.
+Run it on the commit before turns moved to the worker pool for the
+"before" numbers. Requires fastapi and uvicorn.
+
+Usage: python benchmarks/bench_state_latency.py [bots] [size] [polls]
+"""
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import uvicorn
+
+import api_server
+from bench_config import FARM_DECK, make_config, spread_positions
+
+PORT = 8765
+# Longest day a level may have; a turn can spend at most one day of actions
+HOURS_PER_DAY = 48
+
+
+def request(method: str, path: str, session_id: str, body: dict = None) -> float:
+    connection = http.client.HTTPConnection('127.0.0.1', PORT)
+    headers = {'X-Session-Id': session_id, 'Content-Type': 'application/json'}
+    start = time.perf_counter()
+    connection.request(method, path, body=json.dumps(body) if body else None, headers=headers)
+    response = connection.getresponse()
+    response.read()
+    elapsed = time.perf_counter() - start
+    connection.close()
+    if response.status != 200:
+        raise RuntimeError(f"{method} {path}: HTTP {response.status}")
+    return elapsed
+
+
+def poll(polls: int) -> list:
+    return [request('GET', '/game/state', 'light') for _ in range(polls)]
+
+
+def report(label: str, samples: list) -> None:
+    ordered = sorted(samples)
+    p50 = ordered[len(ordered) // 2]
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:>14}: p50 {p50 * 1000:8.2f} ms  p99 {p99 * 1000:8.2f} ms  max {ordered[-1] * 1000:8.2f} ms")
+
+
+def main():
+    bots = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    polls = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    api_server.logger.setLevel('WARNING')
+    api_server.LEVEL_CONFIGS['bench_heavy'] = make_config(size, spread_positions(size, bots), FARM_DECK,
+                                                          hours_per_day=HOURS_PER_DAY)
+    server = uvicorn.Server(uvicorn.Config(api_server.app, port=PORT, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    request('POST', '/game/restart?level=bench_heavy', 'heavy')
+    request('GET', '/game/state', 'light')
+    report('idle', poll(polls))
+
+    turn = {'orders': [{'controller_id': 0, 'action_type': 'TAKE_BOT_ACTIONS',
+                        'parameters': {'energy_points': HOURS_PER_DAY}}]}
+    busy = threading.Event()
+    busy.set()
+
+    def play():
+        while busy.is_set():
+            request('POST', '/game/turn', 'heavy', turn)
+
+    player = threading.Thread(target=play)
+    player.start()
+    time.sleep(0.2)
+    samples = poll(polls)
+    busy.clear()
+    player.join()
+    report('heavy turn', samples)
+    server.should_exit = True
+
+
+if __name__ == '__main__':
+    main()
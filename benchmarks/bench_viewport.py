@@ -0,0 +1,43 @@
+"""Payload size and build time of the full state vs a viewport, a tile and
+the overview on a large map.
+
+Usage: python benchmarks/bench_viewport.py [size]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_config import ROW_DECK, make_config
+from game import Game
+from game_interface import GameInterface
+
+
+def measure(build) -> tuple:
+    start = time.perf_counter()
+    payload = json.dumps(build(), default=str)
+    return len(payload), time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    # The bench_state_delta level: assets everywhere and a row of bots across the middle
+    config = make_config(size, [(x, size // 2) for x in range(0, size, 10)], ROW_DECK, energy=10 ** 6,
+                         biomass=10, initial_state='uniform',
+                         asset_distribution={'ORE': size * 4, 'PLANT': size * 4, 'COAL': size * 4,
+                                             'PLANT_SEEDLING': size})
+    game = Game(config, seed=3)
+    interface = GameInterface()
+    interface.game = game
+    print(f"{size}x{size} map:")
+    for name, build in (
+        ('full state', interface.get_game_state),
+        ('sparse state', lambda: interface.get_game_state(sparse=True)),
+        ('viewport 30x20', lambda: interface.get_viewport_state(size // 2, size // 2, 30, 20)),
+        ('tile', lambda: interface.get_tile_state(1, 1)),
+        ('overview', interface.get_overview),
+    ):
+        size_bytes, elapsed = measure(build)
+        print(f"  {name:15} {size_bytes / 1024:10.1f} KiB, {elapsed * 1000:9.2f} ms")
@@ -0,0 +1,54 @@
+"""Bytes on the wire and encode time of a full state in each representation
+/game/state offers, for the bundled levels scaled up.
+
+Usage: python benchmarks/bench_wire_format.py [size]
+"""
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import wire_format
+from game import Game
+from game_interface import GameInterface, encode_json
+
+
+def timed(build) -> tuple:
+    start = time.perf_counter()
+    body = build()
+    return body, time.perf_counter() - start
+
+
+def scaled(config: dict, size: int) -> dict:
+    """The level on a size x size map, its asset layout repeated across it."""
+    width, height = config['map_width'], config['map_height']
+    assets = [dict(asset, x=asset['x'] + dx, y=asset['y'] + dy)
+              for dy in range(0, size, height) for dx in range(0, size, width)
+              for asset in config['initial_state']
+              if asset['x'] + dx < size and asset['y'] + dy < size]
+    return dict(config, map_width=size, map_height=size, initial_state=assets)
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    for level in ('rare_config.json', 'medium_rare_config.json'):
+        with open(os.path.join(ROOT, level)) as f:
+            game = Game(scaled(json.load(f), size), seed=1)
+        interface = GameInterface()
+        interface.game = game
+        print(f"{level} at {size}x{size}, {len(game.occupied_cells)} occupied cells:")
+        bodies = [
+            ('json (stdlib)', *timed(lambda: json.dumps(interface.get_game_state()).encode('utf-8'))),
+            ('json (encode_json)', *timed(lambda: encode_json(interface.get_game_state()))),
+            ('json sparse', *timed(lambda: encode_json(interface.get_game_state(sparse=True)))),
+            ('binary', *timed(interface.get_game_state_binary)),
+        ]
+        for name, body, elapsed in bodies[1:]:
+            print(f"  {name:20} {len(body) / 1024:10.1f} KiB  {elapsed * 1000:8.1f} ms")
+            for encoding in wire_format.ENCODINGS:
+                compressed, compress_time = timed(lambda: wire_format.compress(body, encoding))
+                print(f"    + {encoding:16} {len(compressed) / 1024:10.1f} KiB  +{compress_time * 1000:7.1f} ms")
+        print(f"  {'json (stdlib)':20} {len(bodies[0][1]) / 1024:10.1f} KiB  {bodies[0][2] * 1000:8.1f} ms")
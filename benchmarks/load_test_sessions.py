@@ -0,0 +1,65 @@
+"""Turn latency with many concurrent sessions on one server process.
+
+Creates N sessions, then submits turns round-robin across them and reports
+latency percentiles and the session manager's estimated memory.
+Requires fastapi and httpx (for the test client).
+
+Usage: python benchmarks/load_test_sessions.py [sessions] [turns_per_session]
+"""
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from fastapi.testclient import TestClient
+
+import api_server
+
+TURN = {'orders': [
+    {'controller_id': 0, 'action_type': 'TAKE_BOT_ACTIONS', 'parameters': {'energy_points': 1}}
+]}
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    session_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    api_server.logger.setLevel('WARNING')
+    client = TestClient(api_server.app)
+
+    start = time.perf_counter()
+    session_ids = []
+    for i in range(session_count):
+        response = client.get('/game/state', headers={'X-Session-Id': f'load-{i}'})
+        session_ids.append(response.headers['X-Session-Id'])
+    created = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(turns):
+        for session_id in session_ids:
+            version = client.get('/game/state?since=0', headers={'X-Session-Id': session_id}).json()['version']
+            t0 = time.perf_counter()
+            response = client.post(f'/game/turn?since={version}', json=TURN,
+                                   headers={'X-Session-Id': session_id})
+            latencies.append(time.perf_counter() - t0)
+            response.raise_for_status()
+
+    sessions = api_server.sessions
+    print(f"sessions: {session_count} requested, {len(sessions)} live, "
+          f"~{sessions.memory / 2**20:.1f} MiB estimated, created in {created:.2f}s")
+    print(f"turns: {len(latencies)}  mean {statistics.mean(latencies) * 1000:.2f} ms  "
+          f"p50 {percentile(latencies, 0.50) * 1000:.2f} ms  "
+          f"p95 {percentile(latencies, 0.95) * 1000:.2f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Requests per second on /game/state through the API, for unchanged games,
+with plain GETs, with If-None-Match revalidation, and with a turn between
+reads. The session plays the rare level resized to size x size, with
+energy for every turn and no victory. Requires fastapi and httpx (for
+the test client).
+
+Usage: python benchmarks/load_test_state.py [requests] [size]
+"""
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from fastapi.testclient import TestClient
+
+import api_server
+
+TURN = {'orders': [
+    {'controller_id': 0, 'action_type': 'TAKE_BOT_ACTIONS', 'parameters': {'energy_points': 1}}
+]}
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    api_server.logger.setLevel('WARNING')
+    with open(os.path.join(ROOT, 'rare_config.json')) as f:
+        config = json.load(f)
+    config.update(map_width=size, map_height=size, victory_conditions={'MINERAL': 10 ** 9})
+    config['controllers'][0]['resources']['ENERGY'] = 10 ** 9
+    api_server.LEVEL_CONFIGS['load_test'] = config
+    client = TestClient(api_server.app)
+    headers = {'X-Session-Id': 'load-state'}
+    client.post('/game/restart?level=load_test', headers=headers)
+    etag = client.get('/game/state', headers=headers).headers['ETag']
+
+    for name, extra in (('GET', {}), ('GET If-None-Match', {'If-None-Match': etag})):
+        start = time.perf_counter()
+        for _ in range(requests):
+            client.get('/game/state', headers={**headers, **extra})
+        print(f"{name:20} {requests / (time.perf_counter() - start):10.1f} req/s")
+
+    start = time.perf_counter()
+    for _ in range(requests // 10):
+        client.post('/game/turn', json=TURN, headers=headers).raise_for_status()
+        for _ in range(9):
+            client.get('/game/state', headers=headers)
+    print(f"{'1 turn per 9 GETs':20} {requests / (time.perf_counter() - start):10.1f} req/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,29 @@
+import copy
+import logging
 import random
-from typing import List, Dict, Optional, Set, Tuple, Union
+from collections import deque
+from operator import itemgetter
+from typing import Callable, List, Dict, Optional, Set, Tuple, Union
 from game_objects import *
+from game_map import ArrayMap, OccupancyIndex, OFF_MAP, PositionTable, build_map, MAP_STORAGE_MODES
+from game_events import Event, EventLog
+from instrumentation import metrics
 from game_enums import (
-    Direction, ActionType, AssetType, ResourceType, ControllerActionType,
+    Direction, ActionType, AssetType, ResourceType, ControllerActionType, EventKind,
     DIRECTION_VECTORS, ASSET_TO_RESOURCE, SEEDLING_TO_ASSET
 )
+
+logger = logging.getLogger(__name__)
+
+# Directions a RANDOM move picks from, in the order the random draw indexes them
+RANDOM_DIRECTIONS = [Direction.NORTH, Direction.SOUTH, Direction.EAST, Direction.WEST]
+
+# Seedling a PLANT card puts down, by the asset type on the card
+PLANT_SEEDLINGS = {
+    AssetType.ORE: AssetType.ORE_SEEDLING,
+    AssetType.PLANT: AssetType.PLANT_SEEDLING,
+    AssetType.COAL: AssetType.COAL_SEEDLING
+}
 MAIN_HELP = """
 Your space ship, the "Stardew Valley", has crashed!
 You are able to stay alive inside the wreck mostly by sleeping in your suspended animation pod to reduce resource usage.
@@ -30,17 +49,52 @@ Each scenatior will have a set of goals to be accomplished - generally needed am
 
 
 class Game:
-    def __init__(self, config: dict):
+    # Longest RUN a single order can ask for
+    MAX_RUN_HOURS = 1_000_000
+    # Bot actions from which process_bot_actions uses the batched engine
+    BATCH_MIN_ACTIONS = 2
+
+    def __init__(self, config: dict, seed: Optional[int] = None):
         self.validate_config(config)
         
+        # All randomness in the game comes from this generator, so a game is
+        # reproducible from its seed and independent of other games.
+        # The constructor argument wins over the config; None seeds from the OS.
+        self.seed = seed if seed is not None else config.get('seed')
+        self.rng = random.Random(self.seed)
         self.width = config['map_width']
         self.height = config['map_height']
-        self.map = [[Cell() for _ in range(self.width)] for _ in range(self.height)]
+        self.map_storage = config.get('map_storage', 'objects')
+        self.map = build_map(self.width, self.height, self.map_storage)
+        # Shared Position instances of the map's cells, for move targets
+        self.positions = PositionTable(self.width, self.height)
+        # Copy-on-write after fork(): object maps share rows and cells with
+        # their forks. A cell may be changed in place only when its owner is
+        # this game's token, and a row only when flagged in owned_rows;
+        # otherwise writable_cell() copies it first. None until first forked.
+        self.cow_token: Optional[object] = None
+        self.owned_rows: Optional[bytearray] = None
         self.controllers: List[Controller] = []
+        # Every bot in play by its stable id, and by position
+        self.bots_by_id: Dict[int, Bot] = {}
+        self.bot_index = OccupancyIndex()
+        self.next_bot_id = 0
+        # Change tracking for state deltas: every change bumps the version and
+        # records it against the cells and controllers it touched. Entries are
+        # re-inserted on change, so both dicts are ordered by version.
+        self.version = 0
+        # Deltas can only be computed from versions at or after base_version
+        self.base_version = 0
+        self.cell_versions: Dict[Tuple[int, int], int] = {}
+        self.controller_versions: Dict[int, int] = {}
+        # Cells (x, y) holding any asset or bot, kept up to date by mark_cell
+        self.occupied_cells: Set[Tuple[int, int]] = set()
         self.day = 0
         self.hour = 0
         self.hours_per_day = config.get('hours_per_day', 24)
         self.seedling_maturity_time = config['seedling_maturity_time']
+        # Cells (x, y) currently holding at least one seedling
+        self.seedling_cells: Set[Tuple[int, int]] = set()
         
         # Action hour costs
         self.hour_costs = {
@@ -56,10 +110,14 @@ class Game:
         }
         
         self.victory_conditions = config['victory_conditions']
+        # Summary of the latest RUN order, see fast_forward
+        self.last_run: Optional[dict] = None
+        # Called with the summary so far at every day boundary of a RUN
+        self.on_run_progress: Optional[Callable[[dict], None]] = None
         self.state = 'active'
         self.victors = []
         # Add event log
-        self.event_log: List[Dict[str, Union[int, str]]] = []
+        self.event_log = EventLog(config.get('event_log_capacity', 1000))
         
         self.setup_initial_state(config)
 
@@ -72,17 +130,24 @@ class Game:
             'modify_deck_cost': (1, 1000),
             'victory_conditions': None,
             'initial_state': None,
-            'hours_per_day': (1, 48)
+            'hours_per_day': (1, 48),
+            'event_log_capacity': (1, 1000000)
         }
         
         for field, bounds in required_fields.items():
-            if field not in config and field != 'hours_per_day':
+            if field not in config and field not in ('hours_per_day', 'event_log_capacity'):
                 raise ValueError(f"Missing required config field: {field}")
             if bounds and field in config:
                 value = config[field]
                 if not isinstance(value, int) or value < bounds[0] or value > bounds[1]:
                     raise ValueError(f"{field} must be between {bounds[0]} and {bounds[1]}")
 
+        if 'seed' in config and not isinstance(config['seed'], int):
+            raise ValueError("seed must be an integer")
+
+        if config.get('map_storage', 'objects') not in MAP_STORAGE_MODES:
+            raise ValueError(f"map_storage must be one of {', '.join(MAP_STORAGE_MODES)}")
+
     def setup_initial_state(self, config: dict) -> None:
         # Initialize controllers and their bots
         for controller_data in config['controllers']:
@@ -107,9 +172,7 @@ class Game:
                         parameter = AssetType[action['parameter']]
                     deck.append(Card(action_type, parameter))
                 
-                bot = Bot(pos, deck, controller.id)
-                controller.bots.append(bot)
-                self.map[pos.y][pos.x].bots.add(bot)
+                self.add_bot(controller, Bot(pos, deck, controller.id))
 
         # Set up initial assets
         if config['initial_state'] == 'uniform':
@@ -123,12 +186,17 @@ class Game:
             pass
         else:
             for asset_data in config['initial_state']:
+                asset_type = AssetType[asset_data['type']]
+                maturity_time = asset_data.get('maturity_time')
+                if asset_type in SEEDLING_TO_ASSET and maturity_time is None:
+                    maturity_time = self.seedling_maturity_time
                 asset = Asset(
-                    AssetType[asset_data['type']], 
-                    asset_data['amount']
+                    asset_type, 
+                    asset_data['amount'],
+                    maturity_time
                 )
                 pos = Position(asset_data['x'], asset_data['y'])
-                self.map[pos.y][pos.x].assets.append(asset)
+                self.place_asset(pos, asset)
 
         # Convert victory conditions
         self.victory_conditions = {
@@ -175,11 +243,12 @@ class Game:
         if self.hour >= self.hours_per_day:
             self.hour = 0
             self.day += 1
+            self.touch()
         
         for controller in self.controllers[:]:  # Copy list to allow removal during iteration
             if controller.resources[ResourceType.ENERGY] <= 0:
-                print("GAME OVER")
-                self.log_event(f"Controller {controller.id} has no energy left and is eliminated")
+                logger.info("Controller %d is out of energy", controller.id)
+                self.record_event(EventKind.CONTROLLER_ELIMINATED, controller_id=controller.id)
                 self.eliminate_controller(controller)
                 continue
             
@@ -197,23 +266,62 @@ class Game:
         for bot in controller.bots[:]:  # Copy list to allow modification
             self.destroy_bot(bot)
         self.controllers.remove(controller)
+        self.mark_controller(controller)
+
+    def add_bot(self, controller: Controller, bot: Bot) -> Bot:
+        """Give a bot its stable id and place it in play."""
+        if self.is_valid_position(bot.position):
+            # Bots in play hold the map's shared Position instances
+            bot.position = self.positions.at(bot.position.x, bot.position.y)
+        bot.id = self.next_bot_id
+        self.next_bot_id += 1
+        self.bots_by_id[bot.id] = bot
+        controller.bots.append(bot)
+        self.writable_cell(bot.position.x, bot.position.y).bots.add(bot)
+        self.bot_index.add(bot, bot.position.x, bot.position.y)
+        self.mark_cell(bot.position.x, bot.position.y)
+        self.mark_controller(controller)
+        return bot
+
+    def remove_bot(self, bot: Bot) -> None:
+        """Take a bot out of play: its controller, the registry and its cell."""
+        controller = self.controllers[bot.controller_id]
+        self.writable_cell(bot.position.x, bot.position.y).bots.discard(bot)
+        self.bot_index.discard(bot, bot.position.x, bot.position.y)
+        controller.bots.discard(bot)
+        self.bots_by_id.pop(bot.id, None)
+        self.mark_cell(bot.position.x, bot.position.y)
+        self.mark_controller(controller)
+
+    def get_bot(self, bot_id: int) -> Optional[Bot]:
+        """Look up a bot in play by its stable id."""
+        return self.bots_by_id.get(bot_id)
+
+    def bots_within(self, position: Position, radius: int) -> List[Bot]:
+        """Bots at most radius moves from position, nearest first."""
+        return self.bot_index.within(position.x, position.y, radius)
+
+    def occupancy_mismatches(self) -> List[Tuple[int, int]]:
+        """Positions, sorted, where the map cells, bot_index and the bots'
+        own positions disagree about who is there. Bots are recorded both in
+        their cell and in bot_index, so this should always be empty; it scans
+        the whole map and is meant for tests and debugging."""
+        expected: Dict[Tuple[int, int], Set[Bot]] = {}
+        for bot in self.bots_by_id.values():
+            expected.setdefault((bot.position.x, bot.position.y), set()).add(bot)
+        in_cells = {(x, y): set(cell.bots)
+                    for y, row in enumerate(self.map) for x, cell in enumerate(row) if cell.bots}
+        positions = set(expected) | set(in_cells) | set(self.bot_index)
+        return sorted(position for position in positions
+                      if not expected.get(position, set()) == in_cells.get(position, set())
+                      == set(self.bot_index.bots_at(*position)))
 
     def destroy_bot(self, bot: Bot) -> None:
         """Remove a bot from the game."""
-        # First remove from controller's bot list
-        controller = self.controllers[bot.controller_id]
-        # Create a new list without the bot, using identity comparison
-        new_bots = []
-        for b in controller.bots:
-            if b is not bot:  # Use identity comparison
-                new_bots.append(b)
-        controller.bots = new_bots
-        
-        # Then remove from map cell
-        cell = self.map[bot.position.y][bot.position.x]
-        cell.bots.discard(bot)
+        self.remove_bot(bot)
         
-        self.log_event(f"Bot {bot.controller_id} destroyed at ({bot.position.x}, {bot.position.y})")
+        self.record_event(EventKind.BOT_DESTROYED, controller_id=bot.controller_id,
+                          x=bot.position.x, y=bot.position.y)
 
     def process_bot_actions(self, controller: Controller, energy_spent: int) -> None:
         """Process random bot actions for a controller"""
@@ -221,16 +329,219 @@ class Game:
             raise ValueError("Not enough energy")
         
         controller.resources[ResourceType.ENERGY] -= energy_spent
+        # Drawing cards reorders decks, so the controller always changes
+        self.mark_controller(controller)
         
-        for _ in range(energy_spent):
+        with metrics.phase('bot_actions'):
+            if energy_spent >= self.BATCH_MIN_ACTIONS:
+                self.play_bot_actions_batched(controller, energy_spent)
+            else:
+                self.play_bot_actions(controller, energy_spent)
+
+    def play_bot_actions(self, controller: Controller, actions: int) -> None:
+        """Let randomly chosen bots of a controller play their top card, one
+        action at a time. Energy is accounted for by the caller."""
+        for _ in range(actions):
+            if not controller.bots:
+                break
+            bot = self.rng.choice(controller.bots)
+            self.play_top_card(bot)
+
+    def play_bot_actions_batched(self, controller: Controller, actions: int) -> None:
+        """play_bot_actions with the bookkeeping done once for the batch.
+
+        Bots are drawn and cards played in the same order, with the same
+        random numbers, so the game ends up exactly as with
+        play_bot_actions, versions and event numbers included. The cards
+        are dispatched inline, and what the scalar path records per action
+        is collected instead:
+        - Cell versions and occupancy are applied once, per changed cell.
+        - Events are kept as tuples, and only those the bounded event log
+          still holds at the end are built.
+        A move onto an occupied cell is a collision; the batch is settled
+        and the move played through move_on_map.
+        """
+        draw = self.rng._randbelow  # What rng.choice uses
+        bots = controller.bots
+        bot_count = len(bots)
+        positions = self.positions
+        bot_index = self.bot_index
+        writable_cell = self.writable_cell
+        width, height, day, hour = self.width, self.height, self.day, self.hour
+        version = self.version
+        # (x, y) -> version of the cell's latest change in this batch
+        changed: Dict[Tuple[int, int], int] = {}
+        # Event fields in Event's field order, of the events the log will keep
+        events: deque = deque(maxlen=self.event_log.capacity)
+        logged = 0
+        try:
+            for _ in range(actions):
+                if not bot_count:
+                    break
+                bot = bots[draw(bot_count)]
+                card = bot.deck.popleft()
+                bot.deck.append(card)
+                action_type = card.action_type
+                position = bot.position
+
+                if action_type is ActionType.MOVE:
+                    direction = card.parameter
+                    if direction is Direction.RANDOM:
+                        direction = RANDOM_DIRECTIONS[draw(4)]
+                    dx, dy = DIRECTION_VECTORS[direction]
+                    x = position.x + dx
+                    y = position.y + dy
+                    if not (0 <= x < width and 0 <= y < height):
+                        version += 1
+                        events.append((EventKind.MOVE, day, hour, version, -1, bot.controller_id,
+                                       x, y, position.x, position.y))
+                        logged += 1
+                        continue
+                    if bot_index.bots_at(x, y):
+                        self.version = version
+                        self.settle_batch(changed, events, logged)
+                        logged = 0
+                        self.move_on_map(bot, positions.at(x, y))
+                        version = self.version
+                        bot_count = len(bots)
+                        continue
+                    version += 1
+                    events.append((EventKind.MOVE, day, hour, version, -1, bot.controller_id,
+                                   x, y, position.x, position.y))
+                    logged += 1
+                    writable_cell(position.x, position.y).bots.discard(bot)
+                    bot_index.discard(bot, position.x, position.y)
+                    bot.position = positions.at(x, y)
+                    writable_cell(x, y).bots.add(bot)
+                    bot_index.add(bot, x, y)
+                    changed[(position.x, position.y)] = version + 1
+                    changed[(x, y)] = version = version + 2
+
+                elif action_type is ActionType.HARVEST:
+                    asset_type = card.parameter
+                    x, y = position.x, position.y
+                    asset = writable_cell(x, y).take_mature(asset_type)
+                    if asset is not None:
+                        resources = self.controllers[bot.controller_id].resources
+                        resources[ASSET_TO_RESOURCE[asset_type]] += asset.amount
+                        changed[(x, y)] = version + 1
+                        version += 2
+                        events.append((EventKind.HARVEST, day, hour, version, -1, bot.controller_id,
+                                       x, y, None, None, asset.amount, asset_type))
+                    else:
+                        version += 1
+                        events.append((EventKind.HARVEST_FAILED, day, hour, version, -1, bot.controller_id,
+                                       x, y, None, None, None, asset_type))
+                    logged += 1
+
+                elif action_type is ActionType.PLANT:
+                    asset_type = card.parameter
+                    x, y = position.x, position.y
+                    if self.map[y][x].has_seedling():
+                        version += 1
+                        events.append((EventKind.PLANT_FAILED, day, hour, version, -1, bot.controller_id,
+                                       x, y, None, None, None, asset_type))
+                    else:
+                        writable_cell(x, y).add_asset(Asset(PLANT_SEEDLINGS[asset_type], 1,
+                                                            self.seedling_maturity_time))
+                        self.seedling_cells.add((x, y))
+                        changed[(x, y)] = version + 1
+                        version += 2
+                        events.append((EventKind.PLANT, day, hour, version, -1, bot.controller_id,
+                                       x, y, None, None, None, asset_type))
+                    logged += 1
+        finally:
+            self.version = version
+            self.settle_batch(changed, events, logged)
+
+    def settle_batch(self, changed: Dict[Tuple[int, int], int], events: deque, logged: int) -> None:
+        """Record what a batch of bot actions changed, as mark_cell and
+        record_event would have as they went, then empty changed and events.
+        `logged` counts all events of the batch, including those already
+        dropped from `events`."""
+        cell_versions = self.cell_versions
+        for key, version in sorted(changed.items(), key=itemgetter(1)):
+            # Latest change last, as mark_cell keeps them
+            cell_versions.pop(key, None)
+            cell_versions[key] = version
+            x, y = key
+            cell = self.map[y][x]
+            if cell.bots or cell.assets:
+                self.occupied_cells.add(key)
+            else:
+                self.occupied_cells.discard(key)
+        changed.clear()
+        # Events the log would have dropped again within the batch only take up numbers
+        self.event_log.next_seq += logged - len(events)
+        for fields in events:
+            self.event_log.append(Event(*fields))
+        events.clear()
+
+    def play_top_card(self, bot: Bot) -> None:
+        """Execute a bot's top card and move it to the bottom of the deck."""
+        # Take the top card, moving it to the bottom of the deck
+        card = bot.deck.draw()
+        self.execute_bot_action(bot, card)
+
+    def fast_forward(self, controller: Controller, hours: int, reserve_energy: int = 1) -> dict:
+        """Let a controller's bots work for up to `hours` hours, crossing days.
+
+        Each hour is one bot action and one energy, as with TAKE_BOT_ACTIONS.
+        Seedlings mature and victory is checked at every day boundary. The run
+        stops early when energy would drop below reserve_energy, when the
+        controller has no bots left or on victory. Returns a summary, also
+        kept as last_run. on_run_progress, when set, gets the summary so far
+        at every day boundary, with 'stopped' set to None.
+        """
+        start_day, start_hour = self.day, self.hour
+        resources_before = dict(controller.resources)
+        bots_before = len(controller.bots)
+        hour_cost = self.hour_costs['bot_action']
+        elapsed = 0
+        stopped = 'completed'
+
+        def summary(stopped: Optional[str]) -> dict:
+            return {
+                'controller_id': controller.id,
+                'hours': elapsed,
+                'stopped': stopped,
+                'from': {'day': start_day, 'hour': start_hour},
+                'to': {'day': self.day, 'hour': self.hour},
+                'resources': {
+                    resource_type.name: controller.resources[resource_type] - amount
+                    for resource_type, amount in resources_before.items()
+                },
+                'bots_lost': bots_before - len(controller.bots)
+            }
+
+        while elapsed < hours:
             if not controller.bots:
+                stopped = 'no_bots'
                 break
-            bot = random.choice(controller.bots)
-            # Execute action using top card
-            card = bot.deck[0]
-            self.execute_bot_action(bot, card)
-            # Move the card to the bottom of the deck
-            bot.deck = bot.deck[1:] + [card]
+            # Work until the end of the day, or of the run or the energy
+            span = min(hours - elapsed, self.hours_per_day - self.hour)
+            actions = min(span // hour_cost,
+                          controller.resources[ResourceType.ENERGY] - reserve_energy)
+            if actions < 1:
+                stopped = 'out_of_energy'
+                break
+            self.process_bot_actions(controller, actions)
+            elapsed += actions * hour_cost
+            self.hour += actions * hour_cost
+            if self.hour >= self.hours_per_day:
+                self.hour = 0
+                self.day += 1
+                self.touch()
+                self.mature_seedlings()
+                self.check_victory()
+                if self.state == 'victory':
+                    stopped = 'victory'
+                    break
+                if self.on_run_progress is not None:
+                    self.on_run_progress(summary(None))
+
+        self.last_run = summary(stopped)
+        return self.last_run
 
     def execute_bot_action(self, bot: Bot, card: Card) -> None:
         """Execute a single bot action"""
@@ -244,80 +555,78 @@ class Game:
     def execute_move(self, bot: Bot, direction: Direction) -> bool:
         """Execute a move action for a bot."""
         if direction == Direction.RANDOM:
-            direction = random.choice([Direction.NORTH, Direction.SOUTH, Direction.EAST, Direction.WEST])
+            direction = self.rng.choice(RANDOM_DIRECTIONS)
         
-        old_pos = bot.position
-        new_pos = old_pos + DIRECTION_VECTORS[direction]
-        # print(f"Move from ({old_pos.x}, {old_pos.y}) to ({new_pos.x}, {new_pos.y}) by bot {bot}")
-
-        self.log_event(f"Move from ({old_pos.x}, {old_pos.y}) to ({new_pos.x}, {new_pos.y}) by bot {bot}")
-
-        # Check if move is valid
+        target = self.positions.neighbor(bot.position, direction)
+        if target is OFF_MAP:
+            # Only this rare case needs the actual coordinates, for the event
+            return self.move_bot(bot, bot.position + DIRECTION_VECTORS[direction])
+        return self.move_on_map(bot, target)
+
+    def move_bot(self, bot: Bot, new_pos: Position) -> bool:
+        """Move a bot to the given position, destroying bots on collision."""
         if not self.is_valid_position(new_pos):
-            print("Invalid position!")
+            old_pos = bot.position
+            self.record_event(EventKind.MOVE, controller_id=bot.controller_id,
+                              x=new_pos.x, y=new_pos.y, from_x=old_pos.x, from_y=old_pos.y)
+            logger.debug("Bot %s cannot move off the map to %s", bot.id, new_pos)
             return False
-        
-        # Get cells
-        old_cell = self.map[old_pos.y][old_pos.x]
-        new_cell = self.map[new_pos.y][new_pos.x]
-        # print(f"OLD Cell bots: {old_cell.bots}")
-        # print(f"NEW Cell bots: {new_cell.bots}")
+        return self.move_on_map(bot, new_pos)
 
-        # Check for collision
-        if not new_cell.bots:
-            pass
-            # print(f"NO collicion yay. {old_pos} {new_pos}\n{bot}")
-            # print(f"Controller bots: {self.controllers[bot.controller_id].bots}")
-            #print(f"OLD Cell bots: {old_cell.bots}")
-            #print(f"NEW Cell bots: {new_cell.bots}")
+    def move_on_map(self, bot: Bot, new_pos: Position) -> bool:
+        """move_bot for a position known to be on the map."""
+        old_pos = bot.position
 
-        else:
+        self.record_event(EventKind.MOVE, controller_id=bot.controller_id,
+                          x=new_pos.x, y=new_pos.y, from_x=old_pos.x, from_y=old_pos.y)
+        
+        # Check for collision
+        occupants = self.bot_index.bots_at(new_pos.x, new_pos.y)
+        if occupants:
             # Log collision event
-            #print(f"Collision detected at ({new_pos.x}, {new_pos.y})")
-            self.log_event(f"Collision detected at ({new_pos.x}, {new_pos.y})")
-            
-            # Collect all bots to be removed (both moving and colliding)
-            bots_to_remove = set()
-            bots_to_remove.add(bot)
-            bots_to_remove.update(new_cell.bots)
+            self.record_event(EventKind.COLLISION, x=new_pos.x, y=new_pos.y)
             
-            # Remove all bots from their cells first
-            old_cell.bots.discard(bot)
-            new_cell.bots.clear()
+            # Collect all bots to be removed (both moving and colliding),
+            # in id order so the destruction events are reproducible
+            bots_to_remove = [bot] + sorted(
+                occupants, key=lambda b: (b.id is None, b.id or 0))
             
-            # Remove all bots from their controllers
+            # Remove all bots from their cells, controllers and the registry
             for bot_to_remove in bots_to_remove:
-                controller = self.controllers[bot_to_remove.controller_id]
-                # Create new list without the bot
-                controller.bots = [b for b in controller.bots if id(b) != id(bot_to_remove)]
-                self.log_event(f"Bot {bot_to_remove.controller_id} destroyed at ({bot_to_remove.position.x}, {bot_to_remove.position.y})")
+                self.remove_bot(bot_to_remove)
+                self.record_event(EventKind.BOT_DESTROYED, controller_id=bot_to_remove.controller_id,
+                                  x=bot_to_remove.position.x, y=bot_to_remove.position.y)
             
             return True
         
         # No collision, proceed with move
-        old_cell.bots.discard(bot)
+        self.writable_cell(old_pos.x, old_pos.y).bots.discard(bot)
+        self.bot_index.discard(bot, old_pos.x, old_pos.y)
         bot.position = new_pos
-        new_cell.bots.add(bot)
+        self.writable_cell(new_pos.x, new_pos.y).bots.add(bot)
+        self.bot_index.add(bot, new_pos.x, new_pos.y)
+        self.mark_cell(old_pos.x, old_pos.y)
+        self.mark_cell(new_pos.x, new_pos.y)
         return True
 
     def execute_harvest(self, bot: Bot, asset_type: AssetType) -> bool:
         """Harvest an asset at the bot's location."""
-        cell = self.map[bot.position.y][bot.position.x]
+        cell = self.writable_cell(bot.position.x, bot.position.y)
         
-        # Find matching mature asset
-        for i, asset in enumerate(cell.assets):
-            if asset.type == asset_type and asset.maturity_time is None:
-                # Convert asset to resource and add to controller
-                resource_type = ASSET_TO_RESOURCE[asset_type]
-                self.controllers[bot.controller_id].resources[resource_type] += asset.amount
-                
-                # Remove the harvested asset
-                cell.assets.pop(i)
-                
-                self.log_event(f"Bot {bot.controller_id} harvested {asset.amount} {asset_type.name} at ({bot.position.x}, {bot.position.y})")
-                return True
+        # Take matching mature asset
+        asset = cell.take_mature(asset_type)
+        if asset is not None:
+            # Convert asset to resource and add to controller
+            resource_type = ASSET_TO_RESOURCE[asset_type]
+            self.controllers[bot.controller_id].resources[resource_type] += asset.amount
+            self.mark_cell(bot.position.x, bot.position.y)
+            
+            self.record_event(EventKind.HARVEST, controller_id=bot.controller_id, amount=asset.amount,
+                              asset_type=asset_type, x=bot.position.x, y=bot.position.y)
+            return True
         
-        self.log_event(f"Bot {bot.controller_id} failed to harvest {asset_type.name} at ({bot.position.x}, {bot.position.y})")
+        self.record_event(EventKind.HARVEST_FAILED, controller_id=bot.controller_id,
+                          asset_type=asset_type, x=bot.position.x, y=bot.position.y)
         return False
 
     def execute_plant(self, bot: Bot, asset_type: AssetType) -> None:
@@ -325,68 +634,35 @@ class Game:
         cell = self.map[bot.position.y][bot.position.x]
         
         # Check if there's already a seedling
-        for asset in cell.assets:
-            if asset.maturity_time is not None:
-                self.log_event(f"Bot {bot.controller_id} failed to plant {asset_type.name} (seedling exists) at ({bot.position.x}, {bot.position.y})")
-                return
-        
-        # Create corresponding seedling type
-        seedling_map = {
-            AssetType.ORE: AssetType.ORE_SEEDLING,
-            AssetType.PLANT: AssetType.PLANT_SEEDLING,
-            AssetType.COAL: AssetType.COAL_SEEDLING
-        }
+        if cell.has_seedling():
+            self.record_event(EventKind.PLANT_FAILED, controller_id=bot.controller_id,
+                              asset_type=asset_type, x=bot.position.x, y=bot.position.y)
+            return
         
         # Plant new seedling
         seedling = Asset(
-            type=seedling_map[asset_type],
+            type=PLANT_SEEDLINGS[asset_type],
             amount=1,  # Amount will be set when it matures
             maturity_time=self.seedling_maturity_time
         )
-        cell.assets.append(seedling)
-        self.log_event(f"Bot {bot.controller_id} planted {asset_type.name} seedling at ({bot.position.x}, {bot.position.y})")
+        self.place_asset(bot.position, seedling)
+        self.record_event(EventKind.PLANT, controller_id=bot.controller_id,
+                          asset_type=asset_type, x=bot.position.x, y=bot.position.y)
+
+    def place_asset(self, position: Position, asset: Asset) -> None:
+        """Put an asset on the map, registering seedlings for maturation."""
+        self.writable_cell(position.x, position.y).add_asset(asset)
+        self.mark_cell(position.x, position.y)
+        if asset.maturity_time is not None:
+            self.seedling_cells.add((position.x, position.y))
 
     def mature_seedlings(self) -> None:
-        """Process seedling maturation for all cells."""
-        for row in self.map:
-            for cell in row:
-                # Track seedlings that need to be removed
-                seedlings_to_remove = []
-                mature_assets = {}  # Track mature assets by type
-                
-                # First pass: identify and process seedlings
-                for asset in cell.assets[:]:  # Create a copy to safely iterate
-                    if asset.maturity_time is not None:
-                        asset.maturity_time -= 1
-                        if asset.maturity_time <= 0:
-                            seedlings_to_remove.append(asset)
-                            mature_type = SEEDLING_TO_ASSET[asset.type]
-                            mature_assets[mature_type] = mature_assets.get(mature_type, 0) + asset.amount
-                
-                # Second pass: remove matured seedlings
-                for seedling in seedlings_to_remove:
-                    if seedling in cell.assets:  # Check if still exists
-                        cell.assets.remove(seedling)
-                
-                # Third pass: update or create mature assets
-                for mature_type, total_amount in mature_assets.items():
-                    # Find existing mature asset of this type
-                    existing = None
-                    for asset in cell.assets:
-                        if asset.type == mature_type and asset.maturity_time is None:
-                            existing = asset
-                            break
-                    
-                    if existing:
-                        # Update existing asset
-                        existing.amount += total_amount
-                    else:
-                        # Create new mature asset
-                        cell.assets.append(Asset(
-                            type=mature_type,
-                            amount=total_amount,
-                            maturity_time=None
-                        ))
+        """Process seedling maturation for the cells holding seedlings."""
+        with metrics.phase('maturation'):
+            for x, y in list(self.seedling_cells):
+                if not self.writable_cell(x, y).tick_seedlings():
+                    self.seedling_cells.discard((x, y))
+                self.mark_cell(x, y)
 
     def create_bot(self, controller: Controller, position: Position, initial_deck: List[Card]) -> None:
         """Create a new bot for the given controller"""
@@ -397,18 +673,16 @@ class Game:
         # Check if position is valid and empty
         if not (0 <= position.x < self.width and 0 <= position.y < self.height):
             raise ValueError("Invalid position")
-        if self.map[position.y][position.x].bots:
+        if (position.x, position.y) in self.bot_index:
             raise ValueError("Position already occupied")
         
         # Create and place bot
         controller.resources[ResourceType.MINERAL] -= self.costs['new_bot']
-        bot = Bot(position, initial_deck, controller.id)
-        controller.bots.append(bot)
-        self.map[position.y][position.x].bots.add(bot)
+        self.add_bot(controller, Bot(position, initial_deck, controller.id))
 
     def modify_deck(self, bot: Bot, add_card: Optional[Card] = None, remove_index: Optional[int] = None) -> None:
         """Add or remove a card from a bot's deck"""
-        print(f"MODIFYING DECK! {bot}")
+        logger.debug("Modifying deck of bot %s", bot.id)
         controller = self.controllers[bot.controller_id]
         
         # Check if controller has enough biomass
@@ -421,7 +695,7 @@ class Game:
         if add_card is not None:
             bot.deck.append(add_card)
         if remove_index is not None:
-            print(f"removing: {remove_index}")
+            logger.debug("Removing card %d from bot %s", remove_index, bot.id)
             if 0 <= remove_index < len(bot.deck):
                 bot.deck.pop(remove_index)
             else:
@@ -437,7 +711,7 @@ class Game:
             count = min(count, len(available_cells))
             
             # Select random positions
-            positions = random.sample(available_cells, count)
+            positions = self.rng.sample(available_cells, count)
             
             # Place assets
             for x, y in positions:
@@ -448,27 +722,27 @@ class Game:
                 
                 asset = Asset(
                     type=asset_type,
-                    amount=random.randint(1, 5),
+                    amount=self.rng.randint(1, 5),
                     maturity_time=maturity_time
                 )
-                self.map[y][x].assets.append(asset)
+                self.place_asset(Position(x, y), asset)
                 available_cells.remove((x, y))
 
     def check_victory(self) -> Optional[Controller]:
         """Check if any controller has met the victory conditions"""
-        for controller in self.controllers:
-            print(f"checking victory for Controller {controller.id}")
-            victory = True
-            for resource_type, amount in self.victory_conditions.items():
-                if controller.resources[resource_type] < amount:
-                    victory = False
-                    print(f"...failed to meet victory condition for {resource_type.name}...")
-                    break
-            if victory:
-                print(f"...victory condition met for {controller}...")
-                self.state = 'victory'
-                self.victors.append(controller)
-                # return controller
+        with metrics.phase('victory_check'):
+            for controller in self.controllers:
+                victory = True
+                for resource_type, amount in self.victory_conditions.items():
+                    if controller.resources[resource_type] < amount:
+                        victory = False
+                        break
+                if victory and controller not in self.victors:
+                    logger.info("Controller %d met the victory conditions", controller.id)
+                    self.state = 'victory'
+                    self.victors.append(controller)
+                    self.touch()
+                    # return controller
         return None
 
     def process_controller_turn(self, controller: Controller, action: dict) -> None:
@@ -496,12 +770,136 @@ class Game:
             raise ValueError(f"Unknown action type: {action_type}")
 
     def log_event(self, message: str) -> None:
-        """Add an event to the log with current day and hour"""
-        self.event_log.append({
-            'day': self.day,
-            'hour': self.hour,
-            'message': message
-        })
+        """Add a free-text event to the log with current day and hour"""
+        self.record_event(EventKind.MESSAGE, detail=message)
+
+    def record_event(self, kind: EventKind, **fields) -> Event:
+        """Add a structured event to the log with current day and hour"""
+        return self.event_log.append(Event(kind, self.day, self.hour, self.touch(), **fields))
+
+    def writable_cell(self, x: int, y: int) -> Cell:
+        """The cell at (x, y) for modification, copied first if it is shared with a fork.
+        Read-only access can go through self.map directly."""
+        token = self.cow_token
+        cell = self.map[y][x]
+        if token is None or cell.owner is token:
+            return cell
+        row = self.map[y]
+        if not self.owned_rows[y]:
+            row = self.map[y] = list(row)
+            self.owned_rows[y] = 1
+        cell = row[x] = cell.copy(token, self.bots_by_id)
+        return cell
+
+    def fork(self) -> 'Game':
+        """An independent copy of the game, e.g. to try out orders.
+
+        Bots, controllers and the bookkeeping are copied, including the
+        random generator, so the fork plays out exactly as this game would.
+        Object maps are shared copy-on-write: the fork copies only the rows
+        and cells holding bots, and either game copies any other cell the
+        first time it modifies it. Array maps are copied outright.
+        """
+        clone = copy.copy(self)
+        clone.on_run_progress = None
+        clone.rng = random.Random()
+        clone.rng.setstate(self.rng.getstate())
+        clone.bots_by_id = {
+            bot_id: Bot(bot.position, Deck(bot.deck), bot.controller_id, bot_id)
+            for bot_id, bot in self.bots_by_id.items()
+        }
+        controllers = {controller.id: controller.copy(clone.bots_by_id)
+                       for controller in self.controllers}
+        clone.bot_index = self.bot_index.copy(clone.bots_by_id)
+        clone.controllers = list(controllers.values())
+        clone.victors = [controllers.get(controller.id, controller) for controller in self.victors]
+        clone.cell_versions = dict(self.cell_versions)
+        clone.controller_versions = dict(self.controller_versions)
+        clone.occupied_cells = set(self.occupied_cells)
+        clone.seedling_cells = set(self.seedling_cells)
+        clone.event_log = self.event_log.copy()
+
+        if isinstance(self.map, ArrayMap):
+            clone.map = self.map.copy(clone.bots_by_id)
+            return clone
+        # Every cell now belongs to neither game until one of them copies it
+        self.cow_token = object()
+        self.owned_rows = bytearray(self.height)
+        clone.cow_token = object()
+        clone.owned_rows = bytearray(self.height)
+        clone.map = list(self.map)
+        # Cells with bots are always copied, so shared cells never hold
+        # bots that belong to another game
+        for bot in clone.bots_by_id.values():
+            clone.writable_cell(bot.position.x, bot.position.y)
+        return clone
+
+    def snapshot(self) -> 'Game':
+        """Capture the current state so that restore() can return to it.
+        The snapshot is a fork; it is not meant to be played itself."""
+        return self.fork()
+
+    def restore(self, snapshot: 'Game') -> None:
+        """Return to a state captured by snapshot(). A snapshot can be restored any number of times.
+
+        The version moves forward past both histories, and earlier versions
+        can no longer be used as the base of a delta.
+        """
+        version = max(self.version, snapshot.version)
+        self.__dict__.update(snapshot.fork().__dict__)
+        self.version = version
+        self.base_version = self.touch()
+
+    def succeed(self, previous: 'Game') -> None:
+        """Continue the version history of a game this one replaces, as
+        restore() does, so versions stay unique within a session and a delta
+        based on the previous game's versions gets a full state instead.
+        """
+        self.version = max(self.version, previous.version)
+        self.base_version = self.touch()
+
+    def touch(self) -> int:
+        """Record a change to the game state, returning the new version."""
+        self.version += 1
+        return self.version
+
+    def mark_cell(self, x: int, y: int) -> None:
+        """Record a change to the cell at (x, y)."""
+        self.cell_versions.pop((x, y), None)
+        self.cell_versions[(x, y)] = self.touch()
+        cell = self.map[y][x]
+        if cell.bots or cell.assets:
+            self.occupied_cells.add((x, y))
+        else:
+            self.occupied_cells.discard((x, y))
+
+    def mark_controller(self, controller: Controller) -> None:
+        """Record a change to a controller's resources, bots or decks."""
+        self.controller_versions.pop(controller.id, None)
+        self.controller_versions[controller.id] = self.touch()
+
+    @staticmethod
+    def _changed_since(versions: Dict, since_version: int) -> list:
+        """Keys of a version-ordered dict changed after since_version, newest first."""
+        changed = []
+        for key in reversed(versions):
+            if versions[key] <= since_version:
+                break
+            changed.append(key)
+        return changed
+
+    def changed_cells(self, since_version: int) -> List[Tuple[int, int]]:
+        """Positions of the cells changed after the given version."""
+        return self._changed_since(self.cell_versions, since_version)
+
+    def changed_controllers(self, since_version: int) -> List[Controller]:
+        """Controllers still in play that changed after the given version."""
+        changed = set(self._changed_since(self.controller_versions, since_version))
+        return [controller for controller in self.controllers if controller.id in changed]
+
+    def events_since(self, since_version: int) -> List[Event]:
+        """Events logged after the given version, oldest first."""
+        return self.event_log.since_version(since_version)
 
     def is_valid_position(self, position: Position) -> bool:
         """Check if a position is within the game map boundaries"""
@@ -521,12 +919,18 @@ class Game:
             hour_cost = self.hour_costs['modify_deck']
         elif action_type == ControllerActionType.CREATE_BOT:
             hour_cost = self.hour_costs['new_bot']
+        elif action_type == ControllerActionType.RUN:
+            # Runs past the end of the day, so it keeps the clock itself
+            hours = parameters.get('hours')
+            if not isinstance(hours, int) or not 1 <= hours <= self.MAX_RUN_HOURS:
+                raise ValueError(f"hours parameter between 1 and {self.MAX_RUN_HOURS} required for RUN")
+            reserve_energy = parameters.get('reserve_energy', 1)
+            if not isinstance(reserve_energy, int) or reserve_energy < 0:
+                raise ValueError("reserve_energy must be a non-negative integer")
 
         # Check if we have enough hours left in the day
-        print(f"About to advance time, hour cost: {hour_cost}...")
         if not self.advance_time(hour_cost):
             raise ValueError(f"Not enough hours left in the day for {action_type.name}")
-        print(f"...advanced time, hour cost: {self.hour}...")
         # Process the action
         if action_type == ControllerActionType.TAKE_BOT_ACTIONS:
             if energy_points > controller.get_total_resources():
@@ -541,13 +945,12 @@ class Game:
             
             if bot_id is None:
                 raise ValueError("bot_id parameter required for MODIFY_DECK")
-            if bot_id >= len(controller.bots):
+            bot = self.get_bot(bot_id)
+            if bot is None or bot.controller_id != controller.id:
                 raise ValueError(f"Invalid bot_id: {bot_id}")
             if self.costs['modify_deck'] > controller.resources[ResourceType.BIOMASS]:
                 raise ValueError("Insufficient biomass to modify deck")
             
-            bot = controller.bots[bot_id]
-            
             # Handle card removal
             if removed_ids is not None:
                 # Sort indices in reverse order to avoid shifting issues
@@ -575,14 +978,16 @@ class Game:
         elif action_type == ControllerActionType.CREATE_BOT:
             if self.costs['new_bot'] > controller.get_total_resources():
                 raise ValueError("Insufficient resources to create new bot")
-            new_position = Position(controller.starting_position.x, controller.starting_position.y)
-            new_bot = Bot(new_position, [], controller.id)
-            controller.bots.append(new_bot)
-            self.map[new_position.y][new_position.x].bots.add(new_bot)
+            self.add_bot(controller, Bot(controller.starting_position, [], controller.id))
             controller.deduct_resources(self.costs['new_bot'])
 
-        print(f"PCA, hour now: {self.hour}")    
-        self.log_event(f"Controller {controller.id} performed {action_type.name}")
+        elif action_type == ControllerActionType.RUN:
+            self.fast_forward(controller, hours, reserve_energy)
+
+        logger.debug("Controller %d took %s, hour now %d", controller.id, action_type.name, self.hour)
+        self.mark_controller(controller)
+        self.record_event(EventKind.CONTROLLER_ACTION, controller_id=controller.id,
+                          detail=action_type.name)
 
     def advance_time(self, hours: int) -> bool:
         """Advance the game time by the specified number of hours.
@@ -590,11 +995,12 @@ class Game:
         if self.hour + hours > self.hours_per_day:
             return False
         
-        print(f"Advancing time {hours} hours. From {self.hour}.")
+        logger.debug("Advancing time %d hours from hour %d", hours, self.hour)
         self.hour += hours
         if self.hour >= self.hours_per_day:
             self.hour = 0
             self.day += 1
+            self.touch()
             # Process day-end events like seedling maturation
             self.mature_seedlings()
             
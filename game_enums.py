@@ -2,7 +2,7 @@ from enum import Enum, auto
 from dataclasses import dataclass
 from typing import Tuple, Union
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Position:
     x: int
     y: int
@@ -39,11 +39,25 @@ class ResourceType(Enum):
     BIOMASS = auto()
     ENERGY = auto()
 
+class EventKind(Enum):
+    """Kinds of entries in the game's event log"""
+    MESSAGE = auto()
+    MOVE = auto()
+    COLLISION = auto()
+    BOT_DESTROYED = auto()
+    HARVEST = auto()
+    HARVEST_FAILED = auto()
+    PLANT = auto()
+    PLANT_FAILED = auto()
+    CONTROLLER_ACTION = auto()
+    CONTROLLER_ELIMINATED = auto()
+
 class ControllerActionType(Enum):
     """Types of actions a controller can take during their turn"""
     TAKE_BOT_ACTIONS = "take_bot_actions"
     MODIFY_DECK = "modify_deck"
     CREATE_BOT = "create_bot"
+    RUN = "run"  # Let the bots work for many hours, across days
 
 # Direction vectors for movement
 DIRECTION_VECTORS = {
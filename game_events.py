@@ -0,0 +1,130 @@
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Union
+from game_enums import AssetType, EventKind
+
+# Message templates, filled in from an event's fields only when displayed
+EVENT_MESSAGES = {
+    EventKind.MESSAGE: "{detail}",
+    EventKind.MOVE: "Move from ({from_x}, {from_y}) to ({x}, {y}) by bot {controller_id}",
+    EventKind.COLLISION: "Collision detected at ({x}, {y})",
+    EventKind.BOT_DESTROYED: "Bot {controller_id} destroyed at ({x}, {y})",
+    EventKind.HARVEST: "Bot {controller_id} harvested {amount} {asset} at ({x}, {y})",
+    EventKind.HARVEST_FAILED: "Bot {controller_id} failed to harvest {asset} at ({x}, {y})",
+    EventKind.PLANT: "Bot {controller_id} planted {asset} seedling at ({x}, {y})",
+    EventKind.PLANT_FAILED: "Bot {controller_id} failed to plant {asset} (seedling exists) at ({x}, {y})",
+    EventKind.CONTROLLER_ACTION: "Controller {controller_id} performed {detail}",
+    EventKind.CONTROLLER_ELIMINATED: "Controller {controller_id} has no energy left and is eliminated",
+}
+
+@dataclass
+class Event:
+    kind: EventKind
+    day: int
+    hour: int
+    version: int = 0
+    seq: int = -1  # Assigned by the EventLog
+    controller_id: Optional[int] = None
+    x: Optional[int] = None
+    y: Optional[int] = None
+    from_x: Optional[int] = None
+    from_y: Optional[int] = None
+    amount: Optional[int] = None
+    asset_type: Optional[AssetType] = None
+    detail: Optional[str] = None  # Free text, or the action name for CONTROLLER_ACTION
+
+    @property
+    def message(self) -> str:
+        """Human readable description, formatted on demand."""
+        return EVENT_MESSAGES[self.kind].format(
+            detail=self.detail,
+            controller_id=self.controller_id,
+            x=self.x,
+            y=self.y,
+            from_x=self.from_x,
+            from_y=self.from_y,
+            amount=self.amount,
+            asset=self.asset_type.name if self.asset_type else None
+        )
+
+    def to_dict(self) -> Dict[str, Union[int, str]]:
+        """JSON representation: the structured fields that are set plus the message."""
+        event = {
+            'seq': self.seq,
+            'version': self.version,
+            'day': self.day,
+            'hour': self.hour,
+            'kind': self.kind.name,
+            'message': self.message
+        }
+        for field in ('controller_id', 'x', 'y', 'from_x', 'from_y', 'amount'):
+            value = getattr(self, field)
+            if value is not None:
+                event[field] = value
+        if self.asset_type is not None:
+            event['asset_type'] = self.asset_type.name
+        return event
+
+class EventLog:
+    """Fixed-capacity ring buffer of events; the oldest are dropped when full.
+
+    Events are numbered with a sequence number that keeps increasing across
+    drops, so clients can page through the log with since().
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._events: deque = deque(maxlen=capacity)
+        self.next_seq = 0
+
+    def append(self, event: Event) -> Event:
+        event.seq = self.next_seq
+        self.next_seq += 1
+        self._events.append(event)
+        return event
+
+    def copy(self) -> 'EventLog':
+        """A log with the same events and numbering. Logged events are never
+        modified, so they are shared rather than copied."""
+        log = EventLog(self.capacity)
+        log._events.extend(self._events)
+        log.next_seq = self.next_seq
+        return log
+
+    @property
+    def oldest_seq(self) -> int:
+        """Sequence number of the oldest event still held."""
+        return self._events[0].seq if self._events else self.next_seq
+
+    def latest(self, count: int) -> Iterator[Event]:
+        """The newest events, newest first, without copying the buffer."""
+        return islice(reversed(self._events), count)
+
+    def since(self, seq: int, limit: Optional[int] = None) -> List[Event]:
+        """Events with a sequence number above seq, oldest first, at most limit of them."""
+        start = max(seq + 1 - self.oldest_seq, 0)
+        stop = None if limit is None else start + limit
+        return list(islice(self._events, start, stop))
+
+    def since_version(self, version: int) -> List[Event]:
+        """Events logged after the given game version, oldest first."""
+        events = []
+        for event in reversed(self._events):
+            if event.version <= version:
+                break
+            events.append(event)
+        events.reverse()
+        return events
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __iter__(self) -> Iterator[Event]:
+        return iter(self._events)
+
+    def __reversed__(self) -> Iterator[Event]:
+        return reversed(self._events)
+
+    def __repr__(self) -> str:
+        return f"EventLog({[event.message for event in self._events]!r})"
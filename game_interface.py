@@ -1,7 +1,26 @@
-from typing import Dict
+import json
+import os
+import weakref
+from typing import Dict, List, Optional, Tuple
 from game_enums import AssetType, ResourceType, ActionType, Direction
 from game import Game
 from game_objects import Cell, Position, Bot, Asset
+import wire_format
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Side of the square tiles the map is served in, see get_tile_state
+TILE_SIZE = 32
+
+
+def encode_json(data) -> bytes:
+    """Compact JSON encoding of a state, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
 
 class GameInterface:
     # Color scheme for different asset types
@@ -16,102 +35,28 @@ class GameInterface:
     
     @staticmethod
     def generate_html_grid(game: Game) -> str:
-        """Generate an HTML representation of the game map"""
-        
-        # Generate CSS styles
-        styles = """
-            <style>
-                .game-grid {
-                    display: grid;
-                    grid-template-columns: repeat(%d, 60px);
-                    gap: 2px;
-                    background-color: #333;
-                    padding: 2px;
-                    font-family: monospace;
-                }
-                .cell {
-                    width: 60px;
-                    height: 60px;
-                    display: flex;
-                    flex-direction: column;
-                    justify-content: center;
-                    align-items: center;
-                    font-size: 12px;
-                    position: relative;
-                    background-color: #9BA2A7;
-                    overflow: hidden;
-                }
-                .coordinates {
-                    position: absolute;
-                    top: 2px;
-                    left: 2px;
-                    color: #999;
-                    font-size: 10px;
-                }
-                .bot-label {
-                    position: absolute;
-                    top: 2px;
-                    right: 2px;
-                    background-color: rgba(0, 0, 0, 0.7);
-                    color: white;
-                    padding: 1px 3px;
-                    border-radius: 3px;
-                    font-size: 10px;
-                }
-                .asset-label {
-                    color: white;
-                    text-align: center;
-                    margin: 2px 0;
-                    font-weight: bold;
-                }
-            </style>
-            """ % game.width
-        
-        # Generate grid HTML
-        grid_html = '<div class="game-grid">'
-        for y in range(game.height):
-            for x in range(game.width):
-                cell = game.map[y][x]
-                
-                # Determine cell background color based on assets
-                bg_color = "#9BA2A7"  # Default gray
-                if cell.assets:
-                    bg_color = GameInterface.ASSET_COLORS[cell.assets[0].type]
-                
-                cell_html = f'<div class="cell" style="background-color: {bg_color}">'
-                
-                # Add coordinates
-                cell_html += f'<div class="coordinates">({x},{y})</div>'
-                
-                # Add bot label if there are bots
-                if cell.bots:
-                    # Count bots per controller
-                    bot_counts = {}
-                    for bot in cell.bots:
-                        bot_counts[bot.controller_id] = bot_counts.get(bot.controller_id, 0) + 1
-                    
-                    # Create bot labels
-                    bot_labels = []
-                    for controller_id, count in bot_counts.items():
-                        label = f'C{controller_id}'
-                        if count > 1:
-                            label += f'×{count}'
-                        bot_labels.append(label)
-                    
-                    cell_html += f'<div class="bot-label">{" ".join(bot_labels)}</div>'
-                
-                # Add asset labels
-                if cell.assets:
-                    for asset in cell.assets:
-                        label = GameInterface.get_asset_label(asset)
-                        cell_html += f'<div class="asset-label">{label}</div>'
-                
-                cell_html += '</div>'
-                grid_html += cell_html
-        
-        grid_html += '</div>'
-        return styles + '\n' + grid_html
-    
+        """Generate an HTML representation of the game map.
+
+        Cell fragments are cached per game and only the cells changed since
+        the previous call are rendered again, see GridRenderer. Changes made
+        to cells behind the game's back (without Game.mark_cell) are not seen.
+        """
+        return GridRenderer.for_game(game).render(game)
+
+    @staticmethod
+    def generate_html_viewport(game: Game, x: int, y: int, width: int, height: int) -> str:
+        """The HTML grid of the width x height cells from (x, y) on, clipped to the map."""
+        viewport = GameInterface.clip_viewport(game, x, y, width, height)
+        return GridRenderer.for_game(game).render(game, viewport)
+
+    @staticmethod
+    def get_html_grid_changes(game: Game, since_version: int) -> dict:
+        """The HTML of the cells changed after since_version, keyed by the
+        cell element id, for replacing them in a page rendered at that
+        version. The whole grid is returned as 'html' when since_version
+        is not a version of this game's current history."""
+        return GridRenderer.for_game(game).render_changes(game, since_version)
+
     @staticmethod
     def get_game_state_summary(game: Game) -> str:
         """Generate a summary of game state including resources and victory conditions"""
@@ -124,8 +69,8 @@ class GameInterface:
         if game.event_log:
             summary.append("<br>Event Log:")
             # Show last 5 events in reverse chronological order
-            for event in reversed(game.event_log[-5:]):
-                summary.append(f"<br>Day {event['day']}, Hour {event['hour']}: {event['message']}")
+            for event in game.event_log.latest(5):
+                summary.append(f"<br>Day {event.day}, Hour {event.hour}: {event.message}")
             summary.append("<br>")
         
         # Add controller information
@@ -138,8 +83,8 @@ class GameInterface:
 
 
             # Add deck information for each bot
-            for i, bot in enumerate(controller.bots):
-                summary.append(f"<br>Bot {i} deck: [")
+            for bot in controller.bots:
+                summary.append(f"<br>Bot {bot.id} deck: [")
                 card_labels = []
                 for card in bot.deck:
                     if card.action_type == ActionType.MOVE:
@@ -235,12 +180,179 @@ class GameInterface:
         
         return label 
 
-    def get_game_state(self) -> dict:
-        """Returns a complete representation of the game state in JSON format."""
+    def get_game_state(self, sparse: bool = False) -> dict:
+        """Returns a complete representation of the game state in JSON format.
+
+        The default dense format lists every cell of the map under 'map'.
+        With sparse=True only occupied cells are listed, under 'cells', and
+        they refer to bots by id instead of repeating them.
+        """
+        state = self._get_info_state()
+        
+        if sparse:
+            state['format'] = 'sparse'
+            state['cells'] = [
+                self._get_sparse_cell_state(x, y)
+                for x, y in sorted(self.game.occupied_cells, key=lambda pos: (pos[1], pos[0]))
+            ]
+            state['event_log'] = [event.to_dict() for event in self.game.event_log]
+            return state
+        
+        # Add map state; only occupied cells need looking at, as for sparse
+        state['map'] = []
+        occupied = self.game.occupied_cells
+        for y in range(self.game.height):
+            row = []
+            for x in range(self.game.width):
+                if (x, y) in occupied:
+                    row.append(self._get_cell_state(x, y))
+                else:
+                    row.append({'position': {'x': x, 'y': y}, 'assets': [], 'bots': []})
+            state['map'].append(row)
+        
+        # Add event log
+        state['event_log'] = [event.to_dict() for event in self.game.event_log]
+        
+        return state
+
+    def get_game_state_binary(self) -> bytes:
+        """The dense state in the compact binary layout of wire_format."""
+        state = self._get_info_state()
+        state['event_log'] = [event.to_dict() for event in self.game.event_log]
+        width = self.game.width
+        game_map = self.game.map
+        cells = ((y * width + x, game_map[y][x].assets, game_map[y][x].bots)
+                 for x, y in sorted(self.game.occupied_cells, key=lambda pos: (pos[1], pos[0])))
+        return wire_format.encode_state(state, cells)
+
+    @staticmethod
+    def clip_viewport(game: Game, x: int, y: int, width: int, height: int) -> Tuple[int, int, int, int]:
+        """Clip a viewport to the map. Raises ValueError when it lies outside it."""
+        if width < 1 or height < 1:
+            raise ValueError("Viewport width and height must be positive")
+        if not (0 <= x < game.width and 0 <= y < game.height):
+            raise ValueError(f"Viewport origin ({x},{y}) is off the map")
+        return x, y, min(width, game.width - x), min(height, game.height - y)
+
+    def get_viewport_state(self, x: int, y: int, width: int, height: int, sparse: bool = False) -> dict:
+        """The cells of the width x height area from (x, y) on, clipped to the map.
+
+        Dense states list every cell in view under 'map', one list per row;
+        sparse ones list only the occupied cells, under 'cells'. Controllers
+        and events are left out, they are in get_game_state and get_events.
+        """
+        x, y, width, height = self.clip_viewport(self.game, x, y, width, height)
+        state = self._get_header_state()
+        state['viewport'] = {'x': x, 'y': y, 'width': width, 'height': height}
+        state.update(self._get_area_state(x, y, width, height, sparse))
+        return state
+
+    def get_tile_state(self, tile_x: int, tile_y: int, sparse: bool = False) -> dict:
+        """The cells of one TILE_SIZE x TILE_SIZE tile, laid out as in
+        get_viewport_state, and the tile's version (see TileIndex).
+        Nothing else is included, so a tile only changes with its cells."""
+        x, y, width, height = self.clip_viewport(self.game, tile_x * TILE_SIZE, tile_y * TILE_SIZE,
+                                                 TILE_SIZE, TILE_SIZE)
         state = {
-            'day': self.game.day,
-            'hour': self.game.hour,
-            'hours_per_day': self.game.hours_per_day,
+            'tile': {
+                'x': tile_x,
+                'y': tile_y,
+                'size': TILE_SIZE,
+                'version': TileIndex.for_game(self.game).tile_version(self.game, tile_x, tile_y)
+            }
+        }
+        state.update(self._get_area_state(x, y, width, height, sparse))
+        return state
+
+    def get_overview(self) -> dict:
+        """Downsampled map for a minimap: asset totals and bot counts per
+        tile, for the tiles holding anything."""
+        tiles = {}
+        for x, y in self.game.occupied_cells:
+            cell = self.game.map[y][x]
+            key = (x // TILE_SIZE, y // TILE_SIZE)
+            tile = tiles.get(key)
+            if tile is None:
+                tile = tiles[key] = {'x': key[0], 'y': key[1], 'assets': {}, 'bots': 0}
+            for asset in cell.assets:
+                tile['assets'][asset.type.name] = tile['assets'].get(asset.type.name, 0) + asset.amount
+            tile['bots'] += len(cell.bots)
+        return {
+            'tile_size': TILE_SIZE,
+            'columns': -(-self.game.width // TILE_SIZE),
+            'rows': -(-self.game.height // TILE_SIZE),
+            'tiles': [tiles[key] for key in sorted(tiles, key=lambda key: (key[1], key[0]))]
+        }
+
+    def _get_area_state(self, x: int, y: int, width: int, height: int, sparse: bool) -> dict:
+        """Cells of an area inside the map, dense or sparse."""
+        occupied = self.game.occupied_cells
+        if sparse:
+            if width * height > len(occupied):
+                in_area = [(cell_x, cell_y) for cell_x, cell_y in occupied
+                           if x <= cell_x < x + width and y <= cell_y < y + height]
+            else:
+                in_area = [(cell_x, cell_y) for cell_y in range(y, y + height)
+                           for cell_x in range(x, x + width) if (cell_x, cell_y) in occupied]
+            return {
+                'format': 'sparse',
+                'cells': [self._get_sparse_cell_state(cell_x, cell_y)
+                          for cell_x, cell_y in sorted(in_area, key=lambda pos: (pos[1], pos[0]))]
+            }
+        return {
+            'map': [
+                [self._get_cell_state(cell_x, cell_y) if (cell_x, cell_y) in occupied
+                 else {'position': {'x': cell_x, 'y': cell_y}, 'assets': [], 'bots': []}
+                 for cell_x in range(x, x + width)]
+                for cell_y in range(y, y + height)
+            ]
+        }
+
+    def get_events(self, since_seq: int = -1, limit: int = 100) -> dict:
+        """Page through the event log: events after since_seq, oldest first."""
+        event_log = self.game.event_log
+        events = event_log.since(since_seq, limit)
+        return {
+            'events': [event.to_dict() for event in events],
+            'oldest_seq': event_log.oldest_seq,
+            'next_seq': event_log.next_seq
+        }
+
+    def get_game_state_delta(self, since_version: int, sparse: bool = False) -> dict:
+        """Returns only what changed after since_version.
+
+        A client holding the state at since_version applies the delta by
+        replacing the listed cells and controllers, dropping controllers not
+        in controller_ids and appending the events. Cells use the sparse
+        layout when sparse=True. A full state (without
+        'delta': True) is returned when since_version is not a version of
+        this game's current history.
+        """
+        if not self.game.base_version <= since_version <= self.game.version:
+            return self.get_game_state(sparse)
+        
+        get_cell_state = self._get_sparse_cell_state if sparse else self._get_cell_state
+        state = self._get_header_state()
+        state.update({
+            'delta': True,
+            'since_version': since_version,
+            'controller_ids': [controller.id for controller in self.game.controllers],
+            'controllers': [
+                self._get_controller_state(controller)
+                for controller in self.game.changed_controllers(since_version)
+            ],
+            'cells': [
+                get_cell_state(x, y)
+                for x, y in self.game.changed_cells(since_version)
+            ],
+            'events': [event.to_dict() for event in self.game.events_since(since_version)]
+        })
+        return state
+
+    def _get_info_state(self) -> dict:
+        """Fields of a full state other than the cells and the event log."""
+        state = self._get_header_state()
+        state.update({
             'map_size': {
                 'width': self.game.width,
                 'height': self.game.height
@@ -251,72 +363,363 @@ class GameInterface:
                 resource_type.name: amount 
                 for resource_type, amount in self.game.victory_conditions.items()
             },
-            'controllers': [],
+            'controllers': [self._get_controller_state(controller) for controller in self.game.controllers],
+            # Most events the server keeps; clients trim their log to match
+            'event_log_capacity': self.game.event_log.capacity
+        })
+        return state
+
+    def _get_header_state(self) -> dict:
+        """Fields sent with both full states and deltas."""
+        return {
+            'version': self.game.version,
+            'day': self.game.day,
+            'hour': self.game.hour,
+            'hours_per_day': self.game.hours_per_day,
             'state': self.game.state,
-            'victors': self.game.victors,
-            'map': []
+            'victors': [controller.id for controller in self.game.victors]
+        }
+
+    def _get_controller_state(self, controller) -> dict:
+        controller_state = {
+            'id': controller.id,
+            'resources': {
+                resource_type.name: amount 
+                for resource_type, amount in controller.resources.items()
+            },
+            'bots': []
         }
         
-        # Add controllers state
-        for controller in self.game.controllers:
-            controller_state = {
-                'id': controller.id,
-                'resources': {
-                    resource_type.name: amount 
-                    for resource_type, amount in controller.resources.items()
+        # Add bots for this controller
+        for bot in controller.bots:
+            bot_state = {
+                'id': bot.id,
+                'position': {
+                    'x': bot.position.x,
+                    'y': bot.position.y
                 },
-                'bots': []
+                'deck': [
+                    {
+                        'action_type': card.action_type.name,
+                        'parameter': card.parameter.name
+                    }
+                    for card in bot.deck
+                ]
             }
-            
-            # Add bots for this controller
-            for bot in controller.bots:
-                bot_state = {
+            controller_state['bots'].append(bot_state)
+        return controller_state
+
+    def _get_cell_state(self, x: int, y: int) -> dict:
+        cell = self.game.map[y][x]
+        return {
+            'position': {'x': x, 'y': y},
+            'assets': [
+                {
+                    'type': asset.type.name,
+                    'amount': asset.amount,
+                    'maturity_time': asset.maturity_time
+                }
+                for asset in cell.assets
+            ],
+            'bots': [
+                {
+                    'id': bot.id,
+                    'controller_id': bot.controller_id,
                     'position': {
                         'x': bot.position.x,
                         'y': bot.position.y
-                    },
-                    'deck': [
-                        {
-                            'action_type': card.action_type.name,
-                            'parameter': card.parameter.name
-                        }
-                        for card in bot.deck
-                    ]
+                    }
                 }
-                controller_state['bots'].append(bot_state)
-            
-            state['controllers'].append(controller_state)
-        
-        # Add map state
-        for y in range(self.game.height):
-            row = []
-            for x in range(self.game.width):
-                cell = self.game.map[y][x]
-                cell_state = {
-                    'position': {'x': x, 'y': y},
-                    'assets': [
-                        {
-                            'type': asset.type.name,
-                            'amount': asset.amount,
-                            'maturity_time': asset.maturity_time
-                        }
-                        for asset in cell.assets
-                    ],
-                    'bots': [
-                        {
-                            'controller_id': bot.controller_id,
-                            'position': {
-                                'x': bot.position.x,
-                                'y': bot.position.y
-                            }
-                        }
-                        for bot in cell.bots
-                    ]
+                for bot in cell.bots
+            ]
+        }
+
+    def _get_sparse_cell_state(self, x: int, y: int) -> dict:
+        cell = self.game.map[y][x]
+        return {
+            'x': x,
+            'y': y,
+            'assets': [
+                {
+                    'type': asset.type.name,
+                    'amount': asset.amount,
+                    'maturity_time': asset.maturity_time
                 }
-                row.append(cell_state)
-            state['map'].append(row)
-        
-        # Add event log
-        state['event_log'] = self.game.event_log
-        
-        return state 
\ No newline at end of file
+                for asset in cell.assets
+            ],
+            'bot_ids': sorted(bot.id for bot in cell.bots)
+        }
+
+
+class GridRenderer:
+    """HTML grid of one game with the fragment of every cell cached.
+
+    The fragments are brought up to date from Game.cell_versions: only the
+    cells changed since the last render are rendered again and the grid is
+    assembled with a single join. A render after a restore(), which breaks
+    the version history, starts over. One renderer is kept per game and
+    dropped with it.
+    """
+
+    STYLES = """
+            <style>
+                .game-grid {
+                    display: grid;
+                    grid-template-columns: repeat(%d, 60px);
+                    gap: 2px;
+                    background-color: #333;
+                    padding: 2px;
+                    font-family: monospace;
+                }
+                .cell {
+                    width: 60px;
+                    height: 60px;
+                    display: flex;
+                    flex-direction: column;
+                    justify-content: center;
+                    align-items: center;
+                    font-size: 12px;
+                    position: relative;
+                    background-color: #9BA2A7;
+                    overflow: hidden;
+                }
+                .coordinates {
+                    position: absolute;
+                    top: 2px;
+                    left: 2px;
+                    color: #999;
+                    font-size: 10px;
+                }
+                .bot-label {
+                    position: absolute;
+                    top: 2px;
+                    right: 2px;
+                    background-color: rgba(0, 0, 0, 0.7);
+                    color: white;
+                    padding: 1px 3px;
+                    border-radius: 3px;
+                    font-size: 10px;
+                }
+                .asset-label {
+                    color: white;
+                    text-align: center;
+                    margin: 2px 0;
+                    font-weight: bold;
+                }
+            </style>
+            """
+
+    _renderers: 'weakref.WeakKeyDictionary[Game, GridRenderer]' = weakref.WeakKeyDictionary()
+
+    def __init__(self):
+        self.version = -1
+        self.width = 0
+        self.fragments: List[str] = []
+
+    @classmethod
+    def for_game(cls, game: Game) -> 'GridRenderer':
+        renderer = cls._renderers.get(game)
+        if renderer is None:
+            renderer = cls._renderers[game] = cls()
+        return renderer
+
+    def render(self, game: Game, viewport: Optional[Tuple[int, int, int, int]] = None) -> str:
+        """The grid, or the (x, y, width, height) part of it given as viewport."""
+        self.refresh(game)
+        if viewport is None:
+            return ''.join((self.STYLES % game.width, '\n<div class="game-grid">',
+                            ''.join(self.fragments), '</div>'))
+        x, y, width, height = viewport
+        rows = [''.join(self.fragments[row * game.width + x:row * game.width + x + width])
+                for row in range(y, y + height)]
+        return ''.join((self.STYLES % width, '\n<div class="game-grid">', ''.join(rows), '</div>'))
+
+    def render_changes(self, game: Game, since_version: int) -> dict:
+        if not game.base_version <= since_version <= game.version:
+            return {'version': game.version, 'html': self.render(game)}
+        self.refresh(game)
+        width = game.width
+        return {
+            'version': game.version,
+            'cells': {f'cell-{x}-{y}': self.fragments[y * width + x]
+                      for x, y in game.changed_cells(since_version)}
+        }
+
+    def refresh(self, game: Game) -> None:
+        """Re-render the cells changed since the last render."""
+        if self.version == game.version:
+            return
+        if (self.width != game.width or len(self.fragments) != game.width * game.height
+                or not game.base_version <= self.version <= game.version):
+            self.fragments = [self.render_cell(cell, x, y)
+                              for y, row in enumerate(game.map)
+                              for x, cell in enumerate(row)]
+            self.width = game.width
+        else:
+            for x, y in game.changed_cells(self.version):
+                self.fragments[y * self.width + x] = self.render_cell(game.map[y][x], x, y)
+        self.version = game.version
+
+    @staticmethod
+    def render_cell(cell: Cell, x: int, y: int) -> str:
+        assets = cell.assets
+        # Background color from the first asset, default gray
+        bg_color = GameInterface.ASSET_COLORS[assets[0].type] if assets else "#9BA2A7"
+        parts = [f'<div class="cell" id="cell-{x}-{y}" style="background-color: {bg_color}">'
+                 f'<div class="coordinates">({x},{y})</div>']
+
+        if cell.bots:
+            # Count bots per controller
+            bot_counts = {}
+            for bot in cell.bots:
+                bot_counts[bot.controller_id] = bot_counts.get(bot.controller_id, 0) + 1
+            bot_labels = [f'C{controller_id}×{count}' if count > 1 else f'C{controller_id}'
+                          for controller_id, count in bot_counts.items()]
+            parts.append(f'<div class="bot-label">{" ".join(bot_labels)}</div>')
+
+        for asset in assets:
+            parts.append(f'<div class="asset-label">{GameInterface.get_asset_label(asset)}</div>')
+        parts.append('</div>')
+        return ''.join(parts)
+
+
+class TileIndex:
+    """Version counters of the TILE_SIZE x TILE_SIZE tiles of one game's map.
+
+    A tile's version is the latest version of any of its cells, kept up to
+    date from Game.changed_cells like GridRenderer does. Tiles whose cells
+    never changed are at version 0. One index is kept per game and dropped
+    with it.
+    """
+
+    _indexes: 'weakref.WeakKeyDictionary[Game, TileIndex]' = weakref.WeakKeyDictionary()
+
+    def __init__(self):
+        # Tells this game's tags from those of other games and earlier processes
+        self.token = os.urandom(4).hex()
+        self.version = -1
+        self.versions: Dict[Tuple[int, int], int] = {}
+
+    @classmethod
+    def for_game(cls, game: Game) -> 'TileIndex':
+        index = cls._indexes.get(game)
+        if index is None:
+            index = cls._indexes[game] = cls()
+        return index
+
+    def refresh(self, game: Game) -> None:
+        """Take in the cells changed since the last refresh."""
+        if self.version == game.version:
+            return
+        if game.base_version <= self.version <= game.version:
+            cells = ((position, game.cell_versions[position])
+                     for position in game.changed_cells(self.version))
+        else:
+            self.versions = {}
+            cells = game.cell_versions.items()
+        versions = self.versions
+        for (x, y), version in cells:
+            key = (x // TILE_SIZE, y // TILE_SIZE)
+            if versions.get(key, 0) < version:
+                versions[key] = version
+        self.version = game.version
+
+    def tile_version(self, game: Game, tile_x: int, tile_y: int) -> int:
+        self.refresh(game)
+        return self.versions.get((tile_x, tile_y), 0)
+
+    def etag(self, game: Game, tile_x: int, tile_y: int) -> str:
+        """Entity tag of a tile; it changes whenever a cell of the tile does.
+        The base version is part of it since restore() rewinds cell versions."""
+        return f'"{self.token}-{game.base_version}-{self.tile_version(game, tile_x, tile_y)}"'
+
+    def overview_etag(self, game: Game) -> str:
+        """Entity tag of the overview, which changes with any cell."""
+        # cell_versions is in version order, so the last entry is the latest change
+        latest = next(reversed(game.cell_versions.values()), 0)
+        return f'"{self.token}-{game.base_version}-overview-{latest}"'
+
+
+class StateCache:
+    """Encoded states of one game at its current version.
+
+    get_game_state and get_game_state_delta results are kept as JSON bytes
+    by format and delta base until the version changes, so repeated reads
+    of an unchanged game are served without building or encoding anything.
+    Like deltas, this relies on every change going through the Game
+    methods that bump the version. One cache is kept per game and dropped
+    with it.
+    """
+
+    # Representations kept per version; clients polling in step share one
+    MAX_ENTRIES = 16
+
+    _caches: 'weakref.WeakKeyDictionary[Game, StateCache]' = weakref.WeakKeyDictionary()
+
+    def __init__(self):
+        # Tells this game's tags from those of other games and earlier processes
+        self.token = os.urandom(4).hex()
+        self.version = -1
+        # (delta base, sparse, binary, content coding) -> encoded body
+        self.entries: Dict[Tuple[Optional[int], bool, bool, Optional[str]], bytes] = {}
+
+    @classmethod
+    def for_game(cls, game: Game) -> 'StateCache':
+        cache = cls._caches.get(game)
+        if cache is None:
+            cache = cls._caches[game] = cls()
+        return cache
+
+    @staticmethod
+    def delta_base(game: Game, since_version: Optional[int]) -> Optional[int]:
+        """The version a delta after since_version is computed from, or None
+        for a full state: deltas from outside the history are full states."""
+        if since_version is not None and not game.base_version <= since_version <= game.version:
+            return None
+        return since_version
+
+    def etag(self, game: Game, since_version: Optional[int] = None, sparse: bool = False,
+             binary: bool = False, encoding: Optional[str] = None) -> str:
+        """Entity tag of the state, or of the delta after since_version, in
+        the given representation (see get)."""
+        base = self.delta_base(game, since_version)
+        tag = f'{self.token}-{game.version}-{"sparse" if sparse else "dense"}'
+        if base is not None:
+            tag += f'-since-{base}'
+        elif binary and not sparse:
+            tag += '-binary'
+        if encoding is not None:
+            tag += f'-{encoding}'
+        return f'"{tag}"'
+
+    def get(self, game: Game, since_version: Optional[int] = None, sparse: bool = False,
+            binary: bool = False, encoding: Optional[str] = None) -> bytes:
+        """The encoded state, or the delta after since_version.
+
+        binary asks for the wire_format layout of a full dense state; deltas
+        and sparse states are always JSON. encoding compresses the body with
+        one of wire_format.ENCODINGS.
+        """
+        if self.version != game.version:
+            self.entries.clear()
+            self.version = game.version
+        base = self.delta_base(game, since_version)
+        binary = binary and base is None and not sparse
+        key = (base, sparse, binary, encoding)
+        body = self.entries.get(key)
+        if body is None:
+            if encoding is not None:
+                body = wire_format.compress(self.get(game, since_version, sparse, binary), encoding)
+            else:
+                interface = GameInterface()
+                interface.game = game
+                if binary:
+                    body = interface.get_game_state_binary()
+                elif base is None:
+                    body = encode_json(interface.get_game_state(sparse))
+                else:
+                    body = encode_json(interface.get_game_state_delta(base, sparse))
+            if len(self.entries) >= self.MAX_ENTRIES:
+                del self.entries[next(iter(self.entries))]
+            self.entries[key] = body
+        return body
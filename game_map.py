@@ -0,0 +1,318 @@
+from array import array
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from game_enums import AssetType, Direction, DIRECTION_VECTORS, Position, SEEDLING_TO_ASSET
+from game_objects import Asset, Bot, Cell
+
+# Supported values for the 'map_storage' config field
+MAP_STORAGE_MODES = ('objects', 'arrays')
+
+MATURE_TYPES = [asset_type for asset_type in AssetType if asset_type not in SEEDLING_TO_ASSET]
+SEEDLING_TYPES = list(SEEDLING_TO_ASSET)
+
+
+def build_map(width: int, height: int, storage: str = 'objects'):
+    """Create the game map in the requested storage mode.
+
+    'objects' is a list of rows of Cell instances, 'arrays' is an ArrayMap
+    holding one flat grid per asset type and handing out Cell-like views.
+    """
+    if storage == 'objects':
+        return [[Cell() for _ in range(width)] for _ in range(height)]
+    if storage == 'arrays':
+        return ArrayMap(width, height)
+    raise ValueError(f"Unknown map storage: {storage}")
+
+
+class _LazyBotSet(set):
+    """Empty bot set for an unoccupied cell; registers itself on first add."""
+
+    def __init__(self, owner: Dict[int, Set[Bot]], index: int):
+        super().__init__()
+        self._owner = owner
+        self._index = index
+
+    def add(self, bot: Bot) -> None:
+        super().add(bot)
+        self._owner.setdefault(self._index, self)
+
+    def update(self, *others) -> None:
+        super().update(*others)
+        if self:
+            self._owner.setdefault(self._index, self)
+
+    def __reduce__(self):
+        # Copies and pickles only ever see registered sets, so a plain set will do
+        return (set, (list(self),))
+
+
+# Neighbour of a position on the edge of the map, in the direction off it
+OFF_MAP = Position(-1, -1)
+
+
+class PositionTable:
+    """One shared Position per cell of a map, indexed by y * width + x.
+
+    Positions are created the first time they are asked for, so a new
+    game only pays for a list of width * height empty slots. Looking one
+    up is much cheaper than building a frozen Position, and bots that
+    step onto a cell get the cell's own instance. Games keep one table
+    per map; forks share it, as positions never change.
+    """
+
+    __slots__ = ('width', 'height', '_positions')
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self._positions: List[Optional[Position]] = [None] * (width * height)
+
+    def at(self, x: int, y: int) -> Position:
+        """The Position (x, y), which must be on the map."""
+        index = y * self.width + x
+        position = self._positions[index]
+        if position is None:
+            position = self._positions[index] = Position(x, y)
+        return position
+
+    def neighbor(self, position: Position, direction: Direction) -> Position:
+        """The position one step away in direction, or OFF_MAP past the
+        edge of the map. Direction must not be RANDOM."""
+        dx, dy = DIRECTION_VECTORS[direction]
+        x = position.x + dx
+        y = position.y + dy
+        if 0 <= x < self.width and 0 <= y < self.height:
+            index = y * self.width + x
+            target = self._positions[index]
+            if target is None:
+                target = self._positions[index] = Position(x, y)
+            return target
+        return OFF_MAP
+
+
+# Shared answer for unoccupied positions
+_NO_BOTS = frozenset()
+
+
+class OccupancyIndex:
+    """Bots in play keyed by their (x, y) position.
+
+    Sparse, like the bots themselves: only occupied positions have an
+    entry, so occupancy checks are a dict lookup and iterating the
+    occupied positions costs nothing for empty parts of the map. Game
+    keeps it up to date as bots are added, moved and removed.
+    """
+
+    def __init__(self):
+        self._cells: Dict[Tuple[int, int], Set[Bot]] = {}
+
+    def copy(self, bots_by_id: Dict[int, Bot]) -> 'OccupancyIndex':
+        """Copy of the index holding the given game's copies of the bots."""
+        index = OccupancyIndex()
+        index._cells = {position: {bots_by_id[bot.id] for bot in bots}
+                        for position, bots in self._cells.items()}
+        return index
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __contains__(self, position: Tuple[int, int]) -> bool:
+        return position in self._cells
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return iter(self._cells)
+
+    def add(self, bot: Bot, x: int, y: int) -> None:
+        self._cells.setdefault((x, y), set()).add(bot)
+
+    def discard(self, bot: Bot, x: int, y: int) -> None:
+        bots = self._cells.get((x, y))
+        if bots is not None:
+            bots.discard(bot)
+            if not bots:
+                del self._cells[(x, y)]
+
+    def bots_at(self, x: int, y: int) -> Set[Bot]:
+        """The bots at (x, y); do not modify the returned set."""
+        return self._cells.get((x, y), _NO_BOTS)
+
+    def within(self, x: int, y: int, radius: int) -> List[Bot]:
+        """Bots at most radius moves (Manhattan distance) from (x, y),
+        nearest first and by id within the same distance."""
+        found = []
+        area = 2 * radius * (radius + 1) + 1
+        if area <= len(self._cells):
+            # Probe the positions in range
+            cells = self._cells
+            for dy in range(-radius, radius + 1):
+                span = radius - abs(dy)
+                for dx in range(-span, span + 1):
+                    bots = cells.get((x + dx, y + dy))
+                    if bots:
+                        found.extend((abs(dx) + abs(dy), bot.id, bot) for bot in bots)
+        else:
+            # Fewer occupied positions than positions in range
+            for (bot_x, bot_y), bots in self._cells.items():
+                distance = abs(bot_x - x) + abs(bot_y - y)
+                if distance <= radius:
+                    found.extend((distance, bot.id, bot) for bot in bots)
+        found.sort(key=lambda entry: (entry[0], entry[1] is None, entry[1] or 0))
+        return [bot for _, _, bot in found]
+
+
+def _copy_grid(grid):
+    if isinstance(grid, array):
+        return grid[:]
+    # A memoryview slice would share the buffer, so copy its bytes instead
+    return array(grid.format, grid.tobytes())
+
+
+class ArrayMap:
+    """Structure-of-arrays map storage.
+
+    Mature asset amounts, seedling amounts and seedling countdowns are kept
+    in flat typed arrays indexed by y * width + x. Bots are sparse and are
+    kept in a dict of sets keyed by the same index.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        size = width * height
+        self.amounts: Dict[AssetType, array] = {
+            asset_type: array('i', bytes(array('i').itemsize * size))
+            for asset_type in AssetType
+        }
+        self.countdowns: Dict[AssetType, array] = {
+            asset_type: array('h', bytes(array('h').itemsize * size))
+            for asset_type in SEEDLING_TYPES
+        }
+        self.bots: Dict[int, Set[Bot]] = {}
+
+    def copy(self, bots_by_id: Dict[int, Bot]) -> 'ArrayMap':
+        """Copy of the map holding the given game's copies of the bots.
+        The grids are flat buffers, so this is a memory copy per asset type.
+        Grids may be memoryviews over a loaded save; copies are always arrays."""
+        array_map = ArrayMap.__new__(ArrayMap)
+        array_map.width = self.width
+        array_map.height = self.height
+        array_map.amounts = {asset_type: _copy_grid(grid) for asset_type, grid in self.amounts.items()}
+        array_map.countdowns = {asset_type: _copy_grid(grid) for asset_type, grid in self.countdowns.items()}
+        array_map.bots = {index: {bots_by_id[bot.id] for bot in bots}
+                          for index, bots in self.bots.items() if bots}
+        return array_map
+
+    def __len__(self) -> int:
+        return self.height
+
+    def __getitem__(self, y: int) -> 'ArrayRow':
+        if not 0 <= y < self.height:
+            raise IndexError("map row out of range")
+        return ArrayRow(self, y)
+
+    def __iter__(self) -> Iterator['ArrayRow']:
+        for y in range(self.height):
+            yield ArrayRow(self, y)
+
+
+class ArrayRow:
+    """A single row of an ArrayMap."""
+
+    __slots__ = ('_map', '_offset')
+
+    def __init__(self, array_map: ArrayMap, y: int):
+        self._map = array_map
+        self._offset = y * array_map.width
+
+    def __len__(self) -> int:
+        return self._map.width
+
+    def __getitem__(self, x: int) -> 'CellView':
+        if not 0 <= x < self._map.width:
+            raise IndexError("map column out of range")
+        return CellView(self._map, self._offset + x)
+
+    def __iter__(self) -> Iterator['CellView']:
+        for x in range(self._map.width):
+            yield CellView(self._map, self._offset + x)
+
+
+class CellView:
+    """Cell-like adapter over one position of an ArrayMap.
+
+    `assets` is a freshly built list; changes to it are not written back,
+    use the Cell methods (add_asset, take_mature, ...) to modify the cell.
+    """
+
+    __slots__ = ('_map', '_index')
+
+    def __init__(self, array_map: ArrayMap, index: int):
+        self._map = array_map
+        self._index = index
+
+    @property
+    def assets(self) -> List[Asset]:
+        index = self._index
+        assets = []
+        for asset_type in MATURE_TYPES:
+            amount = self._map.amounts[asset_type][index]
+            if amount:
+                assets.append(Asset(asset_type, amount))
+        for asset_type in SEEDLING_TYPES:
+            countdown = self._map.countdowns[asset_type][index]
+            if countdown:
+                assets.append(Asset(asset_type, self._map.amounts[asset_type][index], countdown))
+        return assets
+
+    @property
+    def bots(self) -> Set[Bot]:
+        bots = self._map.bots.get(self._index)
+        if bots is None:
+            bots = _LazyBotSet(self._map.bots, self._index)
+        return bots
+
+    def add_asset(self, asset: Asset) -> None:
+        """Add an asset to this cell, merging with any stack of the same type."""
+        index = self._index
+        self._map.amounts[asset.type][index] += asset.amount
+        if asset.maturity_time is not None:
+            countdowns = self._map.countdowns[asset.type]
+            if not countdowns[index]:
+                # Zero marks "no seedling", so clamp to mature on the next tick
+                countdowns[index] = max(asset.maturity_time, 1)
+
+    def take_mature(self, asset_type: AssetType) -> Optional[Asset]:
+        """Remove and return the mature stack of the given type, if any."""
+        if asset_type in SEEDLING_TO_ASSET:
+            return None
+        amounts = self._map.amounts[asset_type]
+        amount = amounts[self._index]
+        if not amount:
+            return None
+        amounts[self._index] = 0
+        return Asset(asset_type, amount)
+
+    def has_seedling(self) -> bool:
+        """Check whether any seedling is growing in this cell."""
+        index = self._index
+        return any(self._map.countdowns[asset_type][index] for asset_type in SEEDLING_TYPES)
+
+    def tick_seedlings(self) -> bool:
+        """Advance seedling maturation by one step.
+        Returns True if the cell still holds seedlings afterwards."""
+        index = self._index
+        pending = False
+        for asset_type in SEEDLING_TYPES:
+            countdowns = self._map.countdowns[asset_type]
+            countdown = countdowns[index]
+            if not countdown:
+                continue
+            countdown -= 1
+            if countdown <= 0:
+                amounts = self._map.amounts[asset_type]
+                self._map.amounts[SEEDLING_TO_ASSET[asset_type]][index] += amounts[index]
+                amounts[index] = 0
+                countdowns[index] = 0
+            else:
+                countdowns[index] = countdown
+                pending = True
+        return pending
@@ -1,42 +1,255 @@
+from collections import deque
 from dataclasses import dataclass
+from typing import Iterable, Iterator
 from typing import List, Dict, Optional, Set, Tuple, Union
-from game_enums import Position, AssetType, ActionType, Direction, ResourceType
+from game_enums import Position, AssetType, ActionType, Direction, ResourceType, SEEDLING_TO_ASSET
 
-@dataclass
+@dataclass(slots=True)
 class Asset:
     type: AssetType
     amount: int
     maturity_time: Optional[int] = None  # None for mature assets
 
-@dataclass(frozen=True)  # Make Card immutable and automatically add __hash__
+@dataclass(frozen=True, slots=True)  # Make Card immutable and automatically add __hash__
 class Card:
+    """A card in a bot's deck. There are only a few dozen distinct cards,
+    so each is created once and shared: Card(...) returns the existing one."""
     action_type: ActionType
     parameter: Union[Direction, AssetType]  # Direction for MOVE, AssetType for HARVEST/PLANT
 
-@dataclass
+    def __new__(cls, action_type: ActionType, parameter: Union[Direction, AssetType]) -> 'Card':
+        card = _CARDS.get((action_type, parameter))
+        if card is None:
+            card = _CARDS[(action_type, parameter)] = object.__new__(cls)
+        return card
+
+    def __reduce__(self):
+        # Copies and unpickled cards are the shared instance too
+        return (Card, (self.action_type, self.parameter))
+
+_CARDS: Dict[Tuple[ActionType, Union[Direction, AssetType]], Card] = {}
+
+class Deck(deque):
+    """A bot's cards in play order, starting with the next card to play.
+
+    Drawing rotates the deque so it is constant time and allocation free.
+    Slicing and pop(index) behave as they do for lists.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        return super().__getitem__(index)
+
+    def pop(self, index: Optional[int] = None) -> Card:
+        if index is None:
+            return super().pop()
+        card = self[index]
+        del self[index]
+        return card
+
+    def draw(self) -> Card:
+        """Return the top card and move it to the bottom of the deck."""
+        card = self[0]
+        self.rotate(-1)
+        return card
+
+@dataclass(eq=False, slots=True)  # Bots compare and hash by identity, never by their mutable position
 class Bot:
     position: Position
-    deck: List[Card]
+    deck: Deck
     controller_id: int
+    id: Optional[int] = None  # Stable id, assigned when the bot joins a game
+
+    def __post_init__(self) -> None:
+        # Bots may be built from a plain list of cards
+        if not isinstance(self.deck, Deck):
+            self.deck = Deck(self.deck)
+
+class BotList:
+    """A controller's bots with constant time append, indexing and removal.
+
+    Removal moves the last bot into the freed slot, so order is not preserved.
+    """
+
+    __slots__ = ('_bots', '_slots')
+
+    def __init__(self, bots: Iterable[Bot] = ()):
+        self._bots: List[Bot] = []
+        self._slots: Dict[int, int] = {}  # id(bot) -> index in self._bots
+        self.extend(bots)
+
+    def append(self, bot: Bot) -> None:
+        if id(bot) in self._slots:
+            return
+        self._slots[id(bot)] = len(self._bots)
+        self._bots.append(bot)
+
+    def extend(self, bots: Iterable[Bot]) -> None:
+        for bot in bots:
+            self.append(bot)
+
+    def remove(self, bot: Bot) -> None:
+        index = self._slots.pop(id(bot), None)
+        if index is None:
+            raise ValueError("Bot not in list")
+        last = self._bots.pop()
+        if last is not bot:
+            self._bots[index] = last
+            self._slots[id(last)] = index
+
+    def discard(self, bot: Bot) -> None:
+        if id(bot) in self._slots:
+            self.remove(bot)
+
+    def clear(self) -> None:
+        self._bots.clear()
+        self._slots.clear()
+
+    def __contains__(self, bot: object) -> bool:
+        return id(bot) in self._slots
+
+    def __len__(self) -> int:
+        return len(self._bots)
+
+    def __iter__(self) -> Iterator[Bot]:
+        return iter(self._bots)
+
+    def __getitem__(self, index):
+        return self._bots[index]
+
+    def __repr__(self) -> str:
+        return f"BotList({self._bots!r})"
+
+class AssetStacks:
+    """A cell's assets keyed by type: at most one stack per AssetType.
+
+    Mature assets and seedlings are different types, so a cell holds at
+    most one mature stack and one seedling of each kind. Adding an asset
+    of a type already present merges it into that stack; a seedling keeps
+    its countdown. Iteration, indexing and len behave like a list of the
+    stacks in the order they were added.
+    """
+
+    __slots__ = ('_stacks',)
+
+    def __init__(self, assets: Iterable[Asset] = ()):
+        self._stacks: Dict[AssetType, Asset] = _NO_STACKS
+        self.extend(assets)
+
+    def append(self, asset: Asset) -> None:
+        stack = self._stacks.get(asset.type)
+        if stack is not None:
+            stack.amount += asset.amount
+            return
+        if self._stacks is _NO_STACKS:
+            # Most cells stay empty, so they share one dict until first used
+            self._stacks = {}
+        self._stacks[asset.type] = asset
+
+    def extend(self, assets: Iterable[Asset]) -> None:
+        for asset in assets:
+            self.append(asset)
+
+    def get(self, asset_type: AssetType) -> Optional[Asset]:
+        """The stack of the given type, if any."""
+        return self._stacks.get(asset_type)
+
+    def pop_type(self, asset_type: AssetType) -> Optional[Asset]:
+        """Remove and return the stack of the given type, if any."""
+        if asset_type not in self._stacks:
+            return None
+        return self._stacks.pop(asset_type)
+
+    def remove(self, asset: Asset) -> None:
+        if self._stacks.get(asset.type) != asset:
+            raise ValueError("Asset not in cell")
+        del self._stacks[asset.type]
+
+    def clear(self) -> None:
+        self._stacks = _NO_STACKS
+
+    def __contains__(self, asset: object) -> bool:
+        return isinstance(asset, Asset) and self._stacks.get(asset.type) == asset
+
+    def __len__(self) -> int:
+        return len(self._stacks)
+
+    def __iter__(self) -> Iterator[Asset]:
+        return iter(self._stacks.values())
+
+    def __getitem__(self, index):
+        return list(self._stacks.values())[index]
 
     def __eq__(self, other: object) -> bool:
-        if not isinstance(other, Bot):
-            return NotImplemented
-        return (self.position == other.position and 
-                self.controller_id == other.controller_id)
+        if isinstance(other, AssetStacks):
+            return list(self) == list(other)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"AssetStacks({list(self._stacks.values())!r})"
 
-    def __hash__(self) -> int:
-        return hash((self.position, self.controller_id))
+# Shared by every cell without assets; never modified
+_NO_STACKS: Dict[AssetType, Asset] = {}
 
 class Cell:
+    __slots__ = ('assets', 'bots', 'owner')
+
     def __init__(self):
-        self.assets: List[Asset] = []
+        self.assets = AssetStacks()
         self.bots: Set[Bot] = set()
+        # Copy-on-write tag of the game allowed to modify this cell in place,
+        # None until the game is first forked
+        self.owner: Optional[object] = None
+
+    def copy(self, owner: object, bots_by_id: Dict[int, Bot]) -> 'Cell':
+        """Copy with its own assets, for the given owner, with bots looked up by id."""
+        cell = Cell.__new__(Cell)
+        cell.assets = AssetStacks(Asset(asset.type, asset.amount, asset.maturity_time)
+                                  for asset in self.assets)
+        cell.bots = {bots_by_id[bot.id] for bot in self.bots}
+        cell.owner = owner
+        return cell
+
+    def add_asset(self, asset: Asset) -> None:
+        """Add an asset to this cell, merging with any stack of the same type."""
+        self.assets.append(asset)
+
+    def take_mature(self, asset_type: AssetType) -> Optional[Asset]:
+        """Remove and return the mature stack of the given type, if any."""
+        if asset_type in SEEDLING_TO_ASSET:
+            return None
+        return self.assets.pop_type(asset_type)
+
+    def has_seedling(self) -> bool:
+        """Check whether any seedling is growing in this cell."""
+        return any(self.assets.get(seedling_type) is not None for seedling_type in SEEDLING_TO_ASSET)
+
+    def tick_seedlings(self) -> bool:
+        """Advance seedling maturation by one step.
+        Returns True if the cell still holds seedlings afterwards."""
+        pending = False
+        # In stack order, so new mature stacks are added in a stable order
+        for seedling in [asset for asset in self.assets if asset.maturity_time is not None]:
+            seedling.maturity_time -= 1
+            if seedling.maturity_time <= 0:
+                # Merges into the mature stack, or starts one
+                self.assets.pop_type(seedling.type)
+                self.assets.append(Asset(SEEDLING_TO_ASSET[seedling.type], seedling.amount))
+            else:
+                pending = True
+        return pending
 
 class Controller:
+    __slots__ = ('id', 'bots', 'resources', 'starting_position')
+
     def __init__(self, id: int):
         self.id = id
-        self.bots: List[Bot] = []
+        self.bots = BotList()
         self.resources = {
             ResourceType.MINERAL: 0,
             ResourceType.BIOMASS: 0,
@@ -44,6 +257,14 @@ class Controller:
         }
         self.starting_position = Position(0, 0)  # Default starting position
 
+    def copy(self, bots_by_id: Dict[int, Bot]) -> 'Controller':
+        """Copy with the same resources, holding the given game's copies of its bots."""
+        controller = Controller(self.id)
+        controller.bots = BotList(bots_by_id[bot.id] for bot in self.bots)
+        controller.resources = dict(self.resources)
+        controller.starting_position = self.starting_position
+        return controller
+
     def get_total_resources(self) -> int:
         """Get the total amount of resources this controller has."""
         return sum(self.resources.values())
@@ -0,0 +1,277 @@
+"""Binary save files for games in progress.
+
+Layout (native byte order, recorded in the header):
+
+    header   magic, format version, byte order, width, height,
+             metadata length, map offset
+    metadata compact JSON: rules, clock, controllers, bots with decks,
+             random generator state and the event log tail
+    map      one int32 grid of amounts per AssetType, then one int16 grid
+             of seedling countdowns per seedling type, each width * height
+             cells indexed by y * width + x (the ArrayMap layout)
+    cells    int32 x coordinates then y coordinates of the occupied cells,
+             and the same for the seedling cells
+
+The map section has a fixed stride, so an 'arrays' game can be resumed by
+memory-mapping the file instead of reading it: pages are only touched when
+the cells on them are used. Cells of an 'objects' game whose stacks the
+grids cannot reproduce exactly (their order, or a countdown below one)
+also have their asset lists in the metadata, which is where an 'objects'
+game is loaded from.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Optional
+from game import Game
+from game_enums import ActionType, AssetType, Direction, EventKind, Position, ResourceType
+from game_events import Event
+from game_map import ArrayMap, MATURE_TYPES, SEEDLING_TYPES
+from game_objects import Asset, AssetStacks, Bot, Card, Controller
+
+MAGIC = b'SFGAME\0\0'
+SAVE_FORMAT_VERSION = 1
+# magic, format version, little endian flag, width, height, metadata length, map offset
+HEADER = struct.Struct('<8sHBxIIQQ')
+ALIGNMENT = 8
+
+AMOUNT_BYTES = array('i').itemsize
+COUNTDOWN_BYTES = array('h').itemsize
+
+
+def _encode_event(event: Event) -> list:
+    return [event.kind.name, event.day, event.hour, event.version, event.seq,
+            event.controller_id, event.x, event.y, event.from_x, event.from_y,
+            event.amount, event.asset_type.name if event.asset_type else None, event.detail]
+
+
+def _decode_event(data: list) -> Event:
+    (kind, day, hour, version, seq, controller_id, x, y,
+     from_x, from_y, amount, asset_type, detail) = data
+    return Event(EventKind[kind], day, hour, version, seq, controller_id, x, y,
+                 from_x, from_y, amount, AssetType[asset_type] if asset_type else None, detail)
+
+
+def _encode_card(card: Card) -> list:
+    return [card.action_type.name, card.parameter.name]
+
+
+def _decode_card(data: list) -> Card:
+    action_type = ActionType[data[0]]
+    if action_type == ActionType.MOVE:
+        return Card(action_type, Direction[data[1]])
+    return Card(action_type, AssetType[data[1]])
+
+
+def _metadata(game: Game, stacks: list) -> dict:
+    rng_version, rng_internal, rng_gauss = game.rng.getstate()
+    return {
+        'rules': {
+            'map_storage': game.map_storage,
+            'seedling_maturity_time': game.seedling_maturity_time,
+            'new_bot_cost': game.costs['new_bot'],
+            'modify_deck_cost': game.costs['modify_deck'],
+            'victory_conditions': {
+                resource_type.name: amount for resource_type, amount in game.victory_conditions.items()
+            },
+            'hours_per_day': game.hours_per_day,
+            'event_log_capacity': game.event_log.capacity,
+        },
+        'seed': game.seed,
+        'rng': [rng_version, list(rng_internal), rng_gauss],
+        'day': game.day,
+        'hour': game.hour,
+        'state': game.state,
+        'version': game.version,
+        'next_bot_id': game.next_bot_id,
+        'controllers': [
+            {
+                'id': controller.id,
+                'resources': {resource.name: amount for resource, amount in controller.resources.items()},
+                'starting_position': [controller.starting_position.x, controller.starting_position.y],
+                # In BotList order, which decides which bot acts next
+                'bots': [bot.id for bot in controller.bots],
+            }
+            for controller in game.controllers
+        ],
+        'victors': [controller.id for controller in game.victors],
+        'bots': [
+            [bot.id, bot.controller_id, bot.position.x, bot.position.y,
+             [_encode_card(card) for card in bot.deck]]
+            for bot in game.bots_by_id.values()
+        ],
+        'event_log': {
+            'next_seq': game.event_log.next_seq,
+            'events': [_encode_event(event) for event in game.event_log],
+        },
+        'occupied_cells': len(game.occupied_cells),
+        'seedling_cells': len(game.seedling_cells),
+        'stacks': stacks,
+    }
+
+
+def _grid_assets(amounts, countdowns, index: int) -> list:
+    """The assets of one cell of the saved grids, in CellView order."""
+    assets = []
+    for asset_type in MATURE_TYPES:
+        if amounts[asset_type][index]:
+            assets.append(Asset(asset_type, amounts[asset_type][index]))
+    for asset_type in SEEDLING_TYPES:
+        if countdowns[asset_type][index]:
+            assets.append(Asset(asset_type, amounts[asset_type][index], countdowns[asset_type][index]))
+    return assets
+
+
+def _map_section(game: Game):
+    """The amount and countdown grids of a game, in save order, and the
+    exact asset lists of object map cells the grids cannot reproduce."""
+    if isinstance(game.map, ArrayMap):
+        return ([game.map.amounts[asset_type] for asset_type in AssetType]
+                + [game.map.countdowns[asset_type] for asset_type in SEEDLING_TYPES]), []
+    cells = game.width * game.height
+    amounts = {asset_type: array('i', bytes(AMOUNT_BYTES * cells)) for asset_type in AssetType}
+    countdowns = {asset_type: array('h', bytes(COUNTDOWN_BYTES * cells)) for asset_type in SEEDLING_TYPES}
+    stacks = []
+    # Only occupied cells can hold assets
+    for x, y in game.occupied_cells:
+        index = y * game.width + x
+        assets = game.map[y][x].assets
+        for asset in assets:
+            amounts[asset.type][index] += asset.amount
+            if asset.maturity_time is not None and not countdowns[asset.type][index]:
+                countdowns[asset.type][index] = max(asset.maturity_time, 1)
+        # Keep the stack order, which the serialized state follows
+        if assets != _grid_assets(amounts, countdowns, index):
+            stacks.append([index, [[asset.type.name, asset.amount, asset.maturity_time] for asset in assets]])
+    grids = [amounts[asset_type] for asset_type in AssetType] + [countdowns[asset_type] for asset_type in SEEDLING_TYPES]
+    return grids, stacks
+
+
+def save_game(game: Game, path: str) -> None:
+    """Write the full state of a game to a binary save file."""
+    grids, stacks = _map_section(game)
+    metadata = json.dumps(_metadata(game, stacks), separators=(',', ':')).encode('utf-8')
+    map_offset = -(-(HEADER.size + len(metadata)) // ALIGNMENT) * ALIGNMENT
+    # Write beside the target and swap it in: a game loaded lazily from the
+    # old file keeps its mapping of the old contents
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, SAVE_FORMAT_VERSION, sys.byteorder == 'little',
+                            game.width, game.height, len(metadata), map_offset))
+        f.write(metadata)
+        f.write(bytes(map_offset - HEADER.size - len(metadata)))
+        for grid in grids:
+            f.write(grid)
+        for cells in (game.occupied_cells, game.seedling_cells):
+            f.write(array('i', [x for x, _ in cells]))
+            f.write(array('i', [y for _, y in cells]))
+    os.replace(temp_path, path)
+
+
+def _read_grids(buffer, offset: int, cells: int, swap: bool, copy: bool):
+    """Slice the map section into amount and countdown grids keyed by asset type.
+    Grids are memoryviews into buffer unless copy is set."""
+    grids = []
+    for typecode, count in (('i', len(AssetType)), ('h', len(SEEDLING_TYPES))):
+        size = cells * array(typecode).itemsize
+        for _ in range(count):
+            if copy:
+                grid = array(typecode)
+                grid.frombytes(buffer[offset:offset + size])
+                if swap:
+                    grid.byteswap()
+            else:
+                grid = memoryview(buffer)[offset:offset + size].cast(typecode)
+            grids.append(grid)
+            offset += size
+    amounts = dict(zip(AssetType, grids[:len(AssetType)]))
+    countdowns = dict(zip(SEEDLING_TYPES, grids[len(AssetType):]))
+    return amounts, countdowns, offset
+
+
+def load_game(path: str, storage: Optional[str] = None, lazy: bool = True) -> Game:
+    """Resume a game from a save file.
+
+    storage defaults to the storage mode the game was saved from. With
+    'arrays' and lazy=True the map grids are memory-mapped copy-on-write:
+    loading costs the same for any map size and the file is never written.
+    'objects' storage builds a Cell for every position, as a new game does.
+    """
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    magic, format_version, little_endian, width, height, metadata_length, map_offset = \
+        HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a game save file")
+    if format_version != SAVE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported save format version: {format_version}")
+    swap = bool(little_endian) != (sys.byteorder == 'little')
+    metadata = json.loads(bytes(buffer[HEADER.size:HEADER.size + metadata_length]))
+
+    rules = metadata['rules']
+    storage = storage or rules['map_storage']
+    config = dict(rules, map_width=width, map_height=height, map_storage=storage,
+                  initial_state='empty', controllers=[])
+    game = Game(config, seed=metadata['seed'])
+    rng_version, rng_internal, rng_gauss = metadata['rng']
+    game.rng.setstate((rng_version, tuple(rng_internal), rng_gauss))
+    game.day = metadata['day']
+    game.hour = metadata['hour']
+    game.state = metadata['state']
+    game.next_bot_id = metadata['next_bot_id']
+
+    # Map
+    cells = width * height
+    mapped = lazy and storage == 'arrays' and not swap
+    amounts, countdowns, offset = _read_grids(buffer, map_offset, cells, swap, copy=not mapped)
+    for name in ('occupied_cells', 'seedling_cells'):
+        coordinates = []
+        for _ in range(2):
+            column = array('i')
+            column.frombytes(buffer[offset:offset + metadata[name] * AMOUNT_BYTES])
+            if swap:
+                column.byteswap()
+            coordinates.append(column)
+            offset += metadata[name] * AMOUNT_BYTES
+        setattr(game, name, set(zip(*coordinates)))
+    if storage == 'arrays':
+        game.map.amounts = amounts
+        game.map.countdowns = countdowns
+    else:
+        stacks = {index: assets for index, assets in metadata['stacks']}
+        for x, y in game.occupied_cells:
+            index = y * width + x
+            if index in stacks:
+                game.map[y][x].assets = AssetStacks(Asset(AssetType[asset_type], amount, maturity_time)
+                                                    for asset_type, amount, maturity_time in stacks[index])
+            else:
+                game.map[y][x].assets = AssetStacks(_grid_assets(amounts, countdowns, index))
+
+    # Bots and controllers
+    for bot_id, controller_id, x, y, deck in metadata['bots']:
+        bot = Bot(game.positions.at(x, y), [_decode_card(card) for card in deck], controller_id, bot_id)
+        game.bots_by_id[bot_id] = bot
+        game.map[y][x].bots.add(bot)
+        game.bot_index.add(bot, x, y)
+    for controller_data in metadata['controllers']:
+        controller = Controller(controller_data['id'])
+        controller.resources = {ResourceType[name]: amount
+                                for name, amount in controller_data['resources'].items()}
+        controller.starting_position = Position(*controller_data['starting_position'])
+        controller.bots.extend(game.bots_by_id[bot_id] for bot_id in controller_data['bots'])
+        game.controllers.append(controller)
+    controllers = {controller.id: controller for controller in game.controllers}
+    game.victors = [controllers[controller_id] for controller_id in metadata['victors']
+                    if controller_id in controllers]
+
+    # Events keep their numbering; change tracking starts afresh, so the
+    # saved version is the oldest a delta can be computed from
+    game.event_log.next_seq = metadata['event_log']['next_seq']
+    game.event_log._events.extend(_decode_event(event) for event in metadata['event_log']['events'])
+    game.version = game.base_version = metadata['version']
+    if not mapped:
+        buffer.close()
+    return game
@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Turn phases timed by the engine and the API server
+PHASES = ('order_validation', 'bot_actions', 'maturation', 'victory_check', 'serialization')
+
+
+class _PhaseTimer:
+    """Context manager adding its wall time to one phase of a Metrics."""
+
+    __slots__ = ('_metrics', '_phase', '_start')
+
+    def __init__(self, metrics: 'Metrics', phase: str):
+        self._metrics = metrics
+        self._phase = phase
+
+    def __enter__(self) -> '_PhaseTimer':
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._metrics.observe(self._phase, time.perf_counter() - self._start)
+
+
+class _NullTimer:
+    """Stand-in returned while instrumentation is off."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullTimer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Per-phase call counts and cumulative seconds.
+
+    Timing is skipped entirely when `enabled` is False. Counters are shared
+    between worker threads, so updates take a lock.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = dict.fromkeys(PHASES, 0)
+        self.seconds: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+
+    def phase(self, name: str):
+        """Time a block: `with metrics.phase('maturation'): ...`"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _PhaseTimer(self, name)
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = dict.fromkeys(PHASES, 0)
+            self.seconds = dict.fromkeys(PHASES, 0.0)
+
+    def render_prometheus(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        """Counters, plus any extra gauges, in the Prometheus text format."""
+        with self._lock:
+            calls = dict(self.calls)
+            seconds = dict(self.seconds)
+        lines: List[str] = [
+            '# HELP spacefarm_phase_seconds_total Time spent in each turn phase.',
+            '# TYPE spacefarm_phase_seconds_total counter',
+        ]
+        lines += [f'spacefarm_phase_seconds_total{{phase="{name}"}} {value:.9f}'
+                  for name, value in seconds.items()]
+        lines += [
+            '# HELP spacefarm_phase_calls_total Number of times each turn phase ran.',
+            '# TYPE spacefarm_phase_calls_total counter',
+        ]
+        lines += [f'spacefarm_phase_calls_total{{phase="{name}"}} {value}'
+                  for name, value in calls.items()]
+        for name, value in (gauges or {}).items():
+            lines += [f'# TYPE spacefarm_{name} gauge', f'spacefarm_{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide metrics; set SPACEFARM_METRICS=0 to turn timing off
+metrics = Metrics(enabled=os.environ.get('SPACEFARM_METRICS', '1') != '0')
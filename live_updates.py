@@ -0,0 +1,91 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+
+class Subscriber:
+    """One client receiving pushed frames for a session.
+
+    Updates are not queued: a subscriber only remembers that the state
+    changed and the latest run progress. The writer loop (run) builds the
+    state frame when it gets to send it, so a slow client receives one
+    delta covering every turn it missed instead of a growing backlog, and
+    progress frames it had no time for are dropped.
+    """
+
+    def __init__(self, send: Callable[[dict], Awaitable[None]],
+                 build_state: Callable[['Subscriber'], Awaitable[Optional[dict]]],
+                 sparse: bool = False):
+        self.send = send
+        # Called with the subscriber; returns the state frame to send, if any
+        self.build_state = build_state
+        self.sparse = sparse
+        # The game and version the client holds, kept up to date by build_state
+        self.game = None
+        self.version: Optional[int] = None
+        self._dirty = True
+        self._progress: Optional[dict] = None
+        self._closed = False
+        self._wake = asyncio.Event()
+        self._wake.set()
+
+    def notify(self) -> None:
+        """The session's state changed."""
+        self._dirty = True
+        self._wake.set()
+
+    def notify_progress(self, progress: dict) -> None:
+        """A run made progress; replaces any progress not sent yet."""
+        self._progress = progress
+        self._wake.set()
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+
+    async def run(self) -> None:
+        """Send frames until closed. Errors from send are raised."""
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            if self._closed:
+                return
+            if self._progress is not None:
+                progress, self._progress = self._progress, None
+                await self.send({'type': 'progress', 'run': progress})
+            if self._dirty:
+                self._dirty = False
+                state = await self.build_state(self)
+                if state is not None:
+                    await self.send({'type': 'state', 'state': state})
+
+
+class Hub:
+    """Subscribers by session id. Use from the event loop thread only."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def subscribe(self, session_id: str, subscriber: Subscriber) -> None:
+        self._subscribers.setdefault(session_id, set()).add(subscriber)
+
+    def unsubscribe(self, session_id: str, subscriber: Subscriber) -> None:
+        subscribers = self._subscribers.get(session_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[session_id]
+
+    def publish(self, session_id: str) -> None:
+        """Tell the session's subscribers that its state changed."""
+        for subscriber in self._subscribers.get(session_id, ()):
+            subscriber.notify()
+
+    def publish_progress(self, session_id: str, progress: dict) -> None:
+        for subscriber in self._subscribers.get(session_id, ()):
+            subscriber.notify_progress(progress)
+
+    def has_subscribers(self, session_id: str) -> bool:
+        return session_id in self._subscribers
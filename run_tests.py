@@ -5,6 +5,15 @@ import sys
 from tests.test_game_objects import *
 from tests.test_game import *
 from tests.test_game_interface import *
+from tests.test_game_map import *
+from tests.test_game_events import *
+from tests.test_session_manager import *
+from tests.test_instrumentation import *
+from tests.test_simulate import *
+from tests.test_game_save import *
+from tests.test_live_updates import *
+from tests.test_wire_format import *
+from tests.test_api_server import *
 
 if __name__ == '__main__':
     # Create test suite
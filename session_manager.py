@@ -0,0 +1,229 @@
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, Optional
+from game import Game
+from game_save import load_game, save_game
+
+# Session list written by SessionManager.save_all, next to one save file per game
+MANIFEST_FILE = 'sessions.json'
+
+# Rough resident size of one map cell in each storage mode, used for the memory cap
+CELL_BYTES = {
+    'objects': 370,
+    'arrays': 40
+}
+BOT_BYTES = 600
+
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def estimate_game_size(game: Game) -> int:
+    """Approximate memory held by a game, in bytes."""
+    cells = game.width * game.height * CELL_BYTES.get(game.map_storage, CELL_BYTES['objects'])
+    bots = sum(len(controller.bots) for controller in game.controllers) * BOT_BYTES
+    return cells + bots
+
+
+class GameSession:
+    """One player's game, with the level it was started from.
+
+    `lock` orders requests against the game: the API server holds it while
+    a turn or state read runs in the worker pool. asyncio.Lock wakes waiters
+    in arrival order, so turns are applied in the order they were received.
+    """
+
+    def __init__(self, session_id: str, game: Game, level: str, now: float,
+                 lock: Optional[asyncio.Lock] = None):
+        self.id = session_id
+        self.game = game
+        self.level = level
+        self.created_at = now
+        self.last_access = now
+        self.size = estimate_game_size(game)
+        self.lock = lock if lock is not None else asyncio.Lock()
+
+
+class SessionManager:
+    """Hosts independent games keyed by session id.
+
+    Sessions are kept in least-recently-used order. Sessions idle for longer
+    than idle_timeout seconds are dropped, and the least recently used ones
+    are evicted whenever max_sessions or max_memory (estimated bytes) would
+    be exceeded.
+
+    Safe to call from several threads; building a new Game happens outside
+    the internal lock so slow level setups do not block other sessions.
+    """
+
+    def __init__(self, level_configs: Dict[str, dict], default_level: str,
+                 max_sessions: int = 500, idle_timeout: float = 3600,
+                 max_memory: int = 2 * 2**30,
+                 clock: Callable[[], float] = time.monotonic):
+        if default_level not in level_configs:
+            raise ValueError(f"Invalid level: {default_level}")
+        self.level_configs = level_configs
+        self.default_level = default_level
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_memory = max_memory
+        self.clock = clock
+        self._sessions: 'OrderedDict[str, GameSession]' = OrderedDict()
+        self.memory = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __iter__(self) -> Iterator[GameSession]:
+        with self._lock:
+            return iter(list(self._sessions.values()))
+
+    def get(self, session_id: str) -> Optional[GameSession]:
+        """Return a live session and mark it as used, or None."""
+        with self._lock:
+            self.evict_idle()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_access = self.clock()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def get_or_create(self, session_id: Optional[str] = None) -> GameSession:
+        """Return the session with this id, starting a new game if there is none.
+        A new id is generated when session_id is None."""
+        if session_id is not None:
+            session = self.get(session_id)
+            if session is not None:
+                return session
+        return self.create(session_id)
+
+    def create(self, session_id: Optional[str] = None, level: Optional[str] = None) -> GameSession:
+        """Start a new game, replacing any session with the same id."""
+        if session_id is None:
+            session_id = uuid.uuid4().hex
+        elif not SESSION_ID_PATTERN.match(session_id):
+            raise ValueError("Invalid session id")
+        if level is None:
+            level = self.default_level
+        if level not in self.level_configs:
+            raise ValueError(f"Invalid level: {level}")
+
+        game = Game(self.level_configs[level])
+        with self._lock:
+            # A replaced session hands its lock on, so requests already
+            # queued for this id stay ordered with the new game
+            previous = self._sessions.get(session_id)
+            if previous is not None:
+                game.succeed(previous.game)
+            self.remove(session_id)
+            session = GameSession(session_id, game, level, self.clock(),
+                                  previous.lock if previous is not None else None)
+            self._sessions[session_id] = session
+            self.memory += session.size
+            self.evict_idle()
+            self._enforce_limits(keep=session_id)
+            return session
+
+    def restart(self, session_id: str, level: Optional[str] = None) -> GameSession:
+        """Start a fresh game for a session, on its current level by default.
+
+        An existing session is kept and only its game replaced, so requests
+        already holding the session (and queued on its lock) see the new
+        game. The game's caches are keyed by the game and start out empty.
+        """
+        with self._lock:
+            current = self._sessions.get(session_id)
+        if current is None:
+            return self.create(session_id, level)
+        if level is None:
+            level = current.level
+        if level not in self.level_configs:
+            raise ValueError(f"Invalid level: {level}")
+
+        game = Game(self.level_configs[level])
+        with self._lock:
+            if self._sessions.get(session_id) is not current:
+                # Evicted or replaced while the game was being built
+                return self.create(session_id, level)
+            game.succeed(current.game)
+            self.memory -= current.size
+            current.game = game
+            current.level = level
+            current.size = estimate_game_size(game)
+            current.last_access = self.clock()
+            self.memory += current.size
+            self._sessions.move_to_end(session_id)
+            self._enforce_limits(keep=session_id)
+            return current
+
+    def remove(self, session_id: str) -> None:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self.memory -= session.size
+
+    def evict_idle(self) -> None:
+        """Drop sessions not used within idle_timeout."""
+        with self._lock:
+            cutoff = self.clock() - self.idle_timeout
+            while self._sessions:
+                session_id, session = next(iter(self._sessions.items()))
+                if session.last_access >= cutoff:
+                    break
+                self.remove(session_id)
+
+    def _enforce_limits(self, keep: str) -> None:
+        """Evict least recently used sessions until within the limits."""
+        while len(self._sessions) > 1 and (
+                len(self._sessions) > self.max_sessions or self.memory > self.max_memory):
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                self._sessions.move_to_end(session_id)
+                continue
+            self.remove(session_id)
+
+    def save_all(self, directory: str) -> None:
+        """Write every session's game to directory, for load_all to resume."""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            save_game(session.game, os.path.join(directory, f"{session.id}.sfsave"))
+        # Least recently used first, so loading restores the eviction order
+        with open(os.path.join(directory, MANIFEST_FILE), 'w') as f:
+            json.dump({session.id: session.level for session in sessions}, f)
+
+    def load_all(self, directory: str) -> int:
+        """Resume the sessions saved by save_all. Games are loaded lazily,
+        see load_game. Returns the number of sessions loaded."""
+        manifest_path = os.path.join(directory, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return 0
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        loaded = 0
+        for session_id, level in manifest.items():
+            path = os.path.join(directory, f"{session_id}.sfsave")
+            if not SESSION_ID_PATTERN.match(session_id) or not os.path.exists(path):
+                continue
+            game = load_game(path)
+            with self._lock:
+                previous = self._sessions.get(session_id)
+                if previous is not None:
+                    game.succeed(previous.game)
+                self.remove(session_id)
+                session = GameSession(session_id, game, level, self.clock())
+                self._sessions[session_id] = session
+                self.memory += session.size
+                self._enforce_limits(keep=session_id)
+            loaded += 1
+        return loaded
@@ -0,0 +1,310 @@
+"""Headless Monte Carlo runner: play many full games with a scripted policy.
+
+    python simulate.py rare_config.json --policy sleep --runs 10000 --seed 1
+
+A policy is a function (game, controller_index) -> list of orders for one
+turn, in the same form Game.process_turn takes. Built-in policies are
+listed in POLICIES; any other "module:function" name is imported.
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from game import Game
+from game_enums import (
+    ASSET_TO_RESOURCE, ActionType, ControllerActionType, Direction, ResourceType
+)
+from instrumentation import metrics
+
+Policy = Callable[[Game, int], List[Dict]]
+
+
+def sleep_policy(game: Game, controller_index: int, hours: int = 8) -> List[Dict]:
+    """Let the bots work up to `hours` at a time, as far as energy allows.
+    One energy is always kept back: a controller at 0 is eliminated."""
+    controller = game.controllers[controller_index]
+    energy = min(hours, game.hours_per_day - game.hour,
+                 controller.resources[ResourceType.ENERGY] - 1)
+    if energy <= 0:
+        return []
+    return [{
+        'controller_id': controller_index,
+        'action_type': ControllerActionType.TAKE_BOT_ACTIONS,
+        'parameters': {'energy_points': energy}
+    }]
+
+
+def all_in_policy(game: Game, controller_index: int) -> List[Dict]:
+    """Spend every remaining hour of the day on bot actions."""
+    return sleep_policy(game, controller_index, hours=game.hours_per_day)
+
+
+def aim_policy(game: Game, controller_index: int) -> List[Dict]:
+    """Send the bots to the largest stack of an asset the controller still
+    needs for victory, then work one action per turn, so victory is checked
+    after every action.
+
+    A bot whose deck has RANDOM moves gets them replaced by one fixed step
+    towards the target on each axis, plus a HARVEST card for the target's
+    asset if the deck has none. It walks there harvesting on the way with
+    the cards it kept. Decks without RANDOM moves are left alone."""
+    controller = game.controllers[controller_index]
+    needed = {resource_type for resource_type, amount in game.victory_conditions.items()
+              if controller.resources[resource_type] < amount}
+    target = None
+    for x, y in game.occupied_cells:
+        for asset in game.map[y][x].assets:
+            if (asset.maturity_time is None and ASSET_TO_RESOURCE.get(asset.type) in needed
+                    and (target is None or asset.amount > target[2].amount)):
+                target = (x, y, asset)
+
+    orders = []
+    hours_left = game.hours_per_day - game.hour
+    biomass = controller.resources[ResourceType.BIOMASS]
+    for bot in controller.bots:
+        random_moves = [index for index, card in enumerate(bot.deck)
+                        if card.action_type == ActionType.MOVE and card.parameter == Direction.RANDOM]
+        if target is None or not random_moves:
+            continue
+        x, y, asset = target
+        cards = []
+        if x != bot.position.x:
+            cards.append({'action_type': 'MOVE', 'parameter': 'EAST' if x > bot.position.x else 'WEST'})
+        if y != bot.position.y:
+            cards.append({'action_type': 'MOVE', 'parameter': 'SOUTH' if y > bot.position.y else 'NORTH'})
+        if not any(card.action_type == ActionType.HARVEST and card.parameter == asset.type
+                   for card in bot.deck):
+            cards.append({'action_type': 'HARVEST', 'parameter': asset.type.name})
+        cost = game.costs['modify_deck'] * max(len(cards), 1)
+        # Two deck orders and the bot action below, each an hour
+        if not cards or cost > biomass or hours_left < 3:
+            continue
+        biomass -= cost
+        hours_left -= 2
+        orders.append({'controller_id': controller_index, 'action_type': ControllerActionType.MODIFY_DECK,
+                       'parameters': {'bot_id': bot.id, 'removed_ids': random_moves}})
+        orders.append({'controller_id': controller_index, 'action_type': ControllerActionType.MODIFY_DECK,
+                       'parameters': {'bot_id': bot.id, 'cards': cards}})
+    if hours_left < 1:
+        return orders
+    return orders + sleep_policy(game, controller_index, hours=1)
+
+
+POLICIES: Dict[str, Policy] = {
+    'sleep': sleep_policy,
+    'all_in': all_in_policy,
+    'aim': aim_policy,
+}
+
+
+def load_policy(name: str) -> Policy:
+    """Look up a built-in policy, or import one given as "module:function"."""
+    if name in POLICIES:
+        return POLICIES[name]
+    module_name, _, function_name = name.partition(':')
+    if not function_name:
+        raise ValueError(f"Unknown policy: {name}")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+@dataclass
+class GameResult:
+    """Outcome of one simulated game, seen from the first controller."""
+    seed: int
+    won: bool
+    eliminated: bool
+    # The policy gave no orders, so time could not advance
+    stalled: bool
+    days: int
+    turns: int
+    # Resources of the first controller at the end of each day, by resource name
+    resource_curve: List[Dict[str, int]] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def run_game(config: dict, policy: Policy, seed: int, max_days: int = 365) -> GameResult:
+    """Play one game to victory, elimination or max_days."""
+    game = Game(config, seed=seed)
+    player = game.controllers[0]
+    curve = []
+    turns = 0
+    error = None
+    stalled = False
+    while game.state == 'active' and player in game.controllers and game.day < max_days:
+        day = game.day
+        orders = []
+        for index in range(len(game.controllers)):
+            orders.extend(policy(game, index))
+        if not orders:
+            stalled = True
+            break
+        try:
+            game.process_turn(orders)
+        except ValueError as e:
+            error = str(e)
+            break
+        turns += 1
+        if game.day != day:
+            curve.append({resource.name: amount for resource, amount in player.resources.items()})
+    return GameResult(
+        seed=seed,
+        won=player in game.victors,
+        eliminated=player not in game.controllers,
+        stalled=stalled,
+        days=game.day,
+        turns=turns,
+        resource_curve=curve,
+        error=error
+    )
+
+
+# Per-worker state, set once by _init_worker so each task only ships a seed
+_worker_config: Optional[dict] = None
+_worker_policy: Optional[Policy] = None
+_worker_max_days = 365
+
+
+def _init_worker(config_path: str, policy_name: str, max_days: int) -> None:
+    global _worker_config, _worker_policy, _worker_max_days
+    logging.disable(logging.CRITICAL)
+    metrics.enabled = False
+    with open(config_path, 'r') as f:
+        _worker_config = json.load(f)
+    _worker_policy = load_policy(policy_name)
+    _worker_max_days = max_days
+
+
+def _run_seed(seed: int) -> GameResult:
+    return run_game(_worker_config, _worker_policy, seed, _worker_max_days)
+
+
+@dataclass
+class SimulationReport:
+    results: List[GameResult]
+    elapsed: float
+
+    @property
+    def runs(self) -> int:
+        return len(self.results)
+
+    @property
+    def wins(self) -> int:
+        return sum(result.won for result in self.results)
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.runs if self.runs else 0.0
+
+    @property
+    def games_per_second(self) -> float:
+        return self.runs / self.elapsed if self.elapsed else float('inf')
+
+    def days_to_victory(self) -> List[int]:
+        return sorted(result.days for result in self.results if result.won)
+
+    def mean_resource_curve(self) -> List[Dict[str, float]]:
+        """Mean resources at the end of each day, over the games still running that day."""
+        curve = []
+        day = 0
+        while True:
+            samples = [result.resource_curve[day] for result in self.results
+                       if day < len(result.resource_curve)]
+            if not samples:
+                return curve
+            curve.append({name: statistics.fmean(sample[name] for sample in samples)
+                          for name in samples[0]})
+            day += 1
+
+    def to_dict(self) -> dict:
+        days = self.days_to_victory()
+        return {
+            'runs': self.runs,
+            'wins': self.wins,
+            'win_rate': self.win_rate,
+            'eliminated': sum(result.eliminated for result in self.results),
+            'stalled': sum(result.stalled for result in self.results),
+            'errors': sum(result.error is not None for result in self.results),
+            'days_to_victory': {
+                'min': days[0] if days else None,
+                'median': statistics.median(days) if days else None,
+                'p90': days[int(len(days) * 0.9)] if days else None,
+                'max': days[-1] if days else None,
+                'histogram': {str(day): days.count(day) for day in sorted(set(days))}
+            },
+            'resource_curve': self.mean_resource_curve(),
+            'elapsed_seconds': self.elapsed,
+            'games_per_second': self.games_per_second
+        }
+
+    def format(self) -> str:
+        data = self.to_dict()
+        days = data['days_to_victory']
+        lines = [
+            f"runs: {self.runs}  wins: {self.wins} ({self.win_rate:.1%})  "
+            f"eliminated: {data['eliminated']}  stalled: {data['stalled']}  errors: {data['errors']}",
+            f"days to victory: min {days['min']}  median {days['median']}  "
+            f"p90 {days['p90']}  max {days['max']}",
+        ]
+        for day, count in days['histogram'].items():
+            lines.append(f"  day {day:>4}: {count}")
+        lines.append("mean resources at end of day:")
+        for day, resources in enumerate(data['resource_curve']):
+            values = '  '.join(f"{name} {value:7.2f}" for name, value in resources.items())
+            lines.append(f"  day {day + 1:>4}: {values}")
+        lines.append(f"{self.elapsed:.2f} s, {self.games_per_second:.1f} games/s")
+        return '\n'.join(lines)
+
+
+def simulate(config_path: str, policy_name: str = 'sleep', runs: int = 1000, seed: int = 0,
+             workers: Optional[int] = None, max_days: int = 365) -> SimulationReport:
+    """Play `runs` games with seeds seed, seed + 1, ... across a process pool.
+    workers=1 runs everything in this process."""
+    seeds = range(seed, seed + runs)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    if workers == 1:
+        logging_disabled = logging.root.manager.disable
+        metrics_enabled = metrics.enabled
+        try:
+            _init_worker(config_path, policy_name, max_days)
+            results = [_run_seed(s) for s in seeds]
+        finally:
+            logging.disable(logging_disabled)
+            metrics.enabled = metrics_enabled
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(config_path, policy_name, max_days)) as pool:
+            chunksize = max(1, runs // (workers * 8))
+            results = list(pool.map(_run_seed, seeds, chunksize=chunksize))
+    return SimulationReport(results, time.perf_counter() - start)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Play many headless games and report outcomes.")
+    parser.add_argument('config', help="level config file, e.g. rare_config.json")
+    parser.add_argument('--policy', default='sleep',
+                        help=f"one of {', '.join(POLICIES)} or module:function (default: sleep)")
+    parser.add_argument('--runs', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game")
+    parser.add_argument('--workers', type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument('--max-days', type=int, default=365)
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = simulate(args.config, args.policy, args.runs, args.seed, args.workers, args.max_days)
+    if args.json:
+        json.dump(report.to_dict(), sys.stdout, indent=2)
+        print()
+    else:
+        print(report.format())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import unittest
+import wire_format
+
+try:
+    from fastapi import Response
+    from fastapi.testclient import TestClient
+    from starlette.websockets import WebSocketDisconnect
+except ImportError:
+    TestClient = None
+
+if TestClient is not None:
+    import api_server
+
+def bot_actions(energy, action_type='TAKE_BOT_ACTIONS'):
+    return {'orders': [{'controller_id': 0, 'action_type': action_type,
+                        'parameters': {'energy_points': energy}}]}
+
+@unittest.skipUnless(TestClient is not None, "fastapi is not installed")
+class TestApiServer(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(api_server.app)
+        response = self.client.post('/game/restart')
+        self.assertEqual(response.status_code, 200)
+        self.session_id = response.headers['X-Session-Id']
+        self.headers = {'X-Session-Id': self.session_id}
+
+    def get(self, path, **headers):
+        return self.client.get(path, headers=dict(self.headers, **headers))
+
+    def post(self, path, body=None):
+        return self.client.post(path, headers=self.headers, json=body)
+
+    def test_sessions_are_independent(self):
+        other = {'X-Session-Id': self.client.post('/game/restart').headers['X-Session-Id']}
+        self.assertNotEqual(other['X-Session-Id'], self.session_id)
+        before = self.client.get('/game/state', headers=other).json()['version']
+        self.assertEqual(self.post('/game/turn', bot_actions(1)).status_code, 200)
+        self.assertEqual(self.client.get('/game/state', headers=other).json()['version'], before)
+        self.assertEqual(self.client.get('/game/state', headers={'X-Session-Id': 'bad id!'}).status_code, 400)
+        self.assertEqual(self.post('/game/restart?level=nonexistent').status_code, 400)
+
+    def test_restart_gives_full_state_for_old_versions(self):
+        state = self.post('/game/turn', bot_actions(1)).json()
+        self.post('/game/restart')
+        self.assertNotIn('delta', self.get(f"/game/state?since={state['version']}").json())
+
+    def test_bad_turn_query_leaves_game_alone(self):
+        version = self.get('/game/state').json()['version']
+        for query in ('format=compact', 'since=-1'):
+            self.assertEqual(self.post(f'/game/turn?{query}', bot_actions(1)).status_code, 400)
+        self.assertEqual(self.post('/game/turn', bot_actions(1, 'FLY')).status_code, 400)
+        self.assertEqual(self.get('/game/state').json()['version'], version)
+
+    def test_queued_requests_see_restarted_game(self):
+        self.post('/game/turn', bot_actions(4))
+        session = api_server.sessions.get(self.session_id)
+        response = Response()
+
+        async def tile_behind_restart():
+            # The tile request reaches the lock first and waits while the
+            # game is replaced under it
+            await session.lock.acquire()
+            tile = asyncio.ensure_future(api_server.get_game_tile(
+                0, 0, response, format='dense', if_none_match=None, session=session))
+            await asyncio.sleep(0)
+            restarted = api_server.sessions.restart(self.session_id)
+            session.lock.release()
+            return await tile, restarted.game
+
+        tile, game = asyncio.run(tile_behind_restart())
+        interface = api_server.GameInterface()
+        interface.game = game
+        self.assertEqual(tile, interface.get_tile_state(0, 0))
+        served = self.get('/game/tiles/0/0')
+        self.assertEqual(served.json(), tile)
+        self.assertEqual(served.headers['ETag'], response.headers['ETag'])
+
+    def test_turn_delta(self):
+        version = self.get('/game/state').json()['version']
+        delta = self.post(f'/game/turn?since={version}', bot_actions(1)).json()
+        self.assertTrue(delta['delta'])
+        self.assertGreater(delta['version'], version)
+
+    def test_events(self):
+        self.post('/game/turn', bot_actions(2))
+        page = self.get('/game/events?limit=1').json()
+        self.assertEqual(len(page['events']), 1)
+        rest = self.get(f"/game/events?since={page['events'][0]['seq']}").json()
+        self.assertEqual(rest['next_seq'], page['next_seq'])
+        self.assertEqual(self.get('/game/events?limit=0').status_code, 400)
+
+    def test_metrics(self):
+        self.post('/game/turn', bot_actions(1))
+        text = self.client.get('/metrics').text
+        self.assertIn('spacefarm_sessions ', text)
+        self.assertIn('spacefarm_live_subscribers ', text)
+
+    def test_preview_leaves_game_alone(self):
+        state = self.get('/game/state').json()
+        preview = self.post('/game/preview', bot_actions(1)).json()
+        self.assertTrue(preview['delta'])
+        self.assertEqual(preview['since_version'], state['version'])
+        self.assertEqual(self.get('/game/state').json(), state)
+
+    def test_viewport_and_tiles(self):
+        viewport = self.get('/game/viewport?x=0&y=0&width=2&height=3').json()
+        self.assertEqual(len(viewport['map']), 3)
+        self.assertEqual(len(viewport['map'][0]), 2)
+
+        tile = self.get('/game/tiles/0/0')
+        self.assertEqual(tile.status_code, 200)
+        self.assertEqual(self.get('/game/tiles/0/0', **{'If-None-Match': tile.headers['ETag']}).status_code, 304)
+        self.assertEqual(self.get('/game/tiles/9/9').status_code, 400)
+        overview = self.get('/game/overview')
+        self.assertEqual(self.get('/game/overview', **{'If-None-Match': overview.headers['ETag']}).status_code,
+                         304)
+
+    def test_state_etag(self):
+        response = self.get('/game/state')
+        etag = response.headers['ETag']
+        self.assertEqual(response.headers['X-Session-Id'], self.session_id)
+        cached = self.get('/game/state', **{'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+        self.post('/game/turn', bot_actions(1))
+        self.assertEqual(self.get('/game/state', **{'If-None-Match': etag}).status_code, 200)
+
+    def test_state_negotiation(self):
+        state = self.get('/game/state').json()
+        binary = self.get('/game/state', Accept=wire_format.MEDIA_TYPE)
+        self.assertEqual(binary.headers['Content-Type'], wire_format.MEDIA_TYPE)
+        self.assertEqual(wire_format.decode_state(binary.content), state)
+
+        compressed = self.get('/game/state', **{'Accept-Encoding': 'gzip'})
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(compressed.json(), state)
+        self.assertNotEqual(compressed.headers['ETag'], binary.headers['ETag'])
+        self.assertIn('Accept-Encoding', compressed.headers['Vary'])
+
+    def test_websocket(self):
+        with self.client.websocket_connect(f'/game/ws?session_id={self.session_id}') as websocket:
+            frame = websocket.receive_json()
+            self.assertEqual(frame['type'], 'state')
+            version = frame['state']['version']
+            self.post('/game/turn', bot_actions(1))
+            frame = websocket.receive_json()
+            self.assertEqual(frame['type'], 'state')
+            self.assertTrue(frame['state']['delta'])
+            self.assertEqual(frame['state']['since_version'], version)
+            self.assertEqual(frame['state']['version'], self.get('/game/state').json()['version'])
+
+    def test_websocket_unknown_session(self):
+        with self.assertRaises(WebSocketDisconnect):
+            with self.client.websocket_connect('/game/ws?session_id=nobody') as websocket:
+                websocket.receive_json()
+
+if __name__ == '__main__':
+    unittest.main()
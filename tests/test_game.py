@@ -1,9 +1,10 @@
+import random
 import unittest
 from game import Game
 from game_objects import Position, Card, Bot, Asset
 from game_enums import (
     AssetType, ActionType, Direction, ResourceType,
-    ControllerActionType
+    ControllerActionType, SEEDLING_TO_ASSET
 )
 
 class TestGame(unittest.TestCase):
@@ -71,20 +72,16 @@ class TestGame(unittest.TestCase):
         controller = self.game.controllers[0]
         
         # Clear all existing bots first
-        for y in range(self.game.height):
-            for x in range(self.game.width):
-                self.game.map[y][x].bots.clear()
-        controller.bots.clear()
+        for bot in list(controller.bots):
+            self.game.remove_bot(bot)
         
         # Create and position bot1
         bot1 = Bot(Position(2, 2), [Card(ActionType.MOVE, Direction.NORTH)], controller.id)
-        controller.bots.append(bot1)
-        self.game.map[2][2].bots.add(bot1)
+        self.game.add_bot(controller, bot1)
         
         # Create and position bot2
         bot2 = Bot(Position(2, 1), [Card(ActionType.MOVE, Direction.SOUTH)], controller.id)
-        controller.bots.append(bot2)
-        self.game.map[1][2].bots.add(bot2)
+        self.game.add_bot(controller, bot2)
         
         print(f"\nLog (pre): \n{self.game.event_log}")
         # Execute move to cause collision
@@ -96,6 +93,101 @@ class TestGame(unittest.TestCase):
         self.assertEqual(len(controller.bots), 0)
         self.assertEqual(len(self.game.map[2][1].bots), 0)
 
+    def test_bot_ids_are_stable(self):
+        controller = self.game.controllers[0]
+        first = controller.bots[0]
+        self.assertEqual(first.id, 0)
+        self.assertIs(self.game.get_bot(0), first)
+
+        controller.resources[ResourceType.MINERAL] = 20
+        self.game.create_bot(controller, Position(0, 0), [])
+        second = self.game.get_bot(1)
+        self.assertEqual(second.position, Position(0, 0))
+
+        self.game.destroy_bot(first)
+        self.assertIsNone(self.game.get_bot(0))
+        self.assertIs(self.game.get_bot(1), second)
+        self.assertEqual(list(controller.bots), [second])
+        self.assertFalse(self.game.map[2][2].bots)
+
+    def test_modify_deck_addresses_bot_by_id(self):
+        controller = self.game.controllers[0]
+        controller.resources[ResourceType.MINERAL] = 20
+        controller.resources[ResourceType.BIOMASS] = 20
+        self.game.create_bot(controller, Position(0, 0), [])
+        self.game.destroy_bot(self.game.get_bot(0))
+
+        self.game.process_controller_action(controller, ControllerActionType.MODIFY_DECK, {
+            'bot_id': 1,
+            'cards': [{'action_type': 'HARVEST', 'parameter': 'COAL'}]
+        })
+        self.assertEqual(list(self.game.get_bot(1).deck), [Card(ActionType.HARVEST, AssetType.COAL)])
+
+        with self.assertRaises(ValueError):
+            self.game.process_controller_action(controller, ControllerActionType.MODIFY_DECK, {
+                'bot_id': 0,
+                'cards': [{'action_type': 'HARVEST', 'parameter': 'COAL'}]
+            })
+
+    def test_mass_collision(self):
+        """Bots moving into one occupied cell destroy each other and nothing else."""
+        config = dict(self.config, map_width=30, map_height=30)
+        config['controllers'] = [
+            {
+                'resources': {'MINERAL': 0, 'BIOMASS': 0, 'ENERGY': 10},
+                'bots': [{'x': x, 'y': y, 'deck': [{'type': 'MOVE', 'parameter': 'EAST'}]}
+                         for y in range(30) for x in range(29)]
+            }
+        ]
+        game = Game(config)
+        controller = game.controllers[0]
+        self.assertEqual(len(controller.bots), 870)
+
+        # Every bot in an even column below 28 runs into its eastern neighbour
+        for bot in [b for b in controller.bots if b.position.x < 28 and b.position.x % 2 == 0]:
+            game.execute_move(bot, Direction.EAST)
+
+        self.assertEqual(len(controller.bots), 30)
+        self.assertTrue(all(bot.position.x == 28 for bot in controller.bots))
+
+        survivors = {bot.id for bot in controller.bots}
+        self.assertEqual(set(game.bots_by_id), survivors)
+        for bot in controller.bots:
+            self.assertIn(bot, game.map[bot.position.y][bot.position.x].bots)
+        occupied = sum(len(cell.bots) for row in game.map for cell in row)
+        self.assertEqual(occupied, len(survivors))
+        self.assertEqual(set(game.bot_index), {(28, y) for y in range(30)})
+        for x, y in game.bot_index:
+            self.assertEqual(game.bot_index.bots_at(x, y), game.map[y][x].bots)
+
+    def test_collision_with_stacked_bots(self):
+        """Moving into a cell holding several bots destroys all of them."""
+        controller = self.game.controllers[0]
+        stacked = [self.game.add_bot(controller, Bot(Position(3, 2), [], controller.id))
+                   for _ in range(3)]
+        mover = self.game.controllers[0].bots[0]
+        self.game.execute_move(mover, Direction.EAST)
+        self.assertFalse(self.game.bot_index.bots_at(3, 2))
+        self.assertNotIn((3, 2), self.game.bot_index)
+        for bot in stacked + [mover]:
+            self.assertIsNone(self.game.get_bot(bot.id))
+
+    def test_bots_within(self):
+        config = dict(self.config, map_width=20, map_height=20, initial_state='empty')
+        config['controllers'] = [{
+            'resources': {'MINERAL': 0, 'BIOMASS': 0, 'ENERGY': 10},
+            'bots': [{'x': x, 'y': y, 'deck': []} for y in range(0, 20, 2) for x in range(0, 20, 2)]
+        }]
+        game = Game(config)
+        center = Position(9, 9)
+        for radius in (0, 1, 3, 8, 40):
+            expected = sorted(
+                (bot for bot in game.bots_by_id.values()
+                 if abs(bot.position.x - 9) + abs(bot.position.y - 9) <= radius),
+                key=lambda bot: (abs(bot.position.x - 9) + abs(bot.position.y - 9), bot.id))
+            self.assertEqual(game.bots_within(center, radius), expected)
+        self.assertEqual(len(game.bots_within(center, 40)), 100)
+
     def test_resource_harvesting(self):
         controller = self.game.controllers[0]
         bot = controller.bots[0]
@@ -119,7 +211,7 @@ class TestGame(unittest.TestCase):
         # Place a seedling
         cell = self.game.map[2][2]
         seedling = Asset(AssetType.ORE_SEEDLING, 1, maturity_time=1)
-        cell.assets.append(seedling)
+        self.game.place_asset(Position(2, 2), seedling)
 
         # Process one turn
         self.game.process_turn()
@@ -132,6 +224,164 @@ class TestGame(unittest.TestCase):
         self.assertGreaterEqual(matured_asset.amount, 1)
         self.assertLessEqual(matured_asset.amount, 5)
 
+    def test_planted_seedling_matures(self):
+        bot = self.game.controllers[0].bots[0]
+        self.game.execute_plant(bot, AssetType.PLANT)
+        self.assertIn((2, 2), self.game.seedling_cells)
+
+        for _ in range(self.config['seedling_maturity_time']):
+            self.game.mature_seedlings()
+
+        cell = self.game.map[2][2]
+        self.assertEqual([(a.type, a.amount, a.maturity_time) for a in cell.assets],
+                         [(AssetType.PLANT, 1, None)])
+        self.assertNotIn((2, 2), self.game.seedling_cells)
+
+    def test_maturation_matches_full_scan(self):
+        """Seedling registry must give the same results as scanning every cell."""
+        def scan(game):
+            # Reference implementation: the original whole-map scan
+            for row in game.map:
+                for cell in row:
+                    matured = {}
+                    for asset in cell.assets[:]:
+                        if asset.maturity_time is not None:
+                            asset.maturity_time -= 1
+                            if asset.maturity_time <= 0:
+                                cell.assets.remove(asset)
+                                mature_type = SEEDLING_TO_ASSET[asset.type]
+                                matured[mature_type] = matured.get(mature_type, 0) + asset.amount
+                    for mature_type, amount in matured.items():
+                        existing = next((a for a in cell.assets
+                                         if a.type == mature_type and a.maturity_time is None), None)
+                        if existing:
+                            existing.amount += amount
+                        else:
+                            cell.assets.append(Asset(mature_type, amount))
+
+        def contents(game):
+            return [[[(a.type, a.amount, a.maturity_time) for a in cell.assets]
+                     for cell in row] for row in game.map]
+
+        for seed in range(25):
+            rng = random.Random(seed)
+            config = dict(self.config, initial_state=[
+                {"type": rng.choice(list(AssetType)).name,
+                 "amount": rng.randint(1, 5),
+                 "maturity_time": rng.randint(1, 4),
+                 "x": rng.randrange(5), "y": rng.randrange(5)}
+                for _ in range(rng.randint(0, 30))
+            ])
+            for asset_data in config['initial_state']:
+                if AssetType[asset_data['type']] not in SEEDLING_TO_ASSET:
+                    del asset_data['maturity_time']
+            game, reference = Game(config), Game(config)
+
+            for _ in range(6):
+                game.mature_seedlings()
+                scan(reference)
+                self.assertEqual(contents(game), contents(reference))
+
+    def run_config(self):
+        deck = [
+            {"type": "MOVE", "parameter": "RANDOM"},
+            {"type": "PLANT", "parameter": "PLANT"},
+            {"type": "HARVEST", "parameter": "PLANT"},
+            {"type": "HARVEST", "parameter": "ORE"}
+        ]
+        config = dict(self.config, map_width=10, map_height=10, hours_per_day=24,
+                      initial_state="uniform",
+                      asset_distribution={"ORE": 30, "PLANT": 30, "COAL": 20},
+                      victory_conditions={"MINERAL": 10000})
+        config["controllers"] = [
+            {
+                "resources": {"MINERAL": 0, "BIOMASS": 0, "ENERGY": 300},
+                "bots": [{"x": x, "y": y, "deck": deck[x % 4:] + deck[:x % 4]}
+                         for x in range(0, 10, 3) for y in range(0, 10, 4)]
+            }
+        ]
+        return config
+
+    def test_fast_forward_matches_hourly_play(self):
+        reference = Game(self.run_config(), seed=8)
+        controller = reference.controllers[0]
+        for _ in range(100):
+            reference.process_bot_actions(controller, 1)
+            reference.advance_time(1)
+        game = Game(self.run_config(), seed=8)
+        summary = game.fast_forward(game.controllers[0], 100)
+        self.assertEqual(summary['stopped'], 'completed')
+        self.assertEqual(summary['hours'], 100)
+        self.assertEqual(summary['to'], {'day': 4, 'hour': 4})
+        self.assertEqual(summary['resources']['ENERGY'], -100)
+        self.assertEqual((game.day, game.hour), (reference.day, reference.hour))
+        self.assertEqual([[c.assets for c in row] for row in game.map],
+                         [[c.assets for c in row] for row in reference.map])
+        self.assertEqual([(b.position, b.deck) for b in game.controllers[0].bots],
+                         [(b.position, b.deck) for b in controller.bots])
+        self.assertEqual(game.controllers[0].resources, controller.resources)
+
+    def test_fast_forward_stops_early(self):
+        game = Game(self.run_config(), seed=2)
+        controller = game.controllers[0]
+        summary = game.fast_forward(controller, 1000, reserve_energy=50)
+        self.assertEqual(summary['stopped'], 'out_of_energy')
+        self.assertEqual(summary['hours'], 250)
+        self.assertEqual(controller.resources[ResourceType.ENERGY], 50)
+
+        game = Game(dict(self.run_config(), victory_conditions={"ENERGY": 200}), seed=2)
+        summary = game.fast_forward(game.controllers[0], 1000)
+        self.assertEqual(summary['stopped'], 'victory')
+        self.assertEqual(summary['to'], {'day': 1, 'hour': 0})
+        self.assertEqual(game.victors, [game.controllers[0]])
+
+    def test_fast_forward_progress(self):
+        game = Game(self.run_config(), seed=4)
+        progress = []
+        game.on_run_progress = progress.append
+        summary = game.fast_forward(game.controllers[0], 80)
+        self.assertEqual([report['to'] for report in progress],
+                         [{'day': day, 'hour': 0} for day in (1, 2, 3)])
+        self.assertEqual([report['hours'] for report in progress], [24, 48, 72])
+        self.assertTrue(all(report['stopped'] is None for report in progress))
+        self.assertEqual(summary['stopped'], 'completed')
+        self.assertIsNone(game.fork().on_run_progress)
+
+    def test_run_order(self):
+        game = Game(self.run_config(), seed=5)
+        game.process_turn([{
+            'controller_id': 0,
+            'action_type': ControllerActionType.RUN,
+            'parameters': {'hours': 30}
+        }])
+        self.assertEqual(game.last_run['hours'], 30)
+        self.assertEqual((game.day, game.hour), (1, 6))
+        for parameters in ({}, {'hours': 0}, {'hours': '5'}, {'hours': 5, 'reserve_energy': -1}):
+            with self.assertRaises(ValueError):
+                game.process_turn([{
+                    'controller_id': 0,
+                    'action_type': ControllerActionType.RUN,
+                    'parameters': parameters
+                }])
+
+    def test_seeded_games_are_reproducible(self):
+        config = dict(self.config, initial_state="uniform",
+                      asset_distribution={"ORE": 8, "PLANT": 8, "COAL_SEEDLING": 4})
+        config["controllers"][0]["bots"][0]["deck"] = [{"type": "MOVE", "parameter": "RANDOM"}]
+
+        def run(game):
+            game.process_bot_actions(game.controllers[0], 5)
+            return ([[c.assets for c in row] for row in game.map],
+                    [b.position for b in game.controllers[0].bots])
+
+        first = run(Game(config, seed=3))
+        random.seed(99)  # the global generator has no effect
+        self.assertEqual(run(Game(config, seed=3)), first)
+        self.assertEqual(run(Game(dict(config, seed=3))), first)
+        self.assertNotEqual(run(Game(config, seed=4)), first)
+        with self.assertRaises(ValueError):
+            Game(dict(config, seed="3"))
+
     def test_victory_conditions(self):
         controller = self.game.controllers[0]
         
@@ -233,5 +483,210 @@ class TestGame(unittest.TestCase):
         with self.assertRaises(ValueError):
             game.process_turn(invalid_orders)
 
+class TestGameFork(unittest.TestCase):
+    def setUp(self):
+        deck = [
+            {"type": "MOVE", "parameter": "RANDOM"},
+            {"type": "HARVEST", "parameter": "PLANT"},
+            {"type": "PLANT", "parameter": "COAL"},
+            {"type": "HARVEST", "parameter": "COAL"}
+        ]
+        self.config = {
+            "map_width": 10,
+            "map_height": 10,
+            "seedling_maturity_time": 2,
+            "new_bot_cost": 10,
+            "modify_deck_cost": 5,
+            "victory_conditions": {"MINERAL": 1000},
+            "initial_state": "uniform",
+            "asset_distribution": {"PLANT": 30, "COAL": 30, "ORE_SEEDLING": 10},
+            "controllers": [
+                {
+                    "resources": {"MINERAL": 0, "BIOMASS": 0, "ENERGY": 1000},
+                    "bots": [{"x": x, "y": y, "deck": deck[(x + y) % 4:] + deck[:(x + y) % 4]}
+                             for x in range(0, 10, 3) for y in range(0, 10, 3)]
+                }
+            ]
+        }
+
+    def state(self, game):
+        return ([[sorted((a.type.name, a.amount, a.maturity_time or 0) for a in cell.assets)
+                  for cell in row] for row in game.map],
+                [[(b.id, b.position.x, b.position.y, list(b.deck)) for b in cell.bots]
+                 for row in game.map for cell in row],
+                [(c.id, dict(c.resources), [b.id for b in c.bots]) for c in game.controllers],
+                game.version, game.day, game.hour, game.rng.getstate(),
+                [event.to_dict() for event in game.event_log])
+
+    def play(self, game, turns=3):
+        for _ in range(turns):
+            game.process_bot_actions(game.controllers[0], 20)
+            game.mature_seedlings()
+
+    def test_fork_is_independent(self):
+        for storage in ("objects", "arrays"):
+            game = Game(dict(self.config, map_storage=storage), seed=2)
+            before = self.state(game)
+            fork = game.fork()
+            self.assertEqual(self.state(fork), before)
+            self.play(fork)
+            self.assertEqual(self.state(game), before)
+            self.assertNotEqual(self.state(fork), before)
+            self.assertEqual(game.occupancy_mismatches(), [])
+            self.assertEqual(fork.occupancy_mismatches(), [])
+
+    def test_fork_plays_out_like_the_original(self):
+        for storage in ("objects", "arrays"):
+            game = Game(dict(self.config, map_storage=storage), seed=5)
+            self.play(game, 1)
+            fork = game.fork()
+            self.play(game)
+            self.play(fork)
+            self.assertEqual(self.state(fork), self.state(game))
+            self.assertEqual(fork.occupancy_mismatches(), [])
+
+    def test_bot_positions_are_shared(self):
+        self.config["controllers"][0]["resources"]["MINERAL"] = 10
+        game = Game(self.config, seed=3)
+        game.process_turn([{'controller_id': 0, 'action_type': ControllerActionType.CREATE_BOT}])
+        self.play(game, 1)
+        fork = game.fork()
+        for playing in (game, fork):
+            for bot in playing.bots_by_id.values():
+                self.assertIs(bot.position, playing.positions.at(bot.position.x, bot.position.y))
+
+    def test_forks_of_forks(self):
+        game = Game(self.config, seed=8)
+        first = game.fork()
+        self.play(first, 1)
+        second = first.fork()
+        expected = self.state(first)
+        self.play(game)
+        self.play(second)
+        self.assertEqual(self.state(first), expected)
+        for bot in second.bots_by_id.values():
+            self.assertIn(bot, second.map[bot.position.y][bot.position.x].bots)
+            self.assertIn(bot, second.bot_index.bots_at(bot.position.x, bot.position.y))
+            self.assertIn(bot, second.controllers[0].bots)
+        for forked in (first, second):
+            self.assertEqual(forked.occupancy_mismatches(), [])
+
+    def test_occupancy_mismatches(self):
+        game = Game(self.config, seed=1)
+        self.assertEqual(game.occupancy_mismatches(), [])
+        bot = game.controllers[0].bots[0]
+        game.bot_index.discard(bot, bot.position.x, bot.position.y)
+        self.assertEqual(game.occupancy_mismatches(), [(bot.position.x, bot.position.y)])
+
+    def test_snapshot_and_restore(self):
+        game = Game(self.config, seed=3)
+        snapshot = game.snapshot()
+        expected = self.state(snapshot)
+        self.play(game)
+        played_version = game.version
+        game.restore(snapshot)
+        self.assertEqual(self.state(game)[:3], expected[:3])
+        self.assertGreater(game.version, played_version)
+
+        # The snapshot can be restored again, and replays the same way
+        self.play(game)
+        after_first = self.state(game)[:3]
+        game.restore(snapshot)
+        self.play(game)
+        self.assertEqual(self.state(game)[:3], after_first)
+
+    def test_restore_invalidates_old_delta_bases(self):
+        from game_interface import GameInterface
+        game = Game(self.config, seed=3)
+        snapshot = game.snapshot()
+        self.play(game)
+        seen = game.version
+        game.restore(snapshot)
+        interface = GameInterface()
+        interface.game = game
+        self.assertNotIn('delta', interface.get_game_state_delta(seen))
+        self.assertTrue(interface.get_game_state_delta(game.version)['delta'])
+
+class TestBatchedBotActions(unittest.TestCase):
+    CARDS = ([{"type": "MOVE", "parameter": d} for d in ("NORTH", "SOUTH", "EAST", "WEST", "RANDOM")] +
+             [{"type": t, "parameter": a} for t in ("HARVEST", "PLANT") for a in ("ORE", "PLANT", "COAL")])
+
+    def make_config(self, seed, storage="objects", capacity=1000):
+        rng = random.Random(seed)
+        cells = [(x, y) for x in range(6) for y in range(6)]
+        rng.shuffle(cells)
+        bots = [{"x": x, "y": y, "deck": [rng.choice(self.CARDS) for _ in range(rng.randint(1, 6))]}
+                for x, y in cells[:12]]
+        return {
+            "map_width": 6,
+            "map_height": 6,
+            "seedling_maturity_time": 2,
+            "new_bot_cost": 10,
+            "modify_deck_cost": 1,
+            "victory_conditions": {"ENERGY": 10 ** 9},
+            "initial_state": "uniform",
+            "asset_distribution": {"ORE": 6, "PLANT": 6, "COAL": 6},
+            "map_storage": storage,
+            "event_log_capacity": capacity,
+            "controllers": [
+                {"resources": {"MINERAL": 0, "BIOMASS": 0, "ENERGY": 10 ** 6}, "bots": bots},
+                {"resources": {"MINERAL": 0, "BIOMASS": 0, "ENERGY": 10 ** 6}, "bots": bots[:3]}
+            ]
+        }
+
+    def state(self, game):
+        return (game.version, list(game.cell_versions.items()), list(game.controller_versions.items()),
+                sorted(game.occupied_cells), sorted(game.seedling_cells), game.rng.getstate(),
+                [event.to_dict() for event in game.event_log], game.event_log.next_seq,
+                [(c.id, dict(c.resources), [(b.id, b.position, list(b.deck)) for b in c.bots])
+                 for c in game.controllers],
+                [[(sorted((a.type.name, a.amount, a.maturity_time or 0) for a in cell.assets),
+                   sorted(b.id for b in cell.bots)) for cell in row] for row in game.map])
+
+    def play(self, config, seed, engine, fork=False):
+        game = Game(config, seed=seed)
+        if fork:
+            game.fork()  # Leaves the cells shared copy-on-write
+        for _ in range(4):
+            for controller in list(game.controllers):
+                getattr(game, engine)(controller, 150)
+            game.mature_seedlings()
+        return game
+
+    def assert_engines_agree(self, config, seed, fork=False):
+        scalar = self.play(config, seed, "play_bot_actions", fork)
+        batched = self.play(config, seed, "play_bot_actions_batched", fork)
+        self.assertEqual(self.state(batched), self.state(scalar))
+        return scalar
+
+    def test_batched_matches_scalar(self):
+        destroyed = 0
+        for seed in range(20):
+            game = self.assert_engines_agree(self.make_config(seed), seed)
+            destroyed += 14 - sum(len(c.bots) for c in game.controllers)
+        # The random decks make bots collide, which the batch hands to move_on_map
+        self.assertGreater(destroyed, 0)
+
+    def test_batched_matches_scalar_on_arrays(self):
+        for seed in range(10):
+            self.assert_engines_agree(self.make_config(seed, storage="arrays"), seed)
+
+    def test_batched_matches_scalar_on_a_fork(self):
+        for seed in range(10):
+            self.assert_engines_agree(self.make_config(seed), seed, fork=True)
+
+    def test_batched_numbers_dropped_events(self):
+        for seed in range(10):
+            game = self.assert_engines_agree(self.make_config(seed, capacity=3), seed)
+            self.assertEqual(len(game.event_log), 3)
+
+    def test_process_bot_actions_uses_batched_engine(self):
+        config = self.make_config(1)
+        game = Game(config, seed=1)
+        calls = []
+        game.play_bot_actions_batched = lambda controller, actions: calls.append(actions)
+        game.process_bot_actions(game.controllers[0], 2)
+        self.assertEqual(calls, [2])
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
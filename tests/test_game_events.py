@@ -0,0 +1,84 @@
+import unittest
+from game import Game
+from game_events import Event, EventLog
+from game_interface import GameInterface
+from game_enums import AssetType, Direction, EventKind
+
+class TestEventLog(unittest.TestCase):
+    def test_ring_buffer_drops_oldest(self):
+        log = EventLog(capacity=3)
+        for i in range(5):
+            log.append(Event(EventKind.MESSAGE, 0, i, detail=f"event {i}"))
+
+        self.assertEqual(len(log), 3)
+        self.assertEqual([event.seq for event in log], [2, 3, 4])
+        self.assertEqual(log.oldest_seq, 2)
+        self.assertEqual(log.next_seq, 5)
+        self.assertEqual([event.message for event in log.latest(2)], ["event 4", "event 3"])
+
+    def test_paging(self):
+        log = EventLog(capacity=10)
+        for i in range(15):
+            log.append(Event(EventKind.MESSAGE, 0, 0, detail=str(i)))
+
+        self.assertEqual([e.seq for e in log.since(-1, 3)], [5, 6, 7])
+        self.assertEqual([e.seq for e in log.since(7, 3)], [8, 9, 10])
+        self.assertEqual([e.seq for e in log.since(12)], [13, 14])
+        self.assertEqual(log.since(14), [])
+
+    def test_message_is_formatted_from_fields(self):
+        event = Event(EventKind.HARVEST, 2, 5, controller_id=0, amount=3,
+                      asset_type=AssetType.ORE, x=1, y=4)
+        self.assertEqual(event.message, "Bot 0 harvested 3 ORE at (1, 4)")
+        self.assertEqual(event.to_dict()['asset_type'], 'ORE')
+        self.assertNotIn('from_x', event.to_dict())
+
+class TestGameEvents(unittest.TestCase):
+    def setUp(self):
+        self.config = {
+            "map_width": 5,
+            "map_height": 5,
+            "seedling_maturity_time": 3,
+            "new_bot_cost": 10,
+            "modify_deck_cost": 5,
+            "victory_conditions": {"MINERAL": 10},
+            "initial_state": "empty",
+            "event_log_capacity": 4,
+            "controllers": [
+                {
+                    "resources": {"MINERAL": 0, "BIOMASS": 0, "ENERGY": 10},
+                    "bots": [{"x": 2, "y": 2, "deck": [{"type": "MOVE", "parameter": "NORTH"}]}]
+                }
+            ]
+        }
+        self.game = Game(self.config)
+
+    def test_engine_records_structured_events(self):
+        bot = self.game.controllers[0].bots[0]
+        self.game.execute_move(bot, Direction.NORTH)
+        event = list(self.game.event_log)[-1]
+        self.assertEqual(event.kind, EventKind.MOVE)
+        self.assertEqual((event.from_x, event.from_y, event.x, event.y), (2, 2, 2, 1))
+        self.assertEqual(event.message, "Move from (2, 2) to (2, 1) by bot 0")
+
+    def test_log_is_bounded(self):
+        bot = self.game.controllers[0].bots[0]
+        for _ in range(10):
+            self.game.execute_harvest(bot, AssetType.COAL)
+        self.assertEqual(len(self.game.event_log), 4)
+        self.assertEqual(self.game.event_log.next_seq, 10)
+
+    def test_interface_paging(self):
+        for i in range(6):
+            self.game.log_event(f"note {i}")
+        interface = GameInterface()
+        interface.game = self.game
+
+        page = interface.get_events(since_seq=-1, limit=2)
+        self.assertEqual([e['message'] for e in page['events']], ["note 2", "note 3"])
+        self.assertEqual((page['oldest_seq'], page['next_seq']), (2, 6))
+        page = interface.get_events(since_seq=page['events'][-1]['seq'], limit=10)
+        self.assertEqual([e['message'] for e in page['events']], ["note 4", "note 5"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,9 @@
+import copy
 import unittest
 from game import Game
-from game_interface import GameInterface
-from game_objects import Position, Asset, Card, Bot
-from game_enums import AssetType, ActionType, Direction, ResourceType
+from game_interface import GameInterface, GridRenderer, StateCache, TileIndex, TILE_SIZE
+from game_objects import Position, Asset, Card, Bot, Deck
+from game_enums import AssetType, ActionType, Direction, ResourceType, ControllerActionType
 
 class TestGameInterface(unittest.TestCase):
     def setUp(self):
@@ -161,6 +162,95 @@ class TestGameInterface(unittest.TestCase):
         self.assertIn('Test event 1', summary)
         self.assertIn('Test event 2', summary)
 
+        interface = GameInterface()
+        interface.game = Game(dict(self.config, event_log_capacity=5))
+        self.assertEqual(interface.get_game_state()['event_log_capacity'], 5)
+
+    def test_game_state_deck_order(self):
+        interface = GameInterface()
+        interface.game = self.game
+        bot = self.game.controllers[0].bots[0]
+        bot.deck = Deck([Card(ActionType.HARVEST, AssetType.ORE),
+                         Card(ActionType.HARVEST, AssetType.PLANT)])
+        self.game.play_top_card(bot)
+
+        deck = interface.get_game_state()['controllers'][0]['bots'][0]['deck']
+        self.assertEqual([card['parameter'] for card in deck], ['PLANT', 'ORE'])
+
+    def test_state_delta_applies_to_previous_state(self):
+        interface = GameInterface()
+        interface.game = self.game
+        controller = self.game.controllers[0]
+        controller.bots[0].deck = Deck([Card(ActionType.PLANT, AssetType.PLANT),
+                                        Card(ActionType.MOVE, Direction.EAST),
+                                        Card(ActionType.HARVEST, AssetType.ORE)])
+
+        def apply(state, delta):
+            state = copy.deepcopy(state)
+            for key in ('version', 'day', 'hour', 'hours_per_day', 'state', 'victors'):
+                state[key] = delta[key]
+            changed = {c['id']: c for c in delta['controllers']}
+            previous = {c['id']: c for c in state['controllers']}
+            state['controllers'] = [changed.get(i) or previous[i] for i in delta['controller_ids']]
+            for cell in delta['cells']:
+                state['map'][cell['position']['y']][cell['position']['x']] = cell
+            state['event_log'] = state['event_log'] + delta['events']
+            return state
+
+        state = copy.deepcopy(interface.get_game_state())
+        for _ in range(4):
+            self.game.process_turn([{
+                'controller_id': 0,
+                'action_type': ControllerActionType.TAKE_BOT_ACTIONS,
+                'parameters': {'energy_points': 2}
+            }])
+            delta = interface.get_game_state_delta(state['version'])
+            self.assertTrue(delta['delta'])
+            self.assertLess(len(delta['cells']), 25)
+            state = apply(state, delta)
+            self.assertEqual(state, interface.get_game_state())
+
+        # Nothing changed since the latest version
+        delta = interface.get_game_state_delta(self.game.version)
+        self.assertEqual((delta['cells'], delta['controllers'], delta['events']), ([], [], []))
+
+    def test_state_delta_unknown_version_gives_full_state(self):
+        interface = GameInterface()
+        interface.game = self.game
+        state = interface.get_game_state_delta(self.game.version + 10)
+        self.assertNotIn('delta', state)
+        self.assertEqual(len(state['map']), 5)
+
+    def test_sparse_state_matches_dense(self):
+        interface = GameInterface()
+        interface.game = self.game
+        for _ in range(3):
+            self.game.process_bot_actions(self.game.controllers[0], 2)
+
+        dense = interface.get_game_state()
+        sparse = interface.get_game_state(sparse=True)
+        self.assertEqual(sparse['format'], 'sparse')
+        self.assertNotIn('map', sparse)
+        self.assertEqual(sparse['controllers'], dense['controllers'])
+
+        expected = [
+            {'x': x, 'y': y, 'assets': cell['assets'],
+             'bot_ids': sorted(bot['id'] for bot in cell['bots'])}
+            for y, row in enumerate(dense['map']) for x, cell in enumerate(row)
+            if cell['assets'] or cell['bots']
+        ]
+        self.assertEqual(sparse['cells'], expected)
+
+    def test_occupied_cells_follow_bot(self):
+        game = Game(dict(self.config, initial_state='empty'))
+        bot = game.controllers[0].bots[0]
+        self.assertEqual(game.occupied_cells, {(2, 2)})
+        game.execute_move(bot, Direction.EAST)
+        self.assertEqual(game.occupied_cells, {(3, 2)})
+        game.execute_plant(bot, AssetType.ORE)
+        game.execute_move(bot, Direction.SOUTH)
+        self.assertEqual(game.occupied_cells, {(3, 2), (3, 3)})
+
     def test_multiple_assets_same_cell(self):
         cell = self.game.map[1][1]
         cell.assets.clear()
@@ -188,5 +278,163 @@ class TestGameInterface(unittest.TestCase):
         # Check empty cell color
         self.assertIn('#9BA2A7', html)  # Default color for empty cells
 
+    def test_cached_grid_matches_fresh_render(self):
+        orders = [{
+            'controller_id': 0,
+            'action_type': ControllerActionType.TAKE_BOT_ACTIONS,
+            'parameters': {'energy_points': 2}
+        }]
+        GameInterface.generate_html_grid(self.game)
+        for _ in range(3):
+            self.game.process_turn(orders)
+            self.game.place_asset(Position(4, 0), Asset(AssetType.COAL, 1))
+            self.assertEqual(GameInterface.generate_html_grid(self.game),
+                             GridRenderer().render(self.game))
+
+    def test_grid_changes(self):
+        html = GameInterface.generate_html_grid(self.game)
+        version = self.game.version
+        snapshot = self.game.snapshot()
+        self.game.place_asset(Position(3, 1), Asset(AssetType.PLANT, 77))
+        changes = GameInterface.get_html_grid_changes(self.game, version)
+        self.assertEqual(changes['version'], self.game.version)
+        self.assertEqual(list(changes['cells']), ['cell-3-1'])
+        fragment = changes['cells']['cell-3-1']
+        self.assertEqual(fragment, GridRenderer.render_cell(self.game.map[1][3], 3, 1))
+        self.assertNotIn(fragment, html)
+        # A restore breaks the history, so the whole grid is sent
+        self.game.restore(snapshot)
+        changes = GameInterface.get_html_grid_changes(self.game, version)
+        self.assertNotIn('cells', changes)
+        self.assertEqual(changes['html'], GridRenderer().render(self.game))
+        self.assertNotIn(fragment, changes['html'])
+
+    def large_game(self):
+        config = dict(self.config, map_width=70, map_height=40,
+                      asset_distribution={"ORE": 300, "PLANT": 300, "COAL_SEEDLING": 50})
+        return Game(config, seed=3)
+
+    def test_viewport_state(self):
+        game = self.large_game()
+        interface = GameInterface()
+        interface.game = game
+        full = interface.get_game_state()
+        viewport = interface.get_viewport_state(60, 30, 20, 5)
+        self.assertEqual(viewport['viewport'], {'x': 60, 'y': 30, 'width': 10, 'height': 5})
+        self.assertEqual(viewport['map'], [row[60:] for row in full['map'][30:35]])
+        self.assertEqual(viewport['version'], game.version)
+        sparse = interface.get_viewport_state(60, 30, 20, 5, sparse=True)
+        self.assertEqual(sparse['cells'], [cell for cell in interface.get_game_state(sparse=True)['cells']
+                                           if cell['x'] >= 60 and 30 <= cell['y'] < 35])
+        for x, y, width, height in ((70, 0, 5, 5), (-1, 0, 5, 5), (0, 0, 0, 5)):
+            with self.assertRaises(ValueError):
+                interface.get_viewport_state(x, y, width, height)
+
+    def test_tiles(self):
+        game = self.large_game()
+        interface = GameInterface()
+        interface.game = game
+        tiles = TileIndex.for_game(game)
+        tile = interface.get_tile_state(2, 1)
+        self.assertEqual(len(tile['map']), 40 - TILE_SIZE)
+        self.assertEqual(len(tile['map'][0]), 70 - 2 * TILE_SIZE)
+        tags = {(x, y): tiles.etag(game, x, y) for x in range(3) for y in range(2)}
+        overview_tag = tiles.overview_etag(game)
+        game.place_asset(Position(TILE_SIZE + 1, 3), Asset(AssetType.ORE, 1))
+        self.assertEqual(interface.get_tile_state(1, 0)['tile']['version'], game.version)
+        for key, tag in tags.items():
+            if key == (1, 0):
+                self.assertNotEqual(tiles.etag(game, *key), tag)
+            else:
+                self.assertEqual(tiles.etag(game, *key), tag)
+        self.assertNotEqual(tiles.overview_etag(game), overview_tag)
+        # Restoring rewinds cell versions, so every tag changes
+        snapshot = game.snapshot()
+        tags = {key: tiles.etag(game, *key) for key in tags}
+        game.restore(snapshot)
+        for key, tag in tags.items():
+            self.assertNotEqual(tiles.etag(game, *key), tag)
+        self.assertNotEqual(TileIndex.for_game(game.fork()).etag(game, 0, 0), tiles.etag(game, 0, 0))
+
+    def test_overview(self):
+        game = self.large_game()
+        interface = GameInterface()
+        interface.game = game
+        overview = interface.get_overview()
+        self.assertEqual((overview['columns'], overview['rows']), (3, 2))
+        totals, bots = {}, 0
+        for tile in overview['tiles']:
+            for asset_type, amount in tile['assets'].items():
+                totals[asset_type] = totals.get(asset_type, 0) + amount
+            bots += tile['bots']
+        expected = {}
+        for row in game.map:
+            for cell in row:
+                for asset in cell.assets:
+                    expected[asset.type.name] = expected.get(asset.type.name, 0) + asset.amount
+        self.assertEqual(totals, expected)
+        self.assertEqual(bots, 1)
+
+    def test_html_viewport(self):
+        game = self.large_game()
+        html = GameInterface.generate_html_viewport(game, 65, 38, 10, 10)
+        self.assertEqual(html.count('<div class="cell"'), 10)
+        self.assertIn('repeat(5, 60px)', html)
+        self.assertIn('id="cell-65-38"', html)
+        self.assertIn('id="cell-69-39"', html)
+
+    def test_state_cache(self):
+        import json
+        import game_interface
+        cache = StateCache.for_game(self.game)
+        interface = GameInterface()
+        interface.game = self.game
+        body = cache.get(self.game)
+        self.assertEqual(json.loads(body), json.loads(json.dumps(interface.get_game_state())))
+        self.assertIs(cache.get(self.game), body)
+        etag = cache.etag(self.game)
+        version = self.game.version
+        self.assertNotEqual(cache.etag(self.game, sparse=True), etag)
+        self.assertEqual(json.loads(cache.get(self.game, sparse=True)), interface.get_game_state(sparse=True))
+
+        self.game.place_asset(Position(0, 0), Asset(AssetType.COAL, 1))
+        self.assertNotEqual(cache.etag(self.game), etag)
+        self.assertEqual(json.loads(cache.get(self.game)), json.loads(json.dumps(interface.get_game_state())))
+        self.assertEqual(json.loads(cache.get(self.game, version)), interface.get_game_state_delta(version))
+        # A base outside the history gets the full state
+        self.assertEqual(cache.etag(self.game, -5), cache.etag(self.game))
+        self.assertNotEqual(StateCache.for_game(self.game.fork()).etag(self.game), cache.etag(self.game))
+
+        # Same document with the standard library encoder
+        encoder, game_interface.orjson = game_interface.orjson, None
+        try:
+            self.assertEqual(json.loads(game_interface.encode_json(interface.get_game_state())),
+                             json.loads(cache.get(self.game)))
+        finally:
+            game_interface.orjson = encoder
+
+    def test_state_encodes_after_victory(self):
+        import json
+        import game_interface
+        import wire_format
+        controller = self.game.controllers[0]
+        version = self.game.version
+        for resource_type in (ResourceType.MINERAL, ResourceType.BIOMASS, ResourceType.ENERGY):
+            controller.resources[resource_type] = 10
+        self.game.check_victory()
+        self.assertEqual(self.game.state, 'victory')
+
+        interface = GameInterface()
+        interface.game = self.game
+        states = [interface.get_game_state(), interface.get_game_state(sparse=True),
+                  interface.get_game_state_delta(version)]
+        for state in states:
+            self.assertEqual(state['victors'], [controller.id])
+            # The WebSocket sends frames with json.dumps, /game/state with encode_json
+            self.assertEqual(json.loads(json.dumps(state)), json.loads(game_interface.encode_json(state)))
+        self.assertEqual(json.loads(StateCache.for_game(self.game).get(self.game))['victors'], [controller.id])
+        self.assertEqual(wire_format.decode_state(interface.get_game_state_binary())['victors'],
+                         [controller.id])
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,171 @@
+import unittest
+from game import Game
+from game_interface import GameInterface
+from game_map import ArrayMap, CellView, OFF_MAP, PositionTable
+from game_objects import Position, Asset, Card, Bot
+from game_enums import AssetType, ActionType, Direction, DIRECTION_VECTORS, ResourceType
+
+class TestArrayMap(unittest.TestCase):
+    def setUp(self):
+        self.config = {
+            "map_width": 6,
+            "map_height": 5,
+            "map_storage": "arrays",
+            "seedling_maturity_time": 2,
+            "new_bot_cost": 10,
+            "modify_deck_cost": 5,
+            "victory_conditions": {"MINERAL": 100},
+            "initial_state": [
+                {"type": "ORE", "amount": 3, "x": 1, "y": 1},
+                {"type": "PLANT_SEEDLING", "amount": 2, "x": 2, "y": 1}
+            ],
+            "controllers": [
+                {
+                    "resources": {"MINERAL": 0, "BIOMASS": 0, "ENERGY": 10},
+                    "bots": [
+                        {
+                            "x": 1,
+                            "y": 1,
+                            "deck": [
+                                {"type": "HARVEST", "parameter": "ORE"},
+                                {"type": "MOVE", "parameter": "EAST"}
+                            ]
+                        }
+                    ]
+                }
+            ]
+        }
+        self.game = Game(self.config)
+
+    def test_map_shape(self):
+        self.assertIsInstance(self.game.map, ArrayMap)
+        self.assertEqual(len(self.game.map), 5)
+        self.assertEqual(len(self.game.map[0]), 6)
+        self.assertIsInstance(self.game.map[4][5], CellView)
+        with self.assertRaises(IndexError):
+            self.game.map[5]
+
+    def test_invalid_storage_rejected(self):
+        with self.assertRaises(ValueError):
+            Game(dict(self.config, map_storage="sparse"))
+
+    def test_harvest_and_move(self):
+        controller = self.game.controllers[0]
+        bot = controller.bots[0]
+        self.assertTrue(self.game.execute_harvest(bot, AssetType.ORE))
+        self.assertEqual(controller.resources[ResourceType.MINERAL], 3)
+        self.assertEqual(self.game.map[1][1].assets, [])
+
+        self.game.execute_move(bot, Direction.EAST)
+        self.assertEqual(bot.position, Position(2, 1))
+        self.assertIn(bot, self.game.map[1][2].bots)
+        self.assertFalse(self.game.map[1][1].bots)
+
+    def test_seedling_matures_and_merges(self):
+        cell = self.game.map[1][2]
+        self.game.place_asset(Position(2, 1), Asset(AssetType.PLANT, 4))
+        self.assertTrue(cell.has_seedling())
+
+        self.game.mature_seedlings()
+        self.assertEqual([(a.type, a.amount, a.maturity_time) for a in cell.assets],
+                         [(AssetType.PLANT, 4, None), (AssetType.PLANT_SEEDLING, 2, 1)])
+        self.game.mature_seedlings()
+        self.assertEqual([(a.type, a.amount, a.maturity_time) for a in cell.assets],
+                         [(AssetType.PLANT, 6, None)])
+        self.assertFalse(cell.has_seedling())
+
+    def test_plant_blocked_by_seedling(self):
+        bot = self.game.controllers[0].bots[0]
+        self.game.execute_plant(bot, AssetType.COAL)
+        self.game.execute_plant(bot, AssetType.ORE)
+        seedlings = [a for a in self.game.map[1][1].assets if a.maturity_time is not None]
+        self.assertEqual([a.type for a in seedlings], [AssetType.COAL_SEEDLING])
+
+    def test_collision(self):
+        controller = self.game.controllers[0]
+        bot = controller.bots[0]
+        self.game.add_bot(controller, Bot(Position(2, 1), [], controller.id))
+
+        self.game.execute_move(bot, Direction.EAST)
+        self.assertEqual(len(controller.bots), 0)
+        self.assertFalse(self.game.map[1][2].bots)
+
+    def test_matches_object_storage(self):
+        """Both storage modes must produce the same game for the same actions."""
+        config = dict(self.config, initial_state="uniform", asset_distribution={
+            "ORE": 8, "PLANT": 8, "COAL": 8, "ORE_SEEDLING": 3, "PLANT_SEEDLING": 3
+        })
+        config["controllers"][0]["bots"][0]["deck"] = [
+            {"type": "MOVE", "parameter": "RANDOM"},
+            {"type": "HARVEST", "parameter": "ORE"},
+            {"type": "PLANT", "parameter": "PLANT"},
+            {"type": "HARVEST", "parameter": "PLANT"},
+            {"type": "HARVEST", "parameter": "COAL"}
+        ]
+        games = []
+        for storage in ("objects", "arrays"):
+            game = Game(dict(config, map_storage=storage), seed=7)
+            for _ in range(5):
+                game.process_bot_actions(game.controllers[0], 2)
+                game.mature_seedlings()
+            games.append(game)
+
+        def contents(game):
+            return [[sorted((a.type.name, a.amount, a.maturity_time or 0) for a in cell.assets)
+                     for cell in row] for row in game.map]
+
+        objects_game, arrays_game = games
+        self.assertEqual(contents(objects_game), contents(arrays_game))
+        self.assertEqual(objects_game.controllers[0].resources,
+                         arrays_game.controllers[0].resources)
+
+    def test_html_grid(self):
+        html = GameInterface.generate_html_grid(self.game)
+        self.assertEqual(html.count('<div class="cell"'), 30)
+        self.assertIn('ORE×3', html)
+        self.assertIn('PLS(2)×2', html)
+
+class TestPositionTable(unittest.TestCase):
+    def test_neighbors(self):
+        table = PositionTable(4, 3)
+        for x in range(4):
+            for y in range(3):
+                for direction, (dx, dy) in DIRECTION_VECTORS.items():
+                    target = table.neighbor(Position(x, y), direction)
+                    if 0 <= x + dx < 4 and 0 <= y + dy < 3:
+                        self.assertEqual(target, Position(x + dx, y + dy))
+                        self.assertIs(target, table.at(x + dx, y + dy))
+                    else:
+                        self.assertIs(target, OFF_MAP)
+
+    def test_moves(self):
+        config = {
+            "map_width": 5,
+            "map_height": 5,
+            "seedling_maturity_time": 2,
+            "new_bot_cost": 10,
+            "modify_deck_cost": 5,
+            "victory_conditions": {"MINERAL": 100},
+            "initial_state": "empty",
+            "controllers": [
+                {
+                    "resources": {"MINERAL": 0, "BIOMASS": 0, "ENERGY": 10},
+                    "bots": [{"x": 0, "y": 0, "deck": []}]
+                }
+            ]
+        }
+        game = Game(config)
+        bot = game.controllers[0].bots[0]
+        self.assertTrue(game.execute_move(bot, Direction.EAST))
+        self.assertEqual(bot.position, Position(1, 0))
+        self.assertIs(bot.position, game.positions.at(1, 0))
+        self.assertIs(game.fork().positions, game.positions)
+
+        # Off the edge the bot stays put and the attempt is still logged
+        self.assertFalse(game.execute_move(bot, Direction.NORTH))
+        self.assertEqual(bot.position, Position(1, 0))
+        event = list(game.event_log)[-1]
+        self.assertEqual((event.x, event.y, event.from_x, event.from_y), (1, -1, 1, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
+import copy
+import pickle
 import unittest
-from game_objects import Position, Asset, Card, Bot, Cell, Controller
+from game_objects import Position, Asset, Card, Bot, BotList, Cell, Controller, Deck
 from game_enums import AssetType, ActionType, Direction, ResourceType
 
 class TestPosition(unittest.TestCase):
@@ -57,6 +59,62 @@ class TestBot(unittest.TestCase):
         self.assertEqual(bot.deck[-1], first_card)
         self.assertEqual(len(bot.deck), 2)
 
+    def test_deck_draw_rotates(self):
+        north = Card(ActionType.MOVE, Direction.NORTH)
+        south = Card(ActionType.MOVE, Direction.SOUTH)
+        harvest = Card(ActionType.HARVEST, AssetType.ORE)
+        bot = Bot(Position(0, 0), [north, south, harvest], controller_id=0)
+        self.assertIsInstance(bot.deck, Deck)
+
+        self.assertEqual(bot.deck.draw(), north)
+        self.assertEqual(list(bot.deck), [south, harvest, north])
+        self.assertEqual(bot.deck[1:], [harvest, north])
+
+        # Edits apply in logical order, starting from the next card to play
+        self.assertEqual(bot.deck.pop(1), harvest)
+        bot.deck.append(harvest)
+        self.assertEqual(list(bot.deck), [south, north, harvest])
+
+    def test_bot_converts_deck_list(self):
+        bot = Bot(Position(0, 0), [Card(ActionType.PLANT, AssetType.COAL)], controller_id=0)
+        self.assertIsInstance(bot.deck, Deck)
+        self.assertEqual(bot.deck.draw().action_type, ActionType.PLANT)
+
+    def test_bot_hash_survives_move(self):
+        bot = Bot(Position(0, 0), [], controller_id=0)
+        bots = {bot}
+        bot.position = Position(1, 0)
+        self.assertIn(bot, bots)
+        self.assertNotEqual(bot, Bot(Position(1, 0), [], controller_id=0))
+
+class TestCard(unittest.TestCase):
+    def test_cards_are_shared(self):
+        card = Card(ActionType.MOVE, Direction.EAST)
+        self.assertIs(Card(ActionType.MOVE, Direction.EAST), card)
+        self.assertIsNot(Card(ActionType.MOVE, Direction.WEST), card)
+        self.assertIs(copy.deepcopy(card), card)
+        self.assertIs(pickle.loads(pickle.dumps(card)), card)
+
+    def test_game_objects_have_no_instance_dict(self):
+        bot = Bot(Position(0, 0), [Card(ActionType.MOVE, Direction.EAST)], controller_id=0)
+        for obj in (bot, bot.position, bot.deck, Asset(AssetType.ORE, 1), Cell(), Controller(0)):
+            self.assertFalse(hasattr(obj, '__dict__'), type(obj).__name__)
+
+class TestBotList(unittest.TestCase):
+    def test_remove_swaps_last(self):
+        bots = [Bot(Position(i, 0), [], controller_id=0) for i in range(4)]
+        bot_list = BotList(bots)
+        bot_list.remove(bots[1])
+        self.assertEqual(list(bot_list), [bots[0], bots[3], bots[2]])
+        self.assertNotIn(bots[1], bot_list)
+        self.assertIs(bot_list[1], bots[3])
+
+        bot_list.remove(bots[2])
+        bot_list.discard(bots[2])
+        self.assertEqual(bot_list[:], [bots[0], bots[3]])
+        with self.assertRaises(ValueError):
+            bot_list.remove(bots[2])
+
 class TestController(unittest.TestCase):
     def test_controller_creation(self):
         controller = Controller(0)
@@ -90,6 +148,34 @@ class TestCell(unittest.TestCase):
         self.assertEqual(cell.assets[0].type, AssetType.ORE)
         self.assertEqual(cell.assets[0].amount, 3)
 
+    def test_cell_merges_stacks_by_type(self):
+        cell = Cell()
+        cell.add_asset(Asset(AssetType.COAL_SEEDLING, 1, maturity_time=2))
+        cell.add_asset(Asset(AssetType.ORE, 3))
+        cell.add_asset(Asset(AssetType.ORE, 4))
+        cell.add_asset(Asset(AssetType.COAL_SEEDLING, 2, maturity_time=5))
+        self.assertEqual(cell.assets, [Asset(AssetType.COAL_SEEDLING, 3, 2), Asset(AssetType.ORE, 7)])
+        self.assertTrue(cell.has_seedling())
+
+        self.assertIsNone(cell.take_mature(AssetType.COAL_SEEDLING))
+        self.assertIsNone(cell.take_mature(AssetType.PLANT))
+        self.assertEqual(cell.take_mature(AssetType.ORE), Asset(AssetType.ORE, 7))
+        self.assertEqual(len(cell.assets), 1)
+
+        cell.add_asset(Asset(AssetType.COAL, 1))
+        self.assertTrue(cell.tick_seedlings())
+        self.assertFalse(cell.tick_seedlings())
+        self.assertEqual(cell.assets, [Asset(AssetType.COAL, 4)])
+        self.assertFalse(cell.has_seedling())
+
+    def test_empty_cells_share_no_state(self):
+        first, second = Cell(), Cell()
+        first.assets.append(Asset(AssetType.ORE, 1))
+        self.assertEqual(len(second.assets), 0)
+        first.assets.clear()
+        second.assets.append(Asset(AssetType.PLANT, 2))
+        self.assertEqual(len(first.assets), 0)
+
     def test_cell_bot_management(self):
         cell = Cell()
         bot = Bot(Position(0, 0), [], controller_id=0)
@@ -0,0 +1,137 @@
+import os
+import tempfile
+import unittest
+from game import Game
+from game_enums import AssetType, Position
+from game_objects import Asset
+from game_save import HEADER, load_game, save_game
+
+class TestGameSave(unittest.TestCase):
+    def setUp(self):
+        deck = [
+            {"type": "MOVE", "parameter": "RANDOM"},
+            {"type": "HARVEST", "parameter": "PLANT"},
+            {"type": "PLANT", "parameter": "COAL"},
+            {"type": "HARVEST", "parameter": "COAL"}
+        ]
+        self.config = {
+            "map_width": 10,
+            "map_height": 8,
+            "seedling_maturity_time": 2,
+            "new_bot_cost": 10,
+            "modify_deck_cost": 5,
+            "victory_conditions": {"MINERAL": 1000},
+            "initial_state": "uniform",
+            "asset_distribution": {"PLANT": 30, "COAL": 30, "ORE_SEEDLING": 10},
+            "event_log_capacity": 50,
+            "controllers": [
+                {
+                    "resources": {"MINERAL": 0, "BIOMASS": 0, "ENERGY": 1000},
+                    "bots": [{"x": x, "y": y, "deck": deck[(x + y) % 4:] + deck[:(x + y) % 4]}
+                             for x in range(0, 10, 3) for y in range(0, 8, 3)]
+                },
+                {
+                    "resources": {"MINERAL": 3, "BIOMASS": 4, "ENERGY": 500},
+                    "bots": [{"x": 9, "y": 7, "deck": deck}]
+                }
+            ]
+        }
+        handle, self.path = tempfile.mkstemp(suffix='.sfsave')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def state(self, game):
+        return ([[sorted((a.type.name, a.amount, a.maturity_time or 0) for a in cell.assets)
+                  for cell in row] for row in game.map],
+                sorted((b.id, b.controller_id, b.position.x, b.position.y, list(b.deck))
+                       for b in game.bots_by_id.values()),
+                [(c.id, dict(c.resources), [b.id for b in c.bots], c.starting_position)
+                 for c in game.controllers],
+                game.version, game.day, game.hour, game.state, game.next_bot_id,
+                game.rng.getstate(), game.occupied_cells, game.seedling_cells,
+                [event.to_dict() for event in game.event_log], game.event_log.next_seq)
+
+    def play(self, game, turns=3):
+        for _ in range(turns):
+            for controller in game.controllers:
+                game.process_bot_actions(controller, 20)
+            game.mature_seedlings()
+
+    def test_round_trip(self):
+        for storage in ("objects", "arrays"):
+            for lazy in (True, False):
+                game = Game(dict(self.config, map_storage=storage), seed=4)
+                self.play(game)
+                save_game(game, self.path)
+                loaded = load_game(self.path, lazy=lazy)
+                self.assertEqual(loaded.map_storage, storage)
+                self.assertEqual(self.state(loaded), self.state(game))
+                self.assertEqual(loaded.occupancy_mismatches(), [])
+                for bot in loaded.bots_by_id.values():
+                    self.assertIs(bot.position, loaded.positions.at(bot.position.x, bot.position.y))
+                for x, y in game.occupied_cells:
+                    self.assertEqual(loaded.map[y][x].assets, game.map[y][x].assets)
+
+    def test_loaded_game_plays_on_identically(self):
+        for storage in ("objects", "arrays"):
+            game = Game(dict(self.config, map_storage=storage), seed=6)
+            self.play(game, 2)
+            save_game(game, self.path)
+            loaded = load_game(self.path)
+            self.play(game)
+            self.play(loaded)
+            self.assertEqual(self.state(loaded), self.state(game))
+            self.assertEqual(loaded.occupancy_mismatches(), [])
+
+    def test_objects_cells_keep_their_order(self):
+        game = Game(dict(self.config, initial_state="empty"), seed=1)
+        game.place_asset(Position(2, 2), Asset(AssetType.ORE_SEEDLING, 2, 4))
+        game.place_asset(Position(2, 2), Asset(AssetType.COAL, 3))
+        save_game(game, self.path)
+        self.assertEqual(load_game(self.path).map[2][2].assets,
+                         [Asset(AssetType.ORE_SEEDLING, 2, 4), Asset(AssetType.COAL, 3)])
+        # The arrays storage lists mature assets first
+        self.assertEqual(load_game(self.path, storage="arrays").map[2][2].assets,
+                         [Asset(AssetType.COAL, 3), Asset(AssetType.ORE_SEEDLING, 2, 4)])
+
+    def test_storage_conversion(self):
+        game = Game(dict(self.config, map_storage="arrays"), seed=2)
+        self.play(game)
+        save_game(game, self.path)
+        loaded = load_game(self.path, storage="objects")
+        self.assertEqual(loaded.map_storage, "objects")
+        self.assertEqual(self.state(loaded), self.state(game))
+        self.assertEqual(loaded.occupancy_mismatches(), [])
+
+    def test_lazy_load_does_not_write_the_file(self):
+        game = Game(dict(self.config, map_storage="arrays"), seed=3)
+        save_game(game, self.path)
+        with open(self.path, 'rb') as f:
+            saved = f.read()
+        loaded = load_game(self.path)
+        self.play(loaded)
+        fork = loaded.fork()
+        self.play(fork)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), saved)
+
+    def test_deltas_start_at_the_saved_version(self):
+        from game_interface import GameInterface
+        game = Game(self.config, seed=5)
+        self.play(game)
+        save_game(game, self.path)
+        interface = GameInterface()
+        interface.game = load_game(self.path)
+        self.assertNotIn('delta', interface.get_game_state_delta(0))
+        self.assertIn('delta', interface.get_game_state_delta(game.version))
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(HEADER.pack(b'NOTASAVE', 1, 1, 5, 5, 0, HEADER.size))
+        with self.assertRaises(ValueError):
+            load_game(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from game import Game
+from instrumentation import Metrics, metrics
+
+class TestMetrics(unittest.TestCase):
+    def test_phase_timing(self):
+        local = Metrics()
+        with local.phase('maturation'):
+            pass
+        with local.phase('maturation'):
+            pass
+        self.assertEqual(local.calls['maturation'], 2)
+        self.assertGreaterEqual(local.seconds['maturation'], 0.0)
+        self.assertEqual(local.calls['bot_actions'], 0)
+
+    def test_disabled_records_nothing(self):
+        local = Metrics(enabled=False)
+        with local.phase('maturation'):
+            pass
+        self.assertEqual(local.calls['maturation'], 0)
+
+    def test_prometheus_text(self):
+        local = Metrics()
+        local.observe('victory_check', 0.5)
+        text = local.render_prometheus({'sessions': 3})
+        self.assertIn('# TYPE spacefarm_phase_seconds_total counter', text)
+        self.assertIn('spacefarm_phase_seconds_total{phase="victory_check"} 0.500000000', text)
+        self.assertIn('spacefarm_phase_calls_total{phase="victory_check"} 1', text)
+        self.assertIn('spacefarm_sessions 3', text)
+        self.assertTrue(text.endswith('\n'))
+
+    def test_engine_phases_are_counted(self):
+        config = {
+            "map_width": 5,
+            "map_height": 5,
+            "seedling_maturity_time": 3,
+            "new_bot_cost": 10,
+            "modify_deck_cost": 5,
+            "victory_conditions": {"MINERAL": 10},
+            "initial_state": "empty",
+            "controllers": [{"resources": {"MINERAL": 0, "BIOMASS": 0, "ENERGY": 10}, "bots": []}]
+        }
+        game = Game(config)
+        before = dict(metrics.calls)
+        game.process_turn([])
+        self.assertEqual(metrics.calls['maturation'], before['maturation'] + 1)
+        self.assertEqual(metrics.calls['victory_check'], before['victory_check'] + 1)
+
+if __name__ == '__main__':
+    unittest.main()
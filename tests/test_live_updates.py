@@ -0,0 +1,84 @@
+import asyncio
+import unittest
+from live_updates import Hub, Subscriber
+
+class TestLiveUpdates(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+        self.builds = 0
+        # Set to hold up sends, as a slow client does
+        self.gate = None
+
+    async def send(self, frame):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.sent.append(frame)
+
+    async def build_state(self, subscriber):
+        self.builds += 1
+        return {'build': self.builds}
+
+    def test_state_frames(self):
+        async def scenario():
+            hub = Hub()
+            subscriber = Subscriber(self.send, self.build_state)
+            hub.subscribe('a', subscriber)
+            writer = asyncio.create_task(subscriber.run())
+            await asyncio.sleep(0)
+            # A new subscriber gets a frame straight away
+            self.assertEqual(self.sent, [{'type': 'state', 'state': {'build': 1}}])
+            hub.publish('a')
+            hub.publish('b')
+            await asyncio.sleep(0)
+            self.assertEqual(len(self.sent), 2)
+            self.assertEqual(len(hub), 1)
+            hub.unsubscribe('a', subscriber)
+            hub.publish('a')
+            await asyncio.sleep(0)
+            self.assertEqual(len(self.sent), 2)
+            self.assertFalse(hub.has_subscribers('a'))
+            subscriber.close()
+            await writer
+        asyncio.run(scenario())
+
+    def test_slow_subscribers_get_merged_frames(self):
+        async def scenario():
+            hub = Hub()
+            subscriber = Subscriber(self.send, self.build_state)
+            hub.subscribe('a', subscriber)
+            self.gate = asyncio.Event()
+            writer = asyncio.create_task(subscriber.run())
+            await asyncio.sleep(0)
+            # Ten turns and three progress reports while the first frame is stuck
+            for hours in (24, 48, 72):
+                hub.publish_progress('a', {'hours': hours})
+            for _ in range(10):
+                hub.publish('a')
+            self.gate.set()
+            for _ in range(5):
+                await asyncio.sleep(0)
+            self.assertEqual(self.sent, [
+                {'type': 'state', 'state': {'build': 1}},
+                {'type': 'progress', 'run': {'hours': 72}},
+                {'type': 'state', 'state': {'build': 2}},
+            ])
+            subscriber.close()
+            await writer
+        asyncio.run(scenario())
+
+    def test_nothing_to_send(self):
+        async def build_nothing(subscriber):
+            return None
+
+        async def scenario():
+            subscriber = Subscriber(self.send, build_nothing)
+            writer = asyncio.create_task(subscriber.run())
+            subscriber.notify()
+            await asyncio.sleep(0)
+            subscriber.close()
+            await writer
+            self.assertEqual(self.sent, [])
+        asyncio.run(scenario())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import tempfile
+import unittest
+from game_enums import Direction
+from game_interface import GameInterface
+from session_manager import SessionManager, estimate_game_size
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def level_config(width, map_storage='objects'):
+    return {
+        "map_width": width,
+        "map_height": 5,
+        "seedling_maturity_time": 3,
+        "new_bot_cost": 10,
+        "modify_deck_cost": 5,
+        "victory_conditions": {"MINERAL": 10},
+        "initial_state": "empty",
+        "map_storage": map_storage,
+        "controllers": [
+            {
+                "resources": {"MINERAL": 0, "BIOMASS": 0, "ENERGY": 10},
+                "bots": [{"x": 1, "y": 1, "deck": [{"type": "MOVE", "parameter": "NORTH"}]}]
+            }
+        ]
+    }
+
+class TestSessionManager(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.levels = {'small': level_config(5), 'wide': level_config(8)}
+        self.manager = SessionManager(self.levels, 'small', max_sessions=3,
+                                      idle_timeout=100, clock=self.clock)
+
+    def test_sessions_are_independent(self):
+        a = self.manager.get_or_create('a')
+        b = self.manager.get_or_create('b')
+        bot = a.game.controllers[0].bots[0]
+        a.game.execute_move(bot, Direction.NORTH)
+        self.assertIsNot(a.game, b.game)
+        self.assertIs(self.manager.get_or_create('a').game, a.game)
+        self.assertEqual((bot.position.x, bot.position.y), (1, 0))
+        self.assertEqual(b.game.controllers[0].bots[0].position.y, 1)
+
+    def test_generated_id(self):
+        session = self.manager.get_or_create()
+        self.assertIn(session.id, self.manager)
+        self.assertEqual(session.level, 'small')
+
+    def test_invalid_id_rejected(self):
+        with self.assertRaises(ValueError):
+            self.manager.get_or_create('not a valid id!')
+        with self.assertRaises(ValueError):
+            self.manager.create('ok', level='missing')
+        self.assertEqual(len(self.manager), 0)
+
+    def test_lru_eviction(self):
+        for session_id in ('a', 'b', 'c'):
+            self.manager.create(session_id)
+        self.manager.get('a')
+        self.manager.create('d')
+        self.assertEqual([s.id for s in self.manager], ['c', 'a', 'd'])
+
+    def test_idle_sessions_expire(self):
+        self.manager.create('a')
+        self.clock.now = 50
+        self.manager.create('b')
+        self.clock.now = 120
+        self.assertIsNone(self.manager.get('a'))
+        self.assertIsNotNone(self.manager.get('b'))
+
+    def test_memory_cap(self):
+        size = estimate_game_size(self.manager.create('a').game)
+        self.manager.max_memory = size * 2
+        self.manager.create('b')
+        self.manager.create('c')
+        self.assertEqual([s.id for s in self.manager], ['b', 'c'])
+        self.assertEqual(self.manager.memory, size * 2)
+
+    def test_restart_keeps_level(self):
+        first_game = self.manager.create('a', level='wide').game
+        restarted = self.manager.restart('a')
+        self.assertIsNot(restarted.game, first_game)
+        self.assertEqual(restarted.level, 'wide')
+        self.assertEqual(restarted.game.width, 8)
+        self.assertEqual(self.manager.restart('a', 'small').game.width, 5)
+        self.assertEqual(len(self.manager), 1)
+
+    def test_restart_keeps_request_lock(self):
+        first = self.manager.create('a')
+        self.assertIs(self.manager.restart('a').lock, first.lock)
+        self.assertIsNot(self.manager.create('b').lock, first.lock)
+
+    def test_restart_replaces_game_in_place(self):
+        session = self.manager.create('a', level='wide')
+        old_game = session.game
+        memory = self.manager.memory
+        restarted = self.manager.restart('a', 'small')
+        self.assertIs(restarted, session)
+        self.assertIs(self.manager.get('a'), session)
+        self.assertIsNot(session.game, old_game)
+        self.assertEqual((session.level, session.game.width), ('small', 5))
+        self.assertEqual(self.manager.memory, memory - estimate_game_size(old_game) + session.size)
+        with self.assertRaises(ValueError):
+            self.manager.restart('a', 'huge')
+        self.assertEqual(self.manager.restart('b').id, 'b')
+
+    def test_restart_continues_versions(self):
+        first = self.manager.create('a')
+        game = first.game
+        bot = game.controllers[0].bots[0]
+        for _ in range(3):
+            game.execute_move(bot, Direction.SOUTH)
+        stale = game.version
+
+        restarted = self.manager.restart('a').game
+        self.assertGreater(restarted.base_version, stale)
+        self.assertGreater(restarted.version, stale)
+        interface = GameInterface()
+        interface.game = restarted
+        state = interface.get_game_state_delta(stale)
+        self.assertNotIn('delta', state)
+        self.assertEqual(state['version'], restarted.version)
+
+    def test_storage_mode_affects_size(self):
+        objects = estimate_game_size(self.manager.create('a').game)
+        manager = SessionManager({'small': level_config(5, 'arrays')}, 'small')
+        self.assertLess(estimate_game_size(manager.create('a').game), objects)
+
+    def test_save_and_load_all(self):
+        a = self.manager.create('a', level='wide')
+        self.manager.create('b')
+        a.game.execute_move(a.game.controllers[0].bots[0], Direction.NORTH)
+        with tempfile.TemporaryDirectory() as directory:
+            self.manager.save_all(directory)
+            manager = SessionManager(self.levels, 'small', max_sessions=3, clock=self.clock)
+            self.assertEqual(manager.load_all(directory), 2)
+        self.assertEqual([session.id for session in manager], ['a', 'b'])
+        restored = manager.get('a')
+        self.assertEqual(restored.level, 'wide')
+        self.assertEqual(restored.game.width, 8)
+        self.assertEqual(restored.game.controllers[0].bots[0].position.y, 0)
+        self.assertEqual(manager.memory, self.manager.memory)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import unittest
+import simulate
+from game import Game
+
+LEVELS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestSimulate(unittest.TestCase):
+    def setUp(self):
+        self.config = {
+            "map_width": 5,
+            "map_height": 5,
+            "seedling_maturity_time": 3,
+            "new_bot_cost": 10,
+            "modify_deck_cost": 1,
+            "victory_conditions": {"ENERGY": 40},
+            "initial_state": [
+                {"type": "COAL", "amount": 10, "x": 1, "y": 2},
+                {"type": "COAL", "amount": 10, "x": 2, "y": 1},
+                {"type": "COAL", "amount": 10, "x": 3, "y": 2},
+                {"type": "COAL", "amount": 10, "x": 2, "y": 3}
+            ],
+            "controllers": [
+                {
+                    "resources": {"MINERAL": 0, "BIOMASS": 5, "ENERGY": 30},
+                    "bots": [{"x": 2, "y": 2, "deck": [
+                        {"type": "MOVE", "parameter": "RANDOM"},
+                        {"type": "HARVEST", "parameter": "COAL"}
+                    ]}]
+                }
+            ]
+        }
+        handle, self.config_path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(handle, 'w') as f:
+            json.dump(self.config, f)
+
+    def tearDown(self):
+        os.remove(self.config_path)
+
+    def test_run_game_is_reproducible(self):
+        first = simulate.run_game(self.config, simulate.sleep_policy, seed=4, max_days=5)
+        second = simulate.run_game(self.config, simulate.sleep_policy, seed=4, max_days=5)
+        self.assertEqual(first, second)
+        self.assertTrue(first.won or first.eliminated or first.days == 5)
+        self.assertEqual(len(first.resource_curve), first.days)
+
+    def test_policies_keep_energy_in_reserve(self):
+        config = dict(self.config, victory_conditions={"MINERAL": 1000})
+        config["controllers"][0]["resources"]["ENERGY"] = 80
+        for policy in (simulate.sleep_policy, simulate.all_in_policy):
+            result = simulate.run_game(config, policy, seed=3, max_days=3)
+            self.assertFalse(result.eliminated)
+            self.assertEqual(result.days, 3)
+            self.assertTrue(all(day['ENERGY'] > 0 for day in result.resource_curve))
+
+            # Once energy runs low the policy stops spending instead of going to 0
+            result = simulate.run_game(config, policy, seed=3, max_days=100)
+            self.assertFalse(result.eliminated)
+
+    def test_a_policy_wins_a_shipped_level(self):
+        with open(os.path.join(LEVELS_DIR, 'rare_config.json')) as f:
+            config = json.load(f)
+        wins = {name: sum(simulate.run_game(config, policy, seed, max_days=30).won for seed in range(10))
+                for name, policy in simulate.POLICIES.items()}
+        self.assertGreater(wins['aim'], 0)
+
+    def test_aim_policy_replaces_random_moves(self):
+        game = Game(self.config, seed=1)
+        orders = simulate.aim_policy(game, 0)
+        self.assertEqual([order['action_type'].name for order in orders],
+                         ['MODIFY_DECK', 'MODIFY_DECK', 'TAKE_BOT_ACTIONS'])
+        game.process_turn(orders)
+        deck = game.controllers[0].bots[0].deck
+        self.assertNotIn('RANDOM', [card.parameter.name for card in deck])
+        # With the deck fixed, the policy only takes bot actions
+        self.assertEqual([order['action_type'].name for order in simulate.aim_policy(game, 0)],
+                         ['TAKE_BOT_ACTIONS'])
+
+    def test_stops_when_policy_gives_no_orders(self):
+        result = simulate.run_game(self.config, lambda game, index: [], seed=0)
+        self.assertTrue(result.stalled)
+        self.assertEqual(result.turns, 0)
+
+    def test_pool_matches_serial(self):
+        serial = simulate.simulate(self.config_path, 'sleep', runs=12, seed=7, workers=1, max_days=5)
+        pooled = simulate.simulate(self.config_path, 'sleep', runs=12, seed=7, workers=2, max_days=5)
+        self.assertEqual(serial.results, pooled.results)
+        self.assertEqual(serial.to_dict()['resource_curve'], pooled.to_dict()['resource_curve'])
+
+    def test_report(self):
+        report = simulate.simulate(self.config_path, 'sleep', runs=20, seed=0, workers=1, max_days=5)
+        data = report.to_dict()
+        self.assertEqual(data['runs'], 20)
+        self.assertGreater(data['wins'], 0)
+        self.assertEqual(data['wins'], sum(data['days_to_victory']['histogram'].values()))
+        self.assertIn('games/s', report.format())
+
+    def test_load_policy(self):
+        self.assertIs(simulate.load_policy('sleep'), simulate.sleep_policy)
+        self.assertIs(simulate.load_policy('simulate:all_in_policy'), simulate.all_in_policy)
+        with self.assertRaises(ValueError):
+            simulate.load_policy('nonexistent')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import gzip
+import json
+import unittest
+from game import Game
+from game_enums import AssetType
+from game_interface import GameInterface, StateCache
+from game_objects import Asset, Position
+from wire_format import decode_state, negotiate_encoding, MAGIC
+
+class TestWireFormat(unittest.TestCase):
+    def setUp(self):
+        deck = [{"type": "MOVE", "parameter": "RANDOM"}, {"type": "HARVEST", "parameter": "ORE"}]
+        self.config = {
+            "map_width": 40,
+            "map_height": 30,
+            "seedling_maturity_time": 3,
+            "new_bot_cost": 10,
+            "modify_deck_cost": 5,
+            "victory_conditions": {"MINERAL": 100},
+            "initial_state": "uniform",
+            "asset_distribution": {"ORE": 200, "PLANT": 200, "COAL_SEEDLING": 40},
+            "controllers": [
+                {"resources": {"MINERAL": 0, "BIOMASS": 0, "ENERGY": 50},
+                 "bots": [{"x": x, "y": 3, "deck": deck} for x in range(0, 40, 4)]},
+                {"resources": {"MINERAL": 0, "BIOMASS": 0, "ENERGY": 50},
+                 "bots": [{"x": 39, "y": 29, "deck": deck}]}
+            ]
+        }
+
+    def dense_state(self, game):
+        interface = GameInterface()
+        interface.game = game
+        state = json.loads(json.dumps(interface.get_game_state()))
+        for row in state['map']:
+            for cell in row:
+                cell['bots'].sort(key=lambda bot: bot['id'])
+        return state, interface
+
+    def test_round_trip(self):
+        for storage in ('objects', 'arrays'):
+            game = Game(dict(self.config, map_storage=storage), seed=2)
+            # Stacked bots, the last cell and a large amount
+            game.place_asset(Position(39, 29), Asset(AssetType.ORE, 100000))
+            for controller in game.controllers:
+                game.process_bot_actions(controller, 20)
+            state, interface = self.dense_state(game)
+            data = interface.get_game_state_binary()
+            self.assertTrue(data.startswith(MAGIC))
+            self.assertEqual(decode_state(data), state)
+            self.assertLess(len(data), len(json.dumps(state)) // 5)
+
+    def test_empty_map(self):
+        game = Game(dict(self.config, initial_state="empty", controllers=[]), seed=1)
+        state, interface = self.dense_state(game)
+        self.assertEqual(decode_state(interface.get_game_state_binary()), state)
+
+    def test_rejects_other_data(self):
+        with self.assertRaises(ValueError):
+            decode_state(b'{"version": 1}')
+
+    def test_negotiate_encoding(self):
+        self.assertEqual(negotiate_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(negotiate_encoding('deflate, *'), negotiate_encoding('br, gzip'))
+        self.assertIsNone(negotiate_encoding('gzip;q=0, deflate'))
+        self.assertIsNone(negotiate_encoding('identity'))
+        self.assertIsNone(negotiate_encoding(None))
+
+    def test_cached_representations(self):
+        game = Game(self.config, seed=3)
+        state, _ = self.dense_state(game)
+        cache = StateCache.for_game(game)
+        self.assertEqual(decode_state(cache.get(game, binary=True)), state)
+        self.assertEqual(gzip.decompress(cache.get(game, binary=True, encoding='gzip')),
+                         cache.get(game, binary=True))
+        self.assertEqual(gzip.decompress(cache.get(game, encoding='gzip')), cache.get(game))
+        tags = {cache.etag(game), cache.etag(game, binary=True), cache.etag(game, encoding='gzip'),
+                cache.etag(game, binary=True, encoding='gzip')}
+        self.assertEqual(len(tags), 4)
+        # Deltas and sparse states stay JSON
+        version = game.version
+        game.process_bot_actions(game.controllers[0], 3)
+        self.assertEqual(cache.get(game, version, binary=True), cache.get(game, version))
+        self.assertEqual(cache.etag(game, version, binary=True), cache.etag(game, version))
+        self.assertEqual(cache.get(game, sparse=True, binary=True), cache.get(game, sparse=True))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+"""Compact binary encoding of full game states, and response compression.
+
+Layout (integers little endian):
+
+    magic    b'SFW1'
+    header   uint32 length, then compact JSON: every field of the dense
+             JSON state except 'map', plus 'asset_types', the AssetType
+             names in code order
+    cells    uint32 number of occupied cells, then for each occupied cell
+             in row-major order:
+                 varint  empty cells skipped since the previous occupied
+                         cell (or the start of the map)
+                 varint  asset count, then per asset: uint8 type code,
+                         varint amount, varint maturity_time + 1 (0: none)
+                 varint  bot count, then per bot: varint id, varint
+                         controller id
+
+Varints are unsigned LEB128. Empty cells cost nothing beyond their share
+of a skip count, so the size follows the occupied cells rather than the
+map area. decode_state (and decodeBinaryState in game_client.html) turn
+it back into the dense JSON layout.
+"""
+import gzip
+import json
+import struct
+from typing import Iterable, Optional, Sequence, Tuple
+from game_enums import AssetType
+from game_objects import Asset, Bot
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MEDIA_TYPE = 'application/x-spacefarm-state'
+MAGIC = b'SFW1'
+LENGTH = struct.Struct('<I')
+
+ASSET_TYPES = list(AssetType)
+ASSET_CODES = {asset_type: code for code, asset_type in enumerate(ASSET_TYPES)}
+
+# Content codings offered for responses, best first; br needs the brotli package
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def _varint(out: bytearray, value: int) -> None:
+    if value < 0:
+        raise ValueError(f"Cannot encode negative value {value}")
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode_state(header: dict, cells: Iterable[Tuple[int, Sequence[Asset], Iterable[Bot]]]) -> bytes:
+    """Encode a full state: header holds the non-map fields, cells the
+    (y * width + x, assets, bots) of the occupied cells in index order."""
+    header = dict(header, asset_types=[asset_type.name for asset_type in ASSET_TYPES])
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    body = bytearray()
+    count = 0
+    next_index = 0
+    for index, assets, bots in cells:
+        _varint(body, index - next_index)
+        _varint(body, len(assets))
+        for asset in assets:
+            body.append(ASSET_CODES[asset.type])
+            _varint(body, asset.amount)
+            _varint(body, 0 if asset.maturity_time is None else asset.maturity_time + 1)
+        bots = sorted(bots, key=lambda bot: bot.id)
+        _varint(body, len(bots))
+        for bot in bots:
+            _varint(body, bot.id)
+            _varint(body, bot.controller_id)
+        next_index = index + 1
+        count += 1
+    return b''.join((MAGIC, LENGTH.pack(len(header_bytes)), header_bytes, LENGTH.pack(count), body))
+
+
+def decode_state(data: bytes) -> dict:
+    """Decode a binary state into the dense JSON layout."""
+    if data[:4] != MAGIC:
+        raise ValueError("Not a binary game state")
+    offset = 4
+    (header_length,) = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+    state = json.loads(data[offset:offset + header_length])
+    offset += header_length
+    asset_types = state.pop('asset_types')
+    width, height = state['map_size']['width'], state['map_size']['height']
+    state['map'] = [[{'position': {'x': x, 'y': y}, 'assets': [], 'bots': []} for x in range(width)]
+                    for y in range(height)]
+    (count,) = LENGTH.unpack_from(data, offset)
+    offset += LENGTH.size
+
+    def varint() -> int:
+        nonlocal offset
+        value = shift = 0
+        while True:
+            byte = data[offset]
+            offset += 1
+            value |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    index = 0
+    for _ in range(count):
+        index += varint()
+        x, y = index % width, index // width
+        cell = state['map'][y][x]
+        for _ in range(varint()):
+            asset_type = asset_types[data[offset]]
+            offset += 1
+            amount = varint()
+            maturity = varint()
+            cell['assets'].append({'type': asset_type, 'amount': amount,
+                                   'maturity_time': maturity - 1 if maturity else None})
+        for _ in range(varint()):
+            bot_id = varint()
+            cell['bots'].append({'id': bot_id, 'controller_id': varint(), 'position': {'x': x, 'y': y}})
+        index += 1
+    return state
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a response body with one of ENCODINGS."""
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    if encoding == 'br' and brotli is not None:
+        return brotli.compress(body, quality=5)
+    raise ValueError(f"Unsupported content coding: {encoding}")
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """The best of ENCODINGS an Accept-Encoding header allows, or None."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None